@@ -4,6 +4,8 @@ import pymysql
 from sqlalchemy import create_engine
 import pandas as pd
 
+from SQL_Conexiune import parametri_mysql
+
 locatii = []
 nr_camere = []
 metriipatrati = []
@@ -103,7 +105,8 @@ sql_list = []
 sql_list = [tuple(index) for index in zip(locatii, preturi, valuta, nr_camere, pret_final, metriipatrati, valoare_bruta)]
 print(sql_list)
 
-sqlconnection = pymysql.connect(host="localhost", user="AS", password="Bella-4-ever1556")
+mysql = parametri_mysql()  # credențialele din variabilele de mediu IMOBILIARE_MYSQL_*
+sqlconnection = pymysql.connect(host=mysql["host"], port=mysql["port"], user=mysql["user"], password=mysql["password"])
 cursor = sqlconnection.cursor()
 
 sql = "DROP DATABASE IF EXISTS PROIECT_DIPLOMA;"
@@ -0,0 +1,247 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from Benchmark_Date import anunturi_sintetice, cadru_agregare, pagini_sintetice
+from Scraper_Loader import BACKENDURI, COLOANE_CADRU, DIMENSIUNE_LOT, BackendSQLite, cadru_lot, incarca, loturi
+from Scraper_Parser import amprenta, parseaza_pagina
+from Scraper_Store import AnunturiColoane
+from Scraper_Transform import cadru_anunturi, in_randuri, transforma
+from SQL_Aggregation import CAMERE_MAXIM, agrega, exporta_parquet
+from SQL_Summary import AgregateZona
+
+#  Măsurarea fiecărei etape a pipeline-ului pe date sintetice (Benchmark_Date) sau pe pagini salvate.
+#  Generarea datelor nu intră în timpii măsurați. Rezultatele sunt scrise în JSON, iar --compara le pune
+#  alături de o rulare anterioară (de exemplu a versiunii precedente) și marchează regresiile.
+MARIMI = (1_000, 100_000, 1_000_000)
+FISIER_REZULTATE = "benchmark.json"
+PRAG_REGRESIE = 0.10  # o etapă cu peste 10% mai lentă decât în rularea de referință este raportată
+METRICA_GRAFICE = "PretMediu_MetruPatrat"
+
+
+class Cronometru:
+    #  Timpul cumulat al secțiunilor măsurate: `with cronometru:` în jurul fiecărei porțiuni incluse
+    def __init__(self):
+        self.durata = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.durata += time.perf_counter() - self._start
+
+
+def _masurat(iterabil, cronometru):
+    #  Elementele iterabilului, cu timpul petrecut în producerea lor adăugat la cronometru
+    iterator = iter(iterabil)
+    while True:
+        with cronometru:
+            element = next(iterator, None)
+        if element is None:
+            return
+        yield element
+
+
+def etapa_parsare(numar, **_):
+    cronometru = Cronometru()
+    pagini = 0
+    for html in pagini_sintetice(numar):
+        with cronometru:
+            parseaza_pagina(html)
+        pagini += 1
+    return {"durata_s": cronometru.durata, "pagini": pagini, "ms_pe_pagina": cronometru.durata / pagini * 1000}
+
+
+def etapa_parsare_salvate(numar, pagini_salvate=(), **_):
+    #  Paginile reale (--pagini), parsate de atâtea ori cât să ajungă la `numar` anunțuri
+    if not pagini_salvate:
+        return None
+    pe_runda = sum(len(parseaza_pagina(html)) for html in pagini_salvate) or 1
+    runde = max(1, numar // pe_runda)
+    start = time.perf_counter()
+    for _ in range(runde):
+        for html in pagini_salvate:
+            parseaza_pagina(html)
+    durata = time.perf_counter() - start
+    pagini = runde * len(pagini_salvate)
+    return {"durata_s": durata, "anunturi": runde * pe_runda, "pagini": pagini, "ms_pe_pagina": durata / pagini * 1000}
+
+
+def etapa_transformare(numar, **_):
+    #  Loturile de anunțuri parsate -> coloane (Scraper_Store) -> TVA, preț pe metru pătrat, locații normalizate
+    cronometru = Cronometru()
+    for lot in loturi(anunturi_sintetice(numar), DIMENSIUNE_LOT):
+        with cronometru:
+            transforma(cadru_anunturi(AnunturiColoane.din_anunturi(lot)))
+    return {"durata_s": cronometru.durata}
+
+
+def etapa_incarcare(numar, backend="sqlite", **_):
+    #  De la anunțurile parsate până la rândurile scrise: transformare, zone, upsert, istoric și agregate.
+    #  SQLite folosește o bază temporară; MySQL folosește baza configurată, din care anunțurile sintetice
+    #  ("anunt-S...") sunt șterse la final.
+    generare = Cronometru()
+    with tempfile.TemporaryDirectory() as director:
+        if backend == "sqlite":
+            baza = BackendSQLite(os.path.join(director, "benchmark.sqlite"))
+        else:
+            baza = BACKENDURI[backend]()
+        data_rulare = date.today()
+
+        def randuri():
+            for lot in _masurat(loturi(anunturi_sintetice(numar), DIMENSIUNE_LOT), generare):
+                df = cadru_lot(AnunturiColoane.din_anunturi(lot), [amprenta(anunt) for anunt in lot], baza,
+                               data_rulare)
+                yield from in_randuri(df, COLOANE_CADRU)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            incarca(randuri(), baza, DIMENSIUNE_LOT, AgregateZona())
+        durata = time.perf_counter() - start - generare.durata
+        if backend != "sqlite":
+            with baza.sqlconnection.cursor() as cursor:
+                cursor.execute("DELETE FROM IstoricAnunturi WHERE IdAnunt LIKE 'anunt-S%';")
+                cursor.execute("DELETE FROM Imobiliare WHERE IdAnunt LIKE 'anunt-S%';")
+            baza.sqlconnection.commit()
+        baza.inchide()
+        if backend == "sqlite":
+            #  Engine-ul comun (SQL_Conexiune) al bazei temporare rămâne în cache-ul procesului: conexiunile lui
+            #  sunt închise aici, înainte de ștergerea directorului
+            baza.engine.dispose()
+    return {"durata_s": durata, "backend": backend}
+
+
+def etapa_agregare(numar, **_):
+    #  Un singur groupby vectorizat pe rândurile citite de SQL_ANUNTURI
+    df = cadru_agregare(numar)
+    start = time.perf_counter()
+    agregat = agrega(df)
+    return {"durata_s": time.perf_counter() - start, "grupuri": len(agregat)}
+
+
+def etapa_agregare_incrementala(numar, **_):
+    #  Actualizarea AgregateZona rând cu rând (ca în loader), apoi statisticile din histograme
+    df = cadru_agregare(numar)
+    df = df[["ZonaID", "NumarCamere", "PretFinal", "MetriPatrati", "PretMetruPatrat"]].astype(object)
+    randuri = list(df.where(df.notna(), None).itertuples(index=False, name=None))
+    agregate = AgregateZona()
+    start = time.perf_counter()
+    for rand in randuri:
+        agregate.adauga(*rand)
+    actualizare = time.perf_counter() - start
+    agregate.statistici()
+    return {"durata_s": time.perf_counter() - start, "actualizare_s": actualizare}
+
+
+def etapa_dashboard(numar, **_):
+    #  Pregătirea datelor dashboard-ului (StreamlitPg2_dark.py): exportul Parquet, îmbinarea cu geometria,
+    #  limitele culorilor și cele trei grafice pe zone, pentru fiecare număr de camere
+    try:
+        import geopandas as gpd
+        from Dashboard_Grafice import GRAFICE, construieste_grafic
+        from Dashboard_Precompute import intervale_choropleth, zone_camere
+        from Geo_Build import harta
+    except ImportError as e:
+        return {"omis": str(e)}
+    agregat = agrega(cadru_agregare(numar))
+    nil = gpd.read_file(harta())
+    with tempfile.TemporaryDirectory() as director:
+        start = time.perf_counter()
+        exporta_parquet(agregat, director)
+        for camere in range(1, CAMERE_MAXIM + 1):
+            zone = zone_camere(nil, camere, director)
+            intervale_choropleth(zone)
+            for tip in GRAFICE:
+                construieste_grafic(tip, zone, METRICA_GRAFICE, "#3FCCE6").to_json()
+        durata = time.perf_counter() - start
+    return {"durata_s": durata}
+
+
+ETAPE = {
+    "parsare": etapa_parsare,
+    "parsare_salvate": etapa_parsare_salvate,
+    "transformare": etapa_transformare,
+    "incarcare": etapa_incarcare,
+    "agregare": etapa_agregare,
+    "agregare_incrementala": etapa_agregare_incrementala,
+    "dashboard": etapa_dashboard,
+}
+
+
+def versiune_cod():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ruleaza(etape, marimi, repetari=1, **optiuni):
+    #  Cea mai bună din `repetari` măsurători, pentru fiecare etapă și mărime
+    rezultate = []
+    for numar in marimi:
+        for nume in etape:
+            masuratori = [ETAPE[nume](numar, **optiuni) for _ in range(repetari)]
+            if masuratori[0] is None:
+                continue
+            rezultat = min(masuratori, key=lambda m: m.get("durata_s", 0))
+            rezultat = {"etapa": nume, "anunturi": numar, **rezultat}
+            if "durata_s" in rezultat:
+                rezultat["anunturi_pe_s"] = rezultat.get("anunturi", numar) / rezultat["durata_s"]
+            rezultate.append(rezultat)
+            durata = f"{rezultat['durata_s']:9.3f}s" if "durata_s" in rezultat else f"omis: {rezultat.get('omis')}"
+            print(f"{nume:>22} {numar:>9} anunturi {durata}", file=sys.stderr)
+    return {"versiune": versiune_cod(), "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platforma": platform.platform(), "repetari": repetari,
+            "rezultate": rezultate}
+
+
+def compara(curent, referinta, prag=PRAG_REGRESIE):
+    #  Raportul duratelor față de rularea de referință; returnează numărul de regresii
+    vechi = {(r["etapa"], r["anunturi"]): r for r in referinta["rezultate"] if "durata_s" in r}
+    regresii = 0
+    print(f"{'etapa':>22} {'anunturi':>9} {'referinta':>10} {'acum':>10} {'raport':>7}")
+    for rezultat in curent["rezultate"]:
+        anterior = vechi.get((rezultat["etapa"], rezultat["anunturi"]))
+        if anterior is None or "durata_s" not in rezultat:
+            continue
+        raport = rezultat["durata_s"] / anterior["durata_s"]
+        regresie = raport > 1 + prag
+        regresii += regresie
+        print(f"{rezultat['etapa']:>22} {rezultat['anunturi']:>9} {anterior['durata_s']:>9.3f}s "
+              f"{rezultat['durata_s']:>9.3f}s {raport:>6.2f}x{'  REGRESIE' if regresie else ''}")
+    return regresii
+
+
+if __name__ == "__main__":
+    #  python Benchmark.py --marimi 1000 100000 --etape parsare transformare --compara benchmark_vechi.json
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--marimi", type=int, nargs="+", default=MARIMI, help="numerele de anunțuri sintetice")
+    parser.add_argument("--etape", nargs="+", choices=ETAPE, default=list(ETAPE), help="etapele măsurate")
+    parser.add_argument("--repetari", type=int, default=1, help="măsurători pe etapă; se păstrează cea mai bună")
+    parser.add_argument("--pagini", nargs="*", default=[], help="pagini HTML salvate, pentru etapa parsare_salvate")
+    parser.add_argument("--backend", choices=BACKENDURI, default="sqlite", help="baza de date a etapei de încărcare")
+    parser.add_argument("--iesire", default=FISIER_REZULTATE, help="fișierul JSON cu rezultatele")
+    parser.add_argument("--compara", metavar="FISIER", help="rezultatele unei rulări anterioare, pentru comparație")
+    parser.add_argument("--prag", type=float, default=PRAG_REGRESIE, help="încetinirea relativă raportată ca regresie")
+    args = parser.parse_args()
+
+    pagini_salvate = []
+    for cale in args.pagini:
+        with open(cale, encoding="utf-8") as f:
+            pagini_salvate.append(f.read())
+    rezultate = ruleaza(args.etape, args.marimi, args.repetari, pagini_salvate=pagini_salvate, backend=args.backend)
+    with open(args.iesire, "w", encoding="utf-8") as f:
+        json.dump(rezultate, f, indent=2, ensure_ascii=False)
+    if args.compara:
+        with open(args.compara, encoding="utf-8") as f:
+            sys.exit(1 if compara(rezultate, json.load(f), args.prag) else 0)
@@ -0,0 +1,139 @@
+import html
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from Scraper_Parser import Anunt
+from Scraper_Queue import ANUNTURI_PE_PAGINA
+from SQL_Schema import zone_harta
+
+#  Date sintetice pentru Benchmark.py, cu distribuțiile și defectele întâlnite pe imobiliare.ro: locații scrise
+#  în mai multe feluri (diacritice, cartiere fără poligon pe hartă), prețuri în mii de euro cu sau fără TVA,
+#  prețuri nedeclarate, suprafețe lipsă sau declarate eronat
+SUPRAFATA_CAMERE = {1: (36, 8), 2: (55, 10), 3: (75, 14), 4: (98, 20)}  # media și abaterea, în m²
+PONDERI_CAMERE = [0.2, 0.4, 0.3, 0.1]
+PRET_MP_MEDIAN = 1450  # euro / m²
+LOCATII_IN_AFARA_HARTII = ["Timisoara, zona Calea Sagului", "Timisoara, zona Braytim", "Dumbravita",
+                           "Giroc", "Mosnita Noua", "Timisoara, zona Ghiroda"]
+TITLURI = ["Apartament {c} camere {z}", "Apartament {c} camere de vanzare, {z}", "Vand apartament {c} camere {z}",
+           "Apartament {c} camere decomandat, zona {z}", "Ap. {c} cam. semidecomandat {z}"]
+PROCENT_PRET_NECOMUNICAT = 0.02
+PROCENT_FARA_SUPRAFATA = 0.02
+PROCENT_SUPRAFATA_ERONATA = 0.005
+PROCENT_PRET_ERONAT = 0.01  # preț scris cu un zero în plus
+PROCENT_TVA = 0.25
+
+
+def _locatii():
+    harta = [nume for _, nume in zone_harta()]
+    #  Aceleași zone, scrise și cu diacritice, ca pe site
+    return harta + [nume.replace("Timisoara", "Timişoara") for nume in harta] + LOCATII_IN_AFARA_HARTII
+
+
+def coloane_sintetice(numar, seed=0):
+    #  Valorile brute ale anunțurilor, generate vectorizat; măștile marchează câmpurile lipsă sau eronate
+    rng = np.random.default_rng(seed)
+    locatii = _locatii()
+    camere = rng.choice(np.arange(1, 5), size=numar, p=PONDERI_CAMERE)
+    medii = np.array([SUPRAFATA_CAMERE[c][0] for c in range(1, 5)])[camere - 1]
+    abateri = np.array([SUPRAFATA_CAMERE[c][1] for c in range(1, 5)])[camere - 1]
+    metri = np.round(np.maximum(rng.normal(medii, abateri), 18), 1)
+    pret_mp = rng.lognormal(np.log(PRET_MP_MEDIAN), 0.25, numar)
+    pret = np.round(metri * pret_mp / 100) / 10  # mii de euro, cu o zecimală, ca "65.5" pe site
+    pret = np.where(rng.random(numar) < PROCENT_PRET_ERONAT, pret * 10, pret)
+    return {
+        "id_anunt": [f"anunt-S{seed}-{i}" for i in range(numar)],
+        "camere": camere,
+        "locatie": rng.integers(0, len(locatii), numar),
+        "locatii": locatii,
+        "titlu": rng.integers(0, len(TITLURI), numar),
+        "pret": pret,
+        "necomunicat": rng.random(numar) < PROCENT_PRET_NECOMUNICAT,
+        "tva": rng.random(numar) < PROCENT_TVA,
+        "metri": np.where(rng.random(numar) < PROCENT_SUPRAFATA_ERONATA, metri * 100, metri),
+        "fara_suprafata": rng.random(numar) < PROCENT_FARA_SUPRAFATA,
+    }
+
+
+def _titlu(coloane, i):
+    zona = coloane["locatii"][coloane["locatie"][i]].split("zona ")[-1]
+    return TITLURI[coloane["titlu"][i]].format(c=coloane["camere"][i], z=zona)
+
+
+def anunturi_sintetice(numar, seed=0):
+    #  Înregistrările Anunt pe care parserul le-ar produce din paginile generate de pagini_sintetice, produse
+    #  pe rând (un milion de tupluri nu sunt ținute în memorie deodată)
+    coloane = coloane_sintetice(numar, seed)
+    for i in range(numar):
+        metri = coloane["metri"][i]
+        yield Anunt(
+            id_anunt=coloane["id_anunt"][i],
+            titlu=_titlu(coloane, i),
+            locatie=coloane["locatii"][coloane["locatie"][i]],
+            pret=None if coloane["necomunicat"][i] else int(float(f"{coloane['pret'][i]:.1f}") * 1000),
+            valuta=None if coloane["necomunicat"][i] else ("EUR + TVA" if coloane["tva"][i] else "EUR"),
+            nr_camere=int(coloane["camere"][i]),
+            metri_patrati=None if coloane["fara_suprafata"][i] or metri >= 1000 else float(metri),
+        )
+
+
+def _card(coloane, i):
+    camere = coloane["camere"][i]
+    caracteristici = f"<li>{'o camera' if camere == 1 else f'{camere} camere'}</li>"
+    if not coloane["fara_suprafata"][i]:
+        caracteristici += f"\n<li>{coloane['metri'][i]:.1f} mp utili</li>".replace(".", ",")
+    if coloane["necomunicat"][i]:
+        pret = '<div class="pret necomunicat">Pret la cerere</div>'
+    else:
+        pret = (f'<span class="pret-mare">{coloane["pret"][i]:.1f}</span>'
+                f'<span class="tva-luna">{"EUR + TVA" if coloane["tva"][i] else "EUR"}</span>')
+    #  Markup-ul din jurul câmpurilor (imagini, butoane, linkuri), pe care parserul îl parcurge și îl ignoră
+    return (f'<div class="box-anunt proprietate" id="{coloane["id_anunt"][i]}">'
+            f'<div class="slider-imagini"><a href="#"><img src="/img/{i}-1.jpg" alt="foto"></a>'
+            f'<a href="#"><img src="/img/{i}-2.jpg" alt="foto"></a></div>'
+            f'<div class="caseta-informatii"><h2 class="titlu-anunt"><a href="/anunt/{i}">'
+            f'{html.escape(_titlu(coloane, i))}</a></h2>'
+            f'<p class="location_txt">{html.escape(coloane["locatii"][coloane["locatie"][i]])}</p>'
+            f'<div class="pret">{pret}</div><ul class="caracteristici">{caracteristici}</ul>'
+            '<div class="butoane"><button class="favorite">Salveaza</button><a class="contact" href="#">Contact</a>'
+            '</div></div></div>\n')
+
+
+def pagini_sintetice(numar, seed=0):
+    #  Paginile de rezultate cu `numar` anunțuri, câte ANUNTURI_PE_PAGINA pe pagină, ca textele HTML descărcate
+    coloane = coloane_sintetice(numar, seed)
+    for inceput in range(0, numar, ANUNTURI_PE_PAGINA):
+        carduri = "".join(_card(coloane, i) for i in range(inceput, min(inceput + ANUNTURI_PE_PAGINA, numar)))
+        yield ('<html><head><title>Apartamente de vanzare Timis</title></head><body>'
+               f'<span class="total_anunturi_js hidden-xs grey_counter">{numar}</span>'
+               f'<div class="lista-anunturi">{carduri}</div></body></html>')
+
+
+def cadru_agregare(numar, seed=0):
+    #  Rândurile citite de SQL_Aggregation.SQL_ANUNTURI (zonele de pe hartă, după transformare)
+    rng = np.random.default_rng(seed)
+    zone = zone_harta()
+    alese = rng.integers(0, len(zone), numar)
+    camere = rng.choice(np.arange(1, 6), size=numar, p=[0.18, 0.38, 0.28, 0.11, 0.05])
+    metri = np.round(np.maximum(rng.normal(30 + 20 * camere, 12), 18), 2)
+    pret_mp = np.round(rng.lognormal(np.log(PRET_MP_MEDIAN), 0.25, numar))
+    pret = np.round(metri * pret_mp)
+    return pd.DataFrame({
+        "ZonaID": np.array([zona for zona, _ in zone])[alese],
+        "ZonăApartament": pd.Categorical.from_codes(alese, [nume for _, nume in zone]).astype(object),
+        "NumarCamere": camere,
+        "PretFinal": pret,
+        "MetriPatrati": metri,
+        "PretMetruPatrat": pd.array(np.where((pret_mp > 500) & (pret_mp < 5000), pret_mp, np.nan)).astype("Int64"),
+    })
+
+
+if __name__ == "__main__":
+    #  python Benchmark_Date.py 300 director -> pagini HTML sintetice pentru Scraper_Parser.py / Scraper_Store.py
+    numar, director = int(sys.argv[1]), sys.argv[2]
+    os.makedirs(director, exist_ok=True)
+    for pagina, text in enumerate(pagini_sintetice(numar), start=1):
+        with open(os.path.join(director, f"pagina_{pagina}.html"), "w", encoding="utf-8") as f:
+            f.write(text)
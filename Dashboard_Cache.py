@@ -0,0 +1,116 @@
+import json
+import os
+
+import geopandas as gpd
+import pandas as pd
+import streamlit as st
+
+from Dashboard_Precompute import FISIER_PRECALCULAT, intervale_choropleth
+from Dashboard_Precompute import zone_camere as _zone_camere
+from Geo_Build import NUME_OBIECT, cale_topojson, harta
+from SQL_Aggregation import DIRECTOR_EXPORT, cale_partitie
+from SQL_Trend import FISIER_TENDINTE, tendinte_camere
+
+
+def versiune_fisier(cale):
+    #  Versiunea datelor = momentul ultimei modificări a fișierului; un export nou invalidează automat cache-ul
+    try:
+        return os.stat(cale).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def versiune_camere(camere):
+    versiune = versiune_fisier(cale_partitie(camere, DIRECTOR_EXPORT))
+    if versiune is None:
+        versiune = versiune_fisier(f'sql_query_{camere}cam.csv')
+    return versiune
+
+
+#  Resursele comune tuturor sesiunilor (geometria, fișierul precalculat) și datele (statistici, îmbinări) sunt
+#  păstrate în cache-uri limitate, indexate după versiunea fișierelor din care provin: după un export nou,
+#  versiunea veche este eliminată din memorie. Parametrul `versiune` nu este folosit în corpul funcțiilor,
+#  dar face parte din cheia cache-ului.
+_VERSIUNI_GEOMETRIE = {}  # fișier -> versiunea geometriei păstrate în singleton
+
+
+@st.experimental_singleton
+def _geometrie_zone(fname, versiune):
+    return gpd.read_file(fname)[['geometry', 'text', 'id']]
+
+
+def geometrie_zone(fname, versiune):
+    #  Geometria este doar citită (îmbinările din zone_camere produc cadre noi), deci este încărcată o singură
+    #  dată pe proces și folosită fără copie. Singleton nu are max_entries: la o versiune nouă a fișierului,
+    #  cache-ul este golit, ca în memorie să rămână o singură versiune (publica_geometrie din Dashboard_Harta,
+    #  golită odată cu el, doar recopiază fișierul).
+    if _VERSIUNI_GEOMETRIE.setdefault(fname, versiune) != versiune:
+        st.experimental_singleton.clear()
+        _VERSIUNI_GEOMETRIE[fname] = versiune
+    return _geometrie_zone(fname, versiune)
+
+
+@st.experimental_memo(max_entries=2)
+def geojson_zone(fname, versiune):
+    #  memo returnează o copie la fiecare apel, deci folium poate adăuga stiluri fără să modifice originalul
+    with open(fname, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def geometrie_choropleth():
+    #  Argumentele de geometrie pentru folium.Choropleth: TopoJSON-ul cuantizat din Geo_Build (arcele comune
+    #  sunt trimise o singură dată) sau, dacă nu a fost construit, GeoJSON-ul
+    fname = cale_topojson()
+    versiune = versiune_fisier(fname)
+    if versiune is not None:
+        return {"geo_data": geojson_zone(fname, versiune), "topojson": f"objects.{NUME_OBIECT}"}
+    fname = harta()
+    return {"geo_data": geojson_zone(fname, versiune_fisier(fname))}
+
+
+@st.experimental_memo(max_entries=8)
+def precalculat(cale, versiune, camere):
+    #  Partea lui Dashboard_Precompute pentru numărul de camere dat, citită o dată pentru fiecare export: memo
+    #  copiază la fiecare rerulare doar zonele și intervalele selecției, nu tot fișierul
+    return pd.read_pickle(cale)[camere]
+
+
+@st.experimental_memo(max_entries=8)
+def zone_camere(camere, versiune_harta, versiune_date):
+    #  Rezervă pentru lipsa fișierului precalculat: îmbinarea geometrie + statistici depinde doar de numărul
+    #  de camere și de versiunile datelor, nu și de metrica sau culoarea alese
+    zone = _zone_camere(geometrie_zone(harta(), versiune_harta), camere)
+    return {"zone": zone, "intervale": intervale_choropleth(zone)}
+
+
+def _versiune_precalculat(camere):
+    #  Versiunea fișierului precalculat, dacă este cel puțin la fel de nou ca exportul pentru numărul de camere
+    versiune_precalculat = versiune_fisier(FISIER_PRECALCULAT)
+    if versiune_precalculat is not None and versiune_precalculat >= (versiune_camere(camere) or 0):
+        return versiune_precalculat
+    return None
+
+
+def versiune_date(camere):
+    #  Versiunea datelor afișate pentru numărul de camere dat, pentru cheile cache-urilor construite peste ele
+    return _versiune_precalculat(camere) or (versiune_fisier(harta()), versiune_camere(camere))
+
+
+def date_dashboard(camere):
+    #  (GeoDataFrame zone + statistici, {metrică: limitele claselor de culoare}, geometria pentru Choropleth)
+    versiune_precalculat = _versiune_precalculat(camere)
+    if versiune_precalculat is not None:
+        date = precalculat(FISIER_PRECALCULAT, versiune_precalculat, camere)
+    else:
+        date = zone_camere(camere, versiune_fisier(harta()), versiune_camere(camere))
+    return date["zone"], date["intervale"], geometrie_choropleth()
+
+
+@st.experimental_memo(max_entries=8)
+def _tendinte(camere, versiune):
+    return tendinte_camere(camere)
+
+
+def tendinte_dashboard(camere):
+    #  Seriile săptămânale pentru numărul de camere ales, sau None înainte de primul export al tendințelor
+    return _tendinte(camere, versiune_fisier(FISIER_TENDINTE))
@@ -0,0 +1,56 @@
+from functools import lru_cache
+
+import plotly.express as px
+import plotly.io as pio
+
+from Dashboard_Cache import date_dashboard, versiune_date
+
+FIGURI_IN_CACHE = 64  # figurile serializate păstrate în memorie (tip x camere x metrică x culoare)
+TRANSPARENT = 'rgba(0,0,0,0)'
+
+
+def _scatter_3d(df, metrica, culori):
+    fig = px.scatter_3d(df, x=metrica, y="ZonăApartament", z=metrica, hover_name="ZonăApartament", size=metrica,
+                        size_max=40, color=culori, color_discrete_map="identity", template="plotly_dark")
+    fig.update_layout(scene={'camera_eye': {"x": 2, "y": 0.6, "z": 1},
+                             "aspectratio": {"x": 1, "y": 1.5, "z": 0.75}},
+                      margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+
+def _bar_polar(df, metrica, culori):
+    fig = px.bar_polar(df, r=metrica, theta="ZonăApartament", color=culori, color_discrete_map="identity",
+                       template="plotly_dark")
+    fig.update_layout(margin=dict(l=55, r=55, t=55, b=55))
+    return fig
+
+
+def _bar(df, metrica, culori):
+    fig = px.bar(df, x="ZonăApartament", y=metrica, color=culori, color_discrete_map="identity",
+                 template="plotly_dark")
+    fig.update_layout(margin=dict(l=55, r=55, t=55, b=55))
+    return fig
+
+
+GRAFICE = {"scatter_3d": _scatter_3d, "bar_polar": _bar_polar, "bar": _bar}
+
+
+def construieste_grafic(tip, df, metrica, culoare):
+    #  Toate graficele pe zone: o singură culoare, repetată pentru fiecare rând al datelor (numărul de zone
+    #  diferă între numerele de camere și între exporturi)
+    fig = GRAFICE[tip](df, metrica, [culoare] * len(df))
+    fig.update_layout(paper_bgcolor=TRANSPARENT, plot_bgcolor=TRANSPARENT, autosize=True)
+    return fig
+
+
+@lru_cache(maxsize=FIGURI_IN_CACHE)
+def _grafic_json(tip, camere, metrica, culoare, versiune):
+    #  Figura serializată, comună tuturor sesiunilor; `versiune` face doar parte din cheie, ca un export nou să
+    #  nu mai folosească figurile vechi
+    df, _, _ = date_dashboard(camere)
+    return construieste_grafic(tip, df, metrica, culoare).to_json()
+
+
+def grafic(tip, camere, metrica, culoare):
+    #  O selecție deja afișată (camere, metrică, culoare) refolosește figura din cache, fără plotly.express
+    return pio.from_json(_grafic_json(tip, camere, metrica, culoare, versiune_date(camere)))
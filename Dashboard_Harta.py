@@ -0,0 +1,36 @@
+import os
+import shutil
+
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from Dashboard_Cache import versiune_fisier
+from Geo_Build import cale_topojson, harta
+
+DIRECTOR_COMPONENTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "harta_componenta")
+_harta_zone = components.declare_component("harta_zone", path=DIRECTOR_COMPONENTA)
+
+
+@st.experimental_singleton
+def publica_geometrie(sursa, versiune):
+    #  Geometria este copiată lângă index.html, ca fișier static servit de componentă; versiunea din URL
+    #  face ca browserul să o descarce din nou doar după o reconstrucție (Geo_Build)
+    _, extensie = os.path.splitext(sursa)
+    fisier = "zone" + extensie
+    shutil.copyfile(sursa, os.path.join(DIRECTOR_COMPONENTA, fisier))
+    return f"{fisier}?v={versiune}"
+
+
+def harta_zone(df, metrica, intervale, culoare, inaltime=400, key="harta_zone"):
+    #  Harta trimisă o singură dată pe sesiune: la fiecare rerulare pleacă spre browser doar vectorul de valori
+    #  pe zonă (după ZonaID = id-ul din geojson, sau după nume pentru exporturile CSV vechi) și stilul
+    sursa = cale_topojson()
+    if versiune_fisier(sursa) is None:
+        sursa = harta()
+    geometrie = publica_geometrie(sursa, versiune_fisier(sursa))
+    cheie, coloana = ("id", "ZonaID") if "ZonaID" in df else ("text", "ZonăApartament")
+    valori = {str(zona): (None if pd.isna(valoare) else float(valoare))
+              for zona, valoare in zip(df[coloana], df[metrica])}
+    return _harta_zone(geometrie=geometrie, cheie=cheie, valori=valori, intervale=intervale.get(metrica),
+                       culoare=culoare, metrica=metrica, inaltime=inaltime, key=key, default=None)
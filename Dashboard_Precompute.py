@@ -0,0 +1,55 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from Geo_Build import harta
+from SQL_Aggregation import CAMERE_MAXIM, DIRECTOR_EXPORT, citeste_partitie
+
+FISIER_PRECALCULAT = os.path.join(DIRECTOR_EXPORT, "dashboard.pkl")
+METRICI = ['PretMediu', 'PretMedian', 'PretMinim', 'PretMaxim', 'PretMediu_MetruPatrat', 'PretMedian_MetruPatrat',
+           'NumarAnunturi', 'MetriPartrati_InMedie']
+NUMAR_INTERVALE = 6  # ca valoarea implicită din folium.Choropleth
+
+
+def statistici(camere, director=DIRECTOR_EXPORT):
+    cam = citeste_partitie(camere, director)
+    if cam is None:
+        cam = pd.read_csv(f'sql_query_{camere}cam.csv')
+    return cam
+
+
+def intervale_choropleth(df, metrici=METRICI):
+    #  Limitele claselor de culoare pentru fiecare metrică, calculate la fel ca în folium (intervale egale)
+    intervale = {}
+    for metrica in metrici:
+        if metrica not in df:
+            continue
+        valori = df[metrica].dropna().to_numpy(dtype=float)
+        if len(valori):
+            intervale[metrica] = list(np.histogram_bin_edges(valori, bins=NUMAR_INTERVALE))
+    return intervale
+
+
+def zone_camere(nil, camere, director=DIRECTOR_EXPORT):
+    return nil[['geometry', 'text']].merge(statistici(camere, director), left_on="text",
+                                           right_on="ZonăApartament", how="inner")
+
+
+def precalculeaza(fname=None, iesire=FISIER_PRECALCULAT):
+    #  Rulat după fiecare export: pentru fiecare număr de camere, îmbinarea geometrie + statistici și limitele
+    #  claselor de culoare. Dashboard-ul nu mai face nicio îmbinare la interacțiune, doar o căutare în dicționar.
+    nil = gpd.read_file(fname or harta())
+    precalculat = {}
+    for camere in range(1, CAMERE_MAXIM + 1):
+        zone = zone_camere(nil, camere)
+        precalculat[camere] = {"zone": zone, "intervale": intervale_choropleth(zone)}
+    os.makedirs(os.path.dirname(iesire), exist_ok=True)
+    pd.to_pickle(precalculat, iesire + ".tmp")
+    os.replace(iesire + ".tmp", iesire)
+    return precalculat
+
+
+if __name__ == "__main__":
+    precalculeaza()
@@ -1,23 +1,55 @@
-from bs4 import BeautifulSoup
-import requests
-import pymysql
-from sqlalchemy import create_engine
+import argparse
+from datetime import date, timedelta
+
 import pandas as pd
 
-locatii = []
-nr_camere = []
-metripatrati = []
-preturi = []
-pret_final = []
-valuta = []
-valoare_bruta = []
+from Metrici import METRICI
+from Scraper_Cache import CacheHttp, itereaza_din_cache
+from Scraper_Checkpoint import Checkpoint
+from Scraper_Dedup import IndexDuplicate
+from Scraper_Fetch import descarca_pagina, itereaza_pagini
+from Scraper_Loader import BACKENDURI, COLOANE_CADRU, DIMENSIUNE_LOT, cadru_lot, incarca, pagina_neschimbata
+from Scraper_Parser import amprenta, cheie_anunt, numar_anunturi, parseaza_pagina
+from Scraper_Store import AnunturiColoane
+from Scraper_Transform import in_randuri
+from SQL_Conexiune import BACKEND
+from SQL_Schema import CATEGORIE_HARTA, JUDET_HARTA
+from SQL_Stats import statistici_grupate
+from SQL_Summary import AgregateZona, fisier_agregate
+from SQL_Trend import randuri_tendinte, saptamana
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--replay", nargs="?", const="ultima", metavar="AAAA-LL-ZZ",
+                    help="reprocesează o rulare anterioară exclusiv din cache-ul local, fără acces la rețea "
+                         "(implicit ultima rulare salvată)")
+parser.add_argument("--incremental", action="store_true",
+                    help="oprește crawl-ul la prima pagină ale cărei anunțuri sunt toate deja salvate și nemodificate")
+parser.add_argument("--backend", choices=BACKENDURI, default=BACKEND,
+                    help="baza de date în care sunt încărcate anunțurile (sqlite pentru rulări locale, mysql-infile "
+                         "pentru încărcarea cu LOAD DATA LOCAL INFILE; implicit IMOBILIARE_BACKEND sau mysql)")
+parser.add_argument("--lot", type=int, default=DIMENSIUNE_LOT, help="numărul de anunțuri scrise într-un lot")
+parser.add_argument("--expira", type=int, metavar="ZILE",
+                    help="după un crawl complet, șterge anunțurile care nu au mai fost văzute de ZILE zile")
+args = parser.parse_args()
+if args.expira is not None and args.incremental:
+    parser.error("--expira are nevoie de un crawl complet, nu poate fi folosit cu --incremental")
+cache = CacheHttp()
+checkpoint = Checkpoint()
+backend = BACKENDURI[args.backend]()
+data_rulare = date.today()
 
 first_page = "https://www.imobiliare.ro/vanzare-apartamente/timis?id=26646339&pagina=1"  # linkul primei pagini
-response = requests.get(first_page)  # colectarea codului html al primei pagini
-pagina = response.text  # transpunerea acestuia in modul text
-first_soup = BeautifulSoup(pagina, "html.parser")  # parsarea textului utilizând html parser
-imobiliare_nr_anunturi = first_soup.find(name="span", class_="total_anunturi_js hidden-xs grey_counter")  # găsirea rândului ce conține numărul total de anunțuri
-nr_anunturi = int(imobiliare_nr_anunturi.getText())  # preluarea textului aferent numărului total de anunțuri și transformarea lui în număr real
+if args.replay:
+    data_replay = cache.ultima_data(first_page) if args.replay == "ultima" else date.fromisoformat(args.replay)
+    pagina = cache.citeste(first_page, data_replay)
+    if pagina is None:
+        parser.error(f"nu exista in cache o rulare din {data_replay}")
+    data_rulare = data_replay
+else:
+    #  O rulare întreruptă este continuată cu data ei, iar paginile deja parsate sunt luate din checkpoint
+    data_rulare = checkpoint.incepe(first_page, data_rulare)
+    pagina = descarca_pagina(first_page, cache, data_rulare)  # colectarea codului html al primei pagini, în format text
+nr_anunturi = numar_anunturi(pagina)  # preluarea numărului total de anunțuri din rândul dedicat al primei pagini
 nr_pagini = nr_anunturi / 30 #împărtirea numărului total de anunțuri la numărul de anunțuri per pagină din care rezultă un număr rațional
 
 if nr_pagini - int(nr_pagini) != 0:  # conditia de asigurare a corectitudinii numărului ultimei pagini
@@ -27,128 +59,110 @@ else:
 
 nr_pg = 10  # doar pentru test, in rest se foloseste variabila nr_pagini"
 
-page = 1
-while page <= nr_pagini:
-    url = f"https://www.imobiliare.ro/vanzare-apartamente/timis?id=26646339&pagina={page}"
-    response = requests.get(url)
-    imobiliare_web_page = response.text
-    soup = BeautifulSoup(imobiliare_web_page, "html.parser")
-    imobiliare_locatie = soup.find_all(name="p", class_="location_txt")
-    if soup.find(name="div", class_="pret necomunicat"):
-        pass
-    else:
-        for locatie in imobiliare_locatie:
-            locatii.append(locatie.getText().strip().replace("ş", "s").replace("Ş", "S")
-                           .replace("â", "a").replace("ţ", "t").replace("Î", "I").replace("ă", "a"))
-        imobiliare_valuta = soup.find_all(name="span", class_="tva-luna")
-        for val in imobiliare_valuta:
-            valuta.append(val.getText())
-        imobiliare_pret = soup.find_all(name="span", class_="pret-mare")
-        for pret in imobiliare_pret:
-            try:
-                pret = (float(pret.getText()) * 1000)
-                preturi.append(int(pret))
-            except:
-                preturi.append(None)  # "Valoare eronata site")
-
-        imobiliare_caracteristici = soup.find_all(name="ul", class_="caracteristici")
-        for caracteristici in imobiliare_caracteristici:
-            if caracteristici.getText().strip().split()[0] == "o":
-                nr_camere.append(1)
-            elif len(caracteristici.getText().strip().split()[0]) > 5:
-                nr_camere.append(None)  # "Valoare eronata site")
-            else:
-                nr_camere.append(int(caracteristici.getText().strip().split()[0]))
-
-            try:
-                converted_mp = caracteristici.getText().strip().split()[2].replace(",", ".")
-                if float(converted_mp) < 1000:
-                    metripatrati.append(float(converted_mp))
-                else:
-                    metripatrati.append(None)  # "Valoare eronata site") #"Metri patrati declarati eronat"
-            except:
-                metripatrati.append(None)  # "Valoare eronata site") #"Metri patrați nedeclarati de catre proprietar"
-    if len(locatii) < nr_anunturi:
-        page = page + 1
-
-#  Calcularea valorii brute ce reprezintă defapt prețul împărțit la numărul de metri pătrați
-for i in range(len(preturi)):
-    try:
-        if valuta[i] == "EUR + TVA":
-            pret_val = preturi[i] + (preturi[i] * 0.19)
-        else:
-            pret_val = preturi[i]
-        pret_final.append(pret_val)
-        valb = round(pret_val / metripatrati[i])
-        if 500 < valb < 5000:
-            valoare_bruta.append(valb)
-        else:
-            valoare_bruta.append(None)  # "Valoare eronata site")
-    except:
-        valoare_bruta.append(None)  # "Valoare eronata site")
-
-# Valoarea medie finală dintre pret/metri pătrați în toată Timișoara
-min_val = min(i for i in valoare_bruta if i is not None)
-index = valoare_bruta.index(min_val)
-
-suma = 0
-valoare_bruta_medie = 0
-for k in valoare_bruta:
-    if k is not None:
-        if k < 10000:
-            suma = suma + k
-valoare_bruta_medie = suma / (len(valoare_bruta) - valoare_bruta.count(None))
-
-#  Adaugarea datelor colectate în serverul propriu de baze de date MySQL
-sql_list = []
-sql_list = [tuple(index) for index in zip(locatii, preturi, valuta, nr_camere, pret_final, metripatrati, valoare_bruta)]
-print(sql_list)
-
-sqlconnection = pymysql.connect(host="localhost", user="AS", password="Bella-4-ever1556")
-cursor = sqlconnection.cursor()
-
-sql = "DROP DATABASE IF EXISTS PROIECT_DIPLOMA;"
-cursor.execute(sql)
-
-sql = "CREATE DATABASE IF NOT EXISTS PROIECT_DIPLOMA;"
-cursor.execute(sql)
-
-sql = "USE PROIECT_DIPLOMA;"
-cursor.execute(sql)
-
-sql = "CREATE TABLE Imobiliare (ID int NOT NULL AUTO_INCREMENT," \
-      " LocatieApartament varchar(255)," \
-      " Pret int," \
-      " Valuta varchar(255)," \
-      " NumarCamere int," \
-      " MetriPatrati float," \
-      " PretFinal int," \
-      " PretMetruPatrat int," \
-      " PRIMARY KEY(ID));"
-cursor.execute(sql)
-
-with sqlconnection.cursor() as cursor:
-    cursor.executemany("insert into imobiliare(LocatieApartament, Pret, Valuta, NumarCamere, PretFinal,"
-                       " MetriPatrati, PretMetruPatrat) values (%s, %s, %s, %s, %s, %s, %s)", sql_list)
-    sqlconnection.commit()
-
-print(cursor.fetchall()) 
-                                           
+urls = [f"https://www.imobiliare.ro/vanzare-apartamente/timis?id=26646339&pagina={page}"
+        for page in range(1, nr_pagini + 1)]
+salvate = {} if args.replay else checkpoint.pagini(first_page)
+if salvate:
+    print(f"Reluarea rularii din {data_rulare}: {len(salvate)} pagini deja parsate")
+#  Paginile sunt descărcate concurent, dar ajung aici în ordinea numărului paginii
+if args.replay:
+    pagini = itereaza_din_cache(urls, cache, data_replay)
+else:
+    pagini = itereaza_pagini([url for url in urls if url not in salvate], cache=cache, data=data_rulare)
+
+statistici = {"pret_mp": pd.Series(dtype="float64"), "minim": None}
+
+
+def anunturi_pagini():
+    #  (url, anunțuri, din checkpoint): întâi paginile terminate înainte de o întrerupere, apoi cele descărcate,
+    #  fiecare salvată în checkpoint imediat după parsare
+    for url, anunturi in salvate.items():
+        yield url, anunturi, True
+    for url, imobiliare_web_page in pagini:
+        anunturi = parseaza_pagina(imobiliare_web_page)
+        if not args.replay:
+            checkpoint.marcheaza(first_page, url, anunturi)
+        yield url, anunturi, False
+
+
+def loturi_anunturi():
+    #  Anunțurile parsate sunt grupate în loturi de --lot înregistrări, ținute pe coloane (Scraper_Store) și
+    #  transformate apoi coloană cu coloană
+    lot = AnunturiColoane(args.lot)
+    amprente = []
+    for url, anunturi, din_checkpoint in anunturi_pagini():
+        chei_amprente = [(cheie_anunt(anunt), amprenta(anunt)) for anunt in anunturi]
+        #  Paginile din checkpoint pot fi deja încărcate, deci nu spun nimic despre restul crawl-ului
+        if args.incremental and not din_checkpoint and pagina_neschimbata(backend, chei_amprente):
+            print(f"Pagina fara anunturi noi sau modificate, crawl oprit: {url}")
+            break
+        for anunt, (cheie, ampr) in zip(anunturi, chei_amprente):
+            lot.adauga(anunt._replace(id_anunt=cheie))
+            amprente.append(ampr)
+        if len(lot) >= args.lot:
+            yield lot, amprente
+            lot = AnunturiColoane(args.lot)
+            amprente = []
+    if lot:
+        yield lot, amprente
+
+
+def randuri():
+    #  Calcularea valorii brute ce reprezintă defapt prețul împărțit la numărul de metri pătrați, pe loturi
+    for lot, amprente in loturi_anunturi():
+        df = cadru_lot(lot, amprente, backend, data_rulare, duplicate=duplicate)
+        valide = df["pret_mp"].dropna()
+        #  Doar numărul de apariții al fiecărei valori, din care sunt calculate la final media și mediana
+        statistici["pret_mp"] = statistici["pret_mp"].add(valide.value_counts(), fill_value=0)
+        if len(valide) and (statistici["minim"] is None or valide.min() < statistici["minim"]["pret_mp"]):
+            statistici["minim"] = df.loc[valide.idxmin()]
+        yield from in_randuri(df, COLOANE_CADRU)
+
+
+#  Adaugarea datelor colectate în baza de date. Anunțurile deja existente sunt actualizate pe loc (upsert),
+#  iar cele noi adăugate, astfel încât istoricul nu se mai pierde la fiecare rulare
+#  Agregatele pe zonă și număr de camere sunt actualizate odată cu fiecare lot scris (vezi SQL_Summary)
+#  Locațiile salvate înainte de rezolvitorul de zone sunt mutate pe poligoanele corespunzătoare; după o astfel de
+#  mutare, ca și după o rulare întreruptă, agregatele salvate nu mai corespund tabelului și sunt reconstruite
+agregate = None if backend.reasociaza_zone() or salvate else AgregateZona.citeste(fisier_agregate(backend.engine))
+agregate = agregate or AgregateZona.reconstruieste(backend.engine)
+#  Anunțurile repetate în rulare sunt eliminate, iar cele repostate marcate ca duplicate ale originalului, deja
+#  salvat sau văzut mai devreme în rulare (vezi Scraper_Dedup); duplicatele nu intră în statistici
+duplicate = IndexDuplicate.din_backend(backend)
+incarca(randuri(), backend, args.lot, agregate)
+print(duplicate.sumar())
+METRICI.respinge("anunt_repetat", duplicate.exacte)
+METRICI.numara("aproape_duplicate", duplicate.aproape)
+if args.expira is not None:
+    #  Doar anunțurile țintei acestui crawl (apartamente de vânzare din Timiș); celelalte ținte (DataGatering_Tinte)
+    #  nu au fost recitite și nu pot fi considerate expirate
+    for rand in backend.sterge_expirate((data_rulare - timedelta(days=args.expira)).isoformat(),
+                                        data_rulare.isoformat(), CATEGORIE_HARTA, JUDET_HARTA):
+        agregate.scade(*rand)
+agregate.salveaza(fisier_agregate(backend.engine))
+#  Starea de la sfârșitul rulării devine punctul săptămânii în seriile de tendințe (SQL_Trend)
+backend.scrie_tendinte(saptamana(data_rulare).isoformat(), randuri_tendinte(agregate, data_rulare))
+backend.inchide()
+if not args.replay:
+    checkpoint.termina(first_page)
+checkpoint.inchide()
+#  Timpii pe etape (descărcare, parsare, transformare, încărcare), ratele, valorile respinse după motiv și memoria
+#  maximă a rulării, scrise în metrici/ ca fișier Prometheus și JSON (vezi Metrici)
+METRICI.afiseaza("crawl")
+METRICI.scrie("crawl")
+
+# Valoarea medie finală dintre pret/metri pătrați în toată Timișoara (medie trunchiată și mediană)
+if len(statistici["pret_mp"]):  # o rulare incrementală poate să nu aducă nimic nou
+    oras = statistici_grupate([0] * len(statistici["pret_mp"]), statistici["pret_mp"].index.to_numpy(dtype=float),
+                              1, ponderi=statistici["pret_mp"].to_numpy()).iloc[0]
+    valoare_bruta_medie = oras["medie_trunchiata"]
+    valoare_bruta_mediana = oras["p50"]
 
 """
 #  Sectiune de afisare
-print(len(locatii))
-print(len(preturi))
-print(len(metripatrati))
-print(len(nr_camere))
-print(len(valoare_bruta))
-print(locatii)
-print(nr_camere)
-print(metripatrati)
-print(preturi)
-print(valuta)
-print(valoare_bruta)
+anunt_min = statistici["minim"]
 print("Media preturilor per metru patrat in Timișoara este: ", "{:.2f}".format(valoare_bruta_medie), "Euro")
-print(locatii[index], " ", nr_camere[index], " Camere ", preturi[index], " ", valuta[index], " ", metripatrati[index],
-      " ", "Pret/MetriPatrati:", valoare_bruta[index], valuta[index])    
+print("Mediana preturilor per metru patrat in Timișoara este: ", "{:.2f}".format(valoare_bruta_mediana), "Euro")
+print(anunt_min.locatie, " ", anunt_min.nr_camere, " Camere ", anunt_min.pret, " ", anunt_min.valuta, " ",
+      anunt_min.metri_patrati, " ", "Pret/MetriPatrati:", anunt_min.pret_mp, anunt_min.valuta)
 """
@@ -0,0 +1,76 @@
+import argparse
+import multiprocessing
+import os
+from datetime import date
+
+from Metrici import METRICI
+from Scraper_Dedup import IndexDuplicate
+from Scraper_Loader import BACKENDURI, COLOANE_CADRU, DIMENSIUNE_LOT, cadru_lot, incarca, loturi
+from Scraper_Parser import amprenta, cheie_anunt
+from Scraper_Queue import ANUNTURI_PE_PAGINA, ESUAT, FISIER_COADA, FISIER_TINTE, CoadaLucru, citeste_tinte, lucreaza
+from Scraper_Store import AnunturiColoane
+from Scraper_Transform import in_randuri
+from SQL_Conexiune import BACKEND
+from SQL_Summary import AgregateZona, fisier_agregate
+from SQL_Trend import randuri_tendinte, saptamana
+
+
+def randuri(coada, tinta, backend, data_rulare, dimensiune_lot, duplicate):
+    #  Paginile parsate ale țintei, din coadă, transformate pe loturi de aproximativ dimensiune_lot anunțuri
+    for lot in loturi(coada.pagini_gata(tinta.cheie), max(1, dimensiune_lot // ANUNTURI_PE_PAGINA)):
+        anunturi = [anunt._replace(id_anunt=cheie_anunt(anunt)) for _, pagina in lot for anunt in pagina]
+        df = cadru_lot(AnunturiColoane.din_anunturi(anunturi), [amprenta(anunt) for anunt in anunturi], backend,
+                       data_rulare, tinta.categorie, tinta.judet, duplicate)
+        yield from in_randuri(df, COLOANE_CADRU)
+
+
+if __name__ == "__main__":
+    #  Crawl-ul pentru toate țintele din configurație (categorie + județ, vezi tinte_crawl.json): paginile sunt
+    #  descărcate și parsate de un grup de procese dintr-o coadă comună, apoi un singur proces le încarcă
+    #  în baza de date
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tinte", default=FISIER_TINTE, help="fișierul JSON cu țintele crawl-ului")
+    parser.add_argument("--procese", type=int, default=os.cpu_count(),
+                        help="numărul de procese care descarcă și parsează paginile")
+    parser.add_argument("--backend", choices=BACKENDURI, default=BACKEND,
+                        help="baza de date în care sunt încărcate anunțurile (sqlite pentru rulări locale, "
+                             "mysql-infile pentru încărcarea cu LOAD DATA LOCAL INFILE; implicit IMOBILIARE_BACKEND "
+                             "sau mysql)")
+    parser.add_argument("--lot", type=int, default=DIMENSIUNE_LOT, help="numărul de anunțuri scrise într-un lot")
+    args = parser.parse_args()
+
+    coada = CoadaLucru()
+    #  O rulare întreruptă este continuată: paginile deja parsate rămân în coadă, doar restul sunt descărcate
+    data_rulare = coada.porneste(citeste_tinte(args.tinte), date.today())
+
+    with multiprocessing.Pool(args.procese) as pool:
+        rezultate = pool.starmap(lucreaza, [(FISIER_COADA, args.procese, data_rulare)] * args.procese)
+    for _, stare in rezultate:
+        METRICI.combina(stare)  # descărcarea și parsarea au loc în procesele de lucru
+    procesate = sum(pagini for pagini, _ in rezultate)
+    print(f"{procesate} pagini descarcate si parsate de {args.procese} procese")
+
+    backend = BACKENDURI[args.backend]()
+    #  După o încărcare întreruptă, agregatele salvate nu mai corespund tabelului și sunt reconstruite
+    reluata = coada.incepe_incarcarea()
+    agregate = None if backend.reasociaza_zone() or reluata else AgregateZona.citeste(fisier_agregate(backend.engine))
+    agregate = agregate or AgregateZona.reconstruieste(backend.engine)
+    duplicate = IndexDuplicate.din_backend(backend)
+    for tinta in coada.tinte():
+        incarca(randuri(coada, tinta, backend, data_rulare, args.lot, duplicate), backend, args.lot, agregate)
+        coada.marcheaza_incarcate(tinta.cheie)
+    print(duplicate.sumar())
+    METRICI.respinge("anunt_repetat", duplicate.exacte)
+    METRICI.numara("aproape_duplicate", duplicate.aproape)
+    agregate.salveaza(fisier_agregate(backend.engine))
+    backend.scrie_tendinte(saptamana(data_rulare).isoformat(), randuri_tendinte(agregate, data_rulare))
+    backend.inchide()
+
+    #  Țintele cu pagini eșuate sunt raportate, fără să fi oprit încărcarea celorlalte
+    for tinta, stari in coada.sumar().items():
+        eroare = f", {stari[ESUAT]} pagini esuate" if stari.get(ESUAT) else ""
+        print(f"{tinta}: {sum(stari.values())} pagini{eroare}")
+    coada.inchide()
+    #  Timpii pe etape, ratele și valorile respinse ale rulării, în metrici/ (Prometheus și JSON)
+    METRICI.afiseaza("tinte")
+    METRICI.scrie("tinte")
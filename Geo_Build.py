@@ -0,0 +1,60 @@
+import os
+
+import geopandas as gpd
+
+FISIER_SURSA = 'map.geojson'
+DIRECTOR_HARTA = "harta"
+NUME_OBIECT = "zone"  # numele colecției în TopoJSON (objects.zone)
+
+#  Toleranțe de simplificare în grade (~1e-4 grade ≈ 8 m la latitudinea Timișoarei)
+NIVELE = {"detaliat": 0.00002, "mediu": 0.0001, "redus": 0.0004}
+NIVEL_IMPLICIT = "mediu"
+QUANTIZARE = 1e5  # grila de cuantizare a coordonatelor (100000 de pași pe latura cadrului hărții)
+ZECIMALE = 6  # ~0.1 m, pentru varianta GeoJSON
+
+
+def cale_topojson(nivel=NIVEL_IMPLICIT, director=DIRECTOR_HARTA):
+    return os.path.join(director, f"map_{nivel}.topojson")
+
+
+def cale_geojson(nivel=NIVEL_IMPLICIT, director=DIRECTOR_HARTA):
+    return os.path.join(director, f"map_{nivel}.geojson")
+
+
+def harta(nivel=NIVEL_IMPLICIT, director=DIRECTOR_HARTA):
+    #  Geometria simplificată dacă a fost construită, altfel fișierul original
+    cale = cale_geojson(nivel, director)
+    return cale if os.path.exists(cale) else FISIER_SURSA
+
+
+def construieste(fname=FISIER_SURSA, director=DIRECTOR_HARTA, nivele=NIVELE):
+    #  Pas offline, rulat doar când se schimbă map.geojson. Granițele comune dintre zone devin arce partajate,
+    #  simplificate o singură dată, deci zonele vecine rămân lipite fără goluri sau suprapuneri.
+    import topojson
+
+    zone = gpd.read_file(fname)
+    os.makedirs(director, exist_ok=True)
+    marimi = {"original": os.path.getsize(fname)}
+    for nivel, toleranta in nivele.items():
+        topologie = topojson.Topology(zone, prequantize=QUANTIZARE, topology=True, toposimplify=toleranta,
+                                      simplify_with="shapely", object_name=NUME_OBIECT)
+        cale = cale_topojson(nivel, director)
+        with open(cale + ".tmp", "w", encoding="utf-8") as f:
+            f.write(topologie.to_json())
+        os.replace(cale + ".tmp", cale)
+        marimi[f"{nivel} (topojson)"] = os.path.getsize(cale)
+
+        #  Aceeași geometrie simplificată ca GeoJSON, pentru stratul interactiv și îmbinarea cu statisticile
+        cale = cale_geojson(nivel, director)
+        if os.path.exists(cale):
+            os.remove(cale)
+        topologie.to_gdf().to_file(cale, driver="GeoJSON", COORDINATE_PRECISION=ZECIMALE)
+        marimi[f"{nivel} (geojson)"] = os.path.getsize(cale)
+
+    for nume, marime in marimi.items():
+        print(f"{nume:<20} {marime:>9} bytes  {marime / marimi['original']:6.1%}")
+    return marimi
+
+
+if __name__ == "__main__":
+    construieste()
@@ -0,0 +1,156 @@
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: memoria maximă nu este disponibilă
+    resource = None
+
+#  Metricile unei rulări, pe etape: descarcare, parsare, transformare, incarcare (cu subetapele ei), export.
+#  Fiecare proces își are registrul METRICI, alimentat de modulele pipeline-ului; la final scriptul îl scrie
+#  în DIRECTOR_METRICI: <proces>.prom (formatul text Prometheus, suprascris la fiecare rulare, pentru
+#  colectorul "textfile" al node_exporter) și <proces>_<data>.json, câte un fișier pe rulare.
+DIRECTOR_METRICI = "metrici"
+PREFIX_PROMETHEUS = "imobiliare"
+FORMAT_DATA = "%Y%m%d-%H%M%S"
+
+
+def memorie_maxima(copii=False):
+    #  Memoria rezidentă maximă a procesului (sau a celui mai mare proces copil terminat), în octeți
+    if resource is None:
+        return None
+    maxim = resource.getrusage(resource.RUSAGE_CHILDREN if copii else resource.RUSAGE_SELF).ru_maxrss
+    return maxim if sys.platform == "darwin" else maxim * 1024  # Linux raportează în KiB
+
+
+class Etapa:
+    #  `with metrici.etapa(nume) as etapa:` adaugă timpul secțiunii la etapă; etapa.durata rămâne disponibilă
+    def __init__(self, metrici, nume):
+        self.metrici = metrici
+        self.nume = nume
+        self.durata = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.durata = time.perf_counter() - self._start
+        self.metrici.durate[self.nume] += self.durata
+
+
+class Metrici:
+    def __init__(self):
+        self.reseteaza()
+
+    def reseteaza(self):
+        self.inceput = datetime.now()
+        self._start = time.perf_counter()
+        self.durate = defaultdict(float)  # etapă -> secunde
+        self.contoare = Counter()  # pagini, anunțuri, rânduri, octeți
+        self.respinse = Counter()  # motiv -> numărul de valori eliminate sau lipsă
+
+    def etapa(self, nume):
+        return Etapa(self, nume)
+
+    def numara(self, nume, valoare=1):
+        self.contoare[nume] += valoare
+
+    def respinge(self, motiv, valoare=1):
+        self.respinse[motiv] += valoare
+
+    def stare(self):
+        #  Pentru procesele de lucru: starea predată procesului principal, care o adaugă la a lui cu combina
+        return {"durate": dict(self.durate), "contoare": dict(self.contoare), "respinse": dict(self.respinse)}
+
+    def combina(self, stare):
+        for nume, durata in stare["durate"].items():
+            self.durate[nume] += durata
+        self.contoare.update(stare["contoare"])
+        self.respinse.update(stare["respinse"])
+
+    def rate(self):
+        def raport(a, b):
+            return a / b if b else None
+
+        durate = self.durate.get  # fără a adăuga etapele neexecutate în durate
+        return {
+            "pagini_pe_s": raport(self.contoare["pagini_descarcate"], durate("descarcare")),
+            "parsare_ms_pe_pagina": raport(durate("parsare", 0) * 1000, self.contoare["pagini_parsate"]),
+            "transformare_randuri_pe_s": raport(self.contoare["randuri_transformate"], durate("transformare")),
+            "incarcare_randuri_pe_s": raport(self.contoare["randuri_incarcate"], durate("incarcare")),
+        }
+
+    def rezumat(self, proces):
+        return {
+            "proces": proces,
+            "inceput": self.inceput.isoformat(timespec="seconds"),
+            "durata_s": time.perf_counter() - self._start,
+            "durate_s": dict(sorted(self.durate.items())),
+            "contoare": dict(sorted(self.contoare.items())),
+            "respinse": dict(sorted(self.respinse.items())),
+            "rate": self.rate(),
+            "memorie_maxima_octeti": memorie_maxima(),
+            "memorie_maxima_copii_octeti": memorie_maxima(copii=True) or None,
+        }
+
+    def prometheus(self, proces):
+        rezumat = self.rezumat(proces)
+        linii = []
+
+        def metrica(nume, descriere, valori, eticheta=None):
+            valori = {k: v for k, v in valori.items() if v is not None}
+            if not valori:
+                return
+            nume = f"{PREFIX_PROMETHEUS}_{nume}"
+            linii.extend([f"# HELP {nume} {descriere}", f"# TYPE {nume} gauge"])
+            for cheie, valoare in valori.items():
+                etichete = f'proces="{proces}"' + (f',{eticheta}="{cheie}"' if eticheta else "")
+                linii.append(f"{nume}{{{etichete}}} {valoare}")
+
+        metrica("etapa_secunde", "Timpul cumulat al fiecărei etape", rezumat["durate_s"], "etapa")
+        metrica("elemente", "Elementele procesate (pagini, anunțuri, rânduri, octeți)", rezumat["contoare"], "tip")
+        metrica("valori_respinse", "Valorile lipsă sau eliminate, după motiv", rezumat["respinse"], "motiv")
+        for nume, valoare in rezumat["rate"].items():
+            metrica(nume, f"Rata {nume} a rulării", {None: valoare})
+        metrica("memorie_maxima_octeti", "Memoria rezidentă maximă a procesului",
+                {None: rezumat["memorie_maxima_octeti"]})
+        metrica("durata_rulare_secunde", "Durata totală a rulării", {None: rezumat["durata_s"]})
+        metrica("ultima_rulare_timestamp_secunde", "Momentul începerii rulării", {None: self.inceput.timestamp()})
+        return "\n".join(linii) + "\n"
+
+    def scrie(self, proces, director=DIRECTOR_METRICI):
+        #  Returnează calea fișierului JSON al rulării; fișierele sunt scrise atomic, ca node_exporter să nu
+        #  citească un fișier .prom pe jumătate scris
+        os.makedirs(director, exist_ok=True)
+        cale_json = os.path.join(director, f"{proces}_{self.inceput.strftime(FORMAT_DATA)}.json")
+        for cale, continut in ((os.path.join(director, f"{proces}.prom"), self.prometheus(proces)),
+                               (cale_json, json.dumps(self.rezumat(proces), indent=2, ensure_ascii=False))):
+            with open(cale + ".tmp", "w", encoding="utf-8") as f:
+                f.write(continut)
+            os.replace(cale + ".tmp", cale)
+        return cale_json
+
+    def afiseaza(self, proces):
+        rate = {nume: f"{valoare:.1f}" for nume, valoare in self.rate().items() if valoare is not None}
+        respinse = ", ".join(f"{motiv}={numar}" for motiv, numar in sorted(self.respinse.items()))
+        print(f"{proces}: {', '.join(f'{nume}={valoare}' for nume, valoare in rate.items())}"
+              + (f"; valori respinse: {respinse}" if respinse else ""))
+
+
+def ultima_rulare(proces, director=DIRECTOR_METRICI):
+    #  Rezumatul JSON al celei mai recente rulări a procesului, sau None
+    fisiere = sorted(glob.glob(os.path.join(director, f"{proces}_[0-9]*.json")))
+    if not fisiere:
+        return None
+    with open(fisiere[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+#  Registrul procesului curent, folosit de Scraper_Fetch, Scraper_Parser, Scraper_Loader și scripturile de rulare
+METRICI = Metrici()
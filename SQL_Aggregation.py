@@ -0,0 +1,111 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlalchemy
+
+from SQL_Schema import CATEGORIE_HARTA, JUDET_HARTA
+from SQL_Stats import statistici_grupate
+
+CAMERE_MAXIM = 4  # apartamentele cu 4 sau mai multe camere formează ultima categorie ("4 Camere")
+DIRECTOR_EXPORT = "export_zone"
+
+#  Tipurile coloanelor din setul de date exportat (o partiție NumarCamere=N pentru fiecare număr de camere)
+SCHEMA_EXPORT = pa.schema([
+    ("ZonăApartament", pa.string()),
+    ("ZonaID", pa.int16()),
+    ("NumarAnunturi", pa.int32()),
+    ("NumarAberante", pa.int32()),
+    ("PretMediu", pa.float64()),
+    ("PretMinim", pa.float64()),
+    ("PretMaxim", pa.float64()),
+    ("PretMedian", pa.float64()),
+    ("PretP25", pa.float64()),
+    ("PretP75", pa.float64()),
+    ("MetriPartrati_InMedie", pa.float64()),
+    ("PretMediu_MetruPatrat", pa.float64()),
+    ("PretMedian_MetruPatrat", pa.float64()),
+])
+
+#  O singură citire pentru toate zonele de pe hartă și toate numerele de camere; filtrul pe ZonaID este servit
+#  de indexul (ZonaID, NumarCamere), fără comparații pe textul locației. Doar apartamentele de vânzare intră
+#  în statistici, celelalte categorii colectate (închirieri, case) nu, și nici anunțurile repostate (Duplicat).
+#  Parametrii (parametri_zona) restrâng citirea la un număr de camere și / sau o zonă.
+SQL_ANUNTURI = sqlalchemy.text(
+    "select z.ZonaID, z.Nume as ZonăApartament, i.NumarCamere, i.PretFinal, i.MetriPatrati, i.PretMetruPatrat "
+    "from Zone z join Imobiliare i on i.ZonaID = z.ZonaID "
+    "where z.PeHarta = 1 and i.NumarCamere >= :camere_minim "
+    "and (:camere_maxim is null or i.NumarCamere <= :camere_maxim) "
+    "and (:zona is null or z.ZonaID = :zona) and i.Categorie = :categorie and i.Judet = :judet "
+    "and i.Duplicat is null"
+)
+
+
+def parametri_zona(camere=None, zona=None, categorie=CATEGORIE_HARTA, judet=JUDET_HARTA):
+    #  Parametrii lui SQL_ANUNTURI; camere = CAMERE_MAXIM cuprinde și apartamentele cu mai multe camere
+    return {"camere_minim": camere or 1, "camere_maxim": camere if camere and camere < CAMERE_MAXIM else None,
+            "zona": zona, "categorie": categorie, "judet": judet}
+
+
+def coloane_export(numar, pret, metri_medii, pret_mp):
+    #  Coloanele exportate, din statisticile SQL_Stats ale prețului și prețului pe metru pătrat: mediile sunt
+    #  trunchiate, iar minimul și maximul ignoră valorile aberante (NumarAberante), de obicei anunțuri declarate
+    #  eronat. Suprafața medie rămâne media simplă.
+    return {
+        "NumarAnunturi": numar,
+        "NumarAberante": pret["aberante"].to_numpy(),
+        "PretMediu": pret["medie_trunchiata"].to_numpy(),
+        "PretMinim": pret["minim"].to_numpy(),
+        "PretMaxim": pret["maxim"].to_numpy(),
+        "PretMedian": pret["p50"].to_numpy(),
+        "PretP25": pret["p25"].to_numpy(),
+        "PretP75": pret["p75"].to_numpy(),
+        "MetriPartrati_InMedie": metri_medii,
+        "PretMediu_MetruPatrat": pret_mp["medie_trunchiata"].to_numpy(),
+        "PretMedian_MetruPatrat": pret_mp["p50"].to_numpy(),
+    }
+
+
+def agrega(df):
+    #  Agregatele pe (zonă, număr de camere): grupurile sunt numerotate o singură dată, iar statisticile tuturor
+    #  grupurilor sunt calculate vectorizat (SQL_Stats), fără funcții Python apelate pe grup
+    df = df.assign(NumarCamere=df["NumarCamere"].clip(upper=CAMERE_MAXIM))
+    grupuri = df.groupby(["NumarCamere", "ZonăApartament"])
+    coduri = grupuri.ngroup().to_numpy()
+    statistici = {coloana: statistici_grupate(coduri, df[coloana].astype("float64").to_numpy(), grupuri.ngroups)
+                  for coloana in ("PretFinal", "MetriPatrati", "PretMetruPatrat")}
+    agregat = pd.DataFrame({"ZonaID": grupuri["ZonaID"].first().to_numpy(),
+                            **coloane_export(grupuri.size().to_numpy(), statistici["PretFinal"],
+                                             statistici["MetriPatrati"]["medie"].to_numpy(),
+                                             statistici["PretMetruPatrat"])},
+                           index=grupuri.size().index)
+    return agregat
+
+
+def citeste_agregat(sqlEngine, camere=None, zona=None, categorie=CATEGORIE_HARTA, judet=JUDET_HARTA):
+    df = pd.read_sql_query(SQL_ANUNTURI, sqlEngine, params=parametri_zona(camere, zona, categorie, judet))
+    return agrega(df)
+
+
+def cale_partitie(camere, director=DIRECTOR_EXPORT):
+    return os.path.join(director, f"NumarCamere={camere}", "part-0.parquet")
+
+
+def exporta_parquet(agregat, director=DIRECTOR_EXPORT):
+    #  Rezultatul unic este împărțit pe numărul de camere, câte o partiție Parquet cu coloane tipizate
+    for camere, parte in agregat.groupby(level="NumarCamere"):
+        tabel = pa.Table.from_pandas(parte.droplevel("NumarCamere").reset_index(), schema=SCHEMA_EXPORT,
+                                     preserve_index=False)
+        cale = cale_partitie(camere, director)
+        os.makedirs(os.path.dirname(cale), exist_ok=True)
+        pq.write_table(tabel, cale + ".tmp")
+        os.replace(cale + ".tmp", cale)
+
+
+def citeste_partitie(camere, director=DIRECTOR_EXPORT):
+    #  Doar partiția cerută este citită, mapată în memorie; None dacă exportul Parquet nu există
+    cale = cale_partitie(camere, director)
+    if not os.path.exists(cale):
+        return None
+    return pq.read_table(cale, memory_map=True).to_pandas()
@@ -0,0 +1,71 @@
+import os
+from functools import lru_cache
+
+import sqlalchemy
+
+#  Accesul comun la baza de date: scripturile de colectare, exportul și analizele folosesc același engine,
+#  creat o singură dată pe proces, cu un pool de conexiuni verificate înainte de folosire (pool_pre_ping), deci
+#  o conexiune închisă de server între două etape nu mai oprește rularea. Baza este aleasă cu variabila de mediu
+#  IMOBILIARE_BACKEND ("mysql" sau "sqlite"), iar parametrii conexiunii MySQL cu variabilele IMOBILIARE_MYSQL_*.
+BACKEND = os.environ.get("IMOBILIARE_BACKEND", "mysql")
+VARIABILE_OBLIGATORII = ("IMOBILIARE_MYSQL_USER", "IMOBILIARE_MYSQL_PASSWORD")  # credențialele nu au valori implicite
+CALE_SQLITE = os.environ.get("IMOBILIARE_SQLITE", "imobiliare.sqlite")
+DIMENSIUNE_POOL = 5
+RECICLARE_POOL = 3600  # secunde; sub wait_timeout-ul implicit MySQL (8 ore)
+
+
+def parametri_mysql():
+    #  Citiți la fiecare conexiune MySQL, deci rulările pe SQLite nu au nevoie de credențiale
+    lipsa = [nume for nume in VARIABILE_OBLIGATORII if not os.environ.get(nume)]
+    if lipsa:
+        raise RuntimeError(f"Conexiunea MySQL are nevoie de variabilele de mediu {', '.join(lipsa)} "
+                           "(sau IMOBILIARE_BACKEND=sqlite pentru baza locală)")
+    return {
+        "host": os.environ.get("IMOBILIARE_MYSQL_HOST", "localhost"),
+        "port": int(os.environ.get("IMOBILIARE_MYSQL_PORT", 3306)),
+        "user": os.environ["IMOBILIARE_MYSQL_USER"],
+        "password": os.environ["IMOBILIARE_MYSQL_PASSWORD"],
+        "database": os.environ.get("IMOBILIARE_MYSQL_DATABASE", "PROIECT_DIPLOMA"),
+    }
+
+
+def url_baza(backend=None, cale=None, cu_baza=True):
+    backend = backend or BACKEND
+    if backend == "sqlite":
+        return sqlalchemy.engine.URL.create("sqlite", database=str(cale or CALE_SQLITE))
+    mysql = parametri_mysql()
+    return sqlalchemy.engine.URL.create("mysql+pymysql", username=mysql["user"], password=mysql["password"],
+                                        host=mysql["host"], port=mysql["port"],
+                                        database=mysql["database"] if cu_baza else None,
+                                        query={"charset": "utf8mb4"})
+
+
+@lru_cache(maxsize=None)
+def _engine(url, local_infile, pid):
+    #  `pid` face parte din cheie: un proces copil (multiprocessing) nu refolosește conexiunile părintelui
+    if url.get_backend_name() == "sqlite":
+        #  Conexiunile la fișier sunt păstrate în pool (implicit SQLAlchemy 1.4 deschide una la fiecare citire) și
+        #  pot fi folosite din mai multe fire (Streamlit)
+        return sqlalchemy.create_engine(url, pool_pre_ping=True, poolclass=sqlalchemy.pool.QueuePool,
+                                        connect_args={"check_same_thread": False})
+    return sqlalchemy.create_engine(url, pool_pre_ping=True, pool_size=DIMENSIUNE_POOL, pool_recycle=RECICLARE_POOL,
+                                    connect_args={"local_infile": local_infile})
+
+
+def engine(backend=None, cale=None, local_infile=False):
+    #  Engine-ul comun al procesului pentru baza aleasă (cale: alt fișier SQLite decât CALE_SQLITE)
+    return _engine(url_baza(backend, cale), local_infile, os.getpid())
+
+
+def conexiune_dbapi(backend=None, cale=None, local_infile=False):
+    #  O conexiune a driverului (pymysql / sqlite3) luată din pool, pentru codul care lucrează direct cu cursoare
+    #  (Scraper_Loader); close() o returnează în pool
+    return engine(backend, cale, local_infile).raw_connection()
+
+
+def creeaza_baza():
+    #  Baza de date MySQL, dacă nu există încă; conexiunea fără bază este folosită doar aici
+    server = sqlalchemy.create_engine(url_baza("mysql", cu_baza=False), poolclass=sqlalchemy.pool.NullPool)
+    with server.begin() as conexiune:
+        conexiune.execute(sqlalchemy.text(f"CREATE DATABASE IF NOT EXISTS {parametri_mysql()['database']};"))
+    server.dispose()
@@ -0,0 +1,186 @@
+import json
+
+#  Zonele de pe hartă păstrează id-ul din map.geojson (ZonaID), astfel încât statisticile se pot lega direct de
+#  poligoane. Celelalte locații primesc id-uri de la 1000 în sus și au PeHarta = 0.
+ZONA_ID_START = 1000
+#  Ținta crawl-ului inițial; anunțurile salvate înainte de coloanele Categorie / Judet o primesc implicit, iar
+#  statisticile pe zonele hărții sunt calculate doar pentru ea
+CATEGORIE_HARTA = "vanzare-apartamente"
+JUDET_HARTA = "timis"
+
+
+def zone_harta(fname="map.geojson"):
+    with open(fname, encoding="utf-8") as f:
+        harta = json.load(f)
+    return [(feature["properties"]["id"], feature["properties"]["text"]) for feature in harta["features"]]
+
+
+def _coloana_exista(cursor, tabel, coloana):
+    cursor.execute(f"SHOW COLUMNS FROM {tabel} LIKE %s;", (coloana,))
+    return cursor.fetchone() is not None
+
+
+def creeaza_mysql(cursor):
+    #  Tabelul vechi (fără IdAnunt) era oricum reconstruit la fiecare rulare, deci poate fi înlocuit
+    cursor.execute("SHOW TABLES LIKE 'Imobiliare';")
+    if cursor.fetchone() and not _coloana_exista(cursor, "Imobiliare", "IdAnunt"):
+        cursor.execute("DROP TABLE Imobiliare;")
+
+    cursor.execute("CREATE TABLE IF NOT EXISTS Zone (ZonaID smallint unsigned NOT NULL AUTO_INCREMENT,"
+                   " Nume varchar(255) NOT NULL,"
+                   " PeHarta tinyint(1) NOT NULL DEFAULT 0,"
+                   " PRIMARY KEY(ZonaID),"
+                   " UNIQUE KEY (Nume))"
+                   f" AUTO_INCREMENT={ZONA_ID_START};")
+    cursor.executemany("INSERT INTO Zone (ZonaID, Nume, PeHarta) VALUES (%s, %s, 1) "
+                       "ON DUPLICATE KEY UPDATE PeHarta = 1;", zone_harta())
+
+    cursor.execute("CREATE TABLE IF NOT EXISTS Imobiliare (ID int NOT NULL AUTO_INCREMENT,"
+                   " IdAnunt varchar(64) NOT NULL,"
+                   f" Categorie varchar(64) NOT NULL DEFAULT '{CATEGORIE_HARTA}',"
+                   f" Judet varchar(64) NOT NULL DEFAULT '{JUDET_HARTA}',"
+                   " Titlu varchar(255),"
+                   " LocatieApartament varchar(255),"
+                   " ZonaID smallint unsigned,"
+                   " Pret int unsigned,"
+                   " Valuta varchar(255),"
+                   " NumarCamere int,"
+                   " MetriPatrati decimal(6,2),"
+                   " PretFinal int unsigned,"
+                   " PretMetruPatrat smallint unsigned,"
+                   " Amprenta char(32),"
+                   " Duplicat varchar(64),"
+                   " PrimaData date,"
+                   " UltimaData date,"
+                   " PRIMARY KEY(ID),"
+                   " UNIQUE KEY (IdAnunt),"
+                   " KEY ix_zona_camere (ZonaID, NumarCamere),"
+                   " FOREIGN KEY (ZonaID) REFERENCES Zone(ZonaID));")
+    migreaza_mysql(cursor)
+    if not _coloana_exista(cursor, "Imobiliare", "Categorie"):
+        cursor.execute("ALTER TABLE Imobiliare"
+                       f" ADD COLUMN Categorie varchar(64) NOT NULL DEFAULT '{CATEGORIE_HARTA}' AFTER IdAnunt,"
+                       f" ADD COLUMN Judet varchar(64) NOT NULL DEFAULT '{JUDET_HARTA}' AFTER Categorie;")
+    #  Duplicat: IdAnunt-ul anunțului original, pentru anunțurile repostate (vezi Scraper_Dedup)
+    if not _coloana_exista(cursor, "Imobiliare", "Duplicat"):
+        cursor.execute("ALTER TABLE Imobiliare ADD COLUMN Duplicat varchar(64) AFTER Amprenta;")
+    creeaza_istoric_mysql(cursor)
+
+
+def creeaza_istoric_mysql(cursor):
+    #  Istoricul păstrează doar diferențele dintre rulări: un rând la apariția unui anunț sau la schimbarea
+    #  conținutului lui și unul (Sters = 1) la expirare. Cheia primară grupează rândurile după data rulării.
+    cursor.execute("CREATE TABLE IF NOT EXISTS IstoricAnunturi (DataRulare date NOT NULL,"
+                   " IdAnunt varchar(64) NOT NULL,"
+                   " ZonaID smallint unsigned,"
+                   " NumarCamere int,"
+                   " PretFinal int unsigned,"
+                   " MetriPatrati decimal(6,2),"
+                   " PretMetruPatrat smallint unsigned,"
+                   " Sters tinyint(1) NOT NULL DEFAULT 0,"
+                   " PRIMARY KEY(DataRulare, IdAnunt),"
+                   " KEY (IdAnunt));")
+    #  Agregatele pe săptămână (ultima rulare din săptămână), din care sunt citite tendințele
+    cursor.execute("CREATE TABLE IF NOT EXISTS TendinteZona (Saptamana date NOT NULL,"
+                   " ZonaID smallint unsigned NOT NULL,"
+                   " NumarCamere tinyint unsigned NOT NULL,"
+                   " NumarAnunturi int unsigned NOT NULL,"
+                   " PretMediu double,"
+                   " PretMedian double,"
+                   " PretMediu_MetruPatrat double,"
+                   " PretMedian_MetruPatrat double,"
+                   " PRIMARY KEY(NumarCamere, ZonaID, Saptamana));")
+
+
+def migreaza_mysql(cursor):
+    #  Migrarea unui tabel Imobiliare creat înainte de dimensiunea Zone; fără efect dacă a fost deja aplicată
+    if _coloana_exista(cursor, "Imobiliare", "ZonaID"):
+        return
+    cursor.execute("ALTER TABLE Imobiliare"
+                   " ADD COLUMN ZonaID smallint unsigned AFTER LocatieApartament,"
+                   " MODIFY Pret int unsigned,"
+                   " MODIFY MetriPatrati decimal(6,2),"
+                   " MODIFY PretFinal int unsigned,"
+                   " MODIFY PretMetruPatrat smallint unsigned;")
+    cursor.execute("INSERT IGNORE INTO Zone (Nume) SELECT DISTINCT LocatieApartament FROM Imobiliare "
+                   "WHERE LocatieApartament IS NOT NULL;")
+    cursor.execute("UPDATE Imobiliare i JOIN Zone z ON z.Nume = i.LocatieApartament SET i.ZonaID = z.ZonaID;")
+    cursor.execute("ALTER TABLE Imobiliare"
+                   " ADD KEY ix_zona_camere (ZonaID, NumarCamere),"
+                   " ADD FOREIGN KEY (ZonaID) REFERENCES Zone(ZonaID);")
+
+
+def adauga_zone_sqlite(sqlconnection, nume):
+    #  SQLite nu are AUTO_INCREMENT cu valoare de start, deci id-ul este calculat explicit
+    sqlconnection.executemany("INSERT OR IGNORE INTO Zone (ZonaID, Nume) "
+                              f"VALUES ((SELECT max(MAX(ZonaID) + 1, {ZONA_ID_START}) FROM Zone), ?);",
+                              [(n,) for n in nume])
+
+
+def creeaza_sqlite(sqlconnection):
+    sqlconnection.execute("CREATE TABLE IF NOT EXISTS Zone (ZonaID INTEGER PRIMARY KEY,"
+                          " Nume TEXT NOT NULL UNIQUE,"
+                          " PeHarta INTEGER NOT NULL DEFAULT 0);")
+    sqlconnection.executemany("INSERT INTO Zone (ZonaID, Nume, PeHarta) VALUES (?, ?, 1) "
+                              "ON CONFLICT(ZonaID) DO UPDATE SET PeHarta = 1;", zone_harta())
+    sqlconnection.execute("CREATE TABLE IF NOT EXISTS Imobiliare (ID INTEGER PRIMARY KEY AUTOINCREMENT,"
+                          " IdAnunt TEXT NOT NULL UNIQUE,"
+                          f" Categorie TEXT NOT NULL DEFAULT '{CATEGORIE_HARTA}',"
+                          f" Judet TEXT NOT NULL DEFAULT '{JUDET_HARTA}',"
+                          " Titlu TEXT,"
+                          " LocatieApartament TEXT,"
+                          " ZonaID INTEGER REFERENCES Zone(ZonaID),"
+                          " Pret INTEGER,"
+                          " Valuta TEXT,"
+                          " NumarCamere INTEGER,"
+                          " MetriPatrati REAL,"
+                          " PretFinal INTEGER,"
+                          " PretMetruPatrat INTEGER,"
+                          " Amprenta TEXT,"
+                          " Duplicat TEXT,"
+                          " PrimaData TEXT,"
+                          " UltimaData TEXT);")
+    coloane = [rand[1] for rand in sqlconnection.execute("PRAGMA table_info(Imobiliare);")]
+    if "ZonaID" not in coloane:
+        sqlconnection.execute("ALTER TABLE Imobiliare ADD COLUMN ZonaID INTEGER REFERENCES Zone(ZonaID);")
+        adauga_zone_sqlite(sqlconnection, [rand[0] for rand in sqlconnection.execute(
+            "SELECT DISTINCT LocatieApartament FROM Imobiliare WHERE LocatieApartament IS NOT NULL;")])
+        sqlconnection.execute("UPDATE Imobiliare SET ZonaID = "
+                              "(SELECT ZonaID FROM Zone WHERE Zone.Nume = Imobiliare.LocatieApartament);")
+    if "Categorie" not in coloane:
+        sqlconnection.execute(f"ALTER TABLE Imobiliare ADD COLUMN Categorie TEXT NOT NULL DEFAULT '{CATEGORIE_HARTA}';")
+        sqlconnection.execute(f"ALTER TABLE Imobiliare ADD COLUMN Judet TEXT NOT NULL DEFAULT '{JUDET_HARTA}';")
+    if "Duplicat" not in coloane:
+        sqlconnection.execute("ALTER TABLE Imobiliare ADD COLUMN Duplicat TEXT;")
+    sqlconnection.execute("CREATE INDEX IF NOT EXISTS ix_zona_camere ON Imobiliare (ZonaID, NumarCamere);")
+    sqlconnection.execute("CREATE TABLE IF NOT EXISTS IstoricAnunturi (DataRulare TEXT NOT NULL,"
+                          " IdAnunt TEXT NOT NULL,"
+                          " ZonaID INTEGER,"
+                          " NumarCamere INTEGER,"
+                          " PretFinal INTEGER,"
+                          " MetriPatrati REAL,"
+                          " PretMetruPatrat INTEGER,"
+                          " Sters INTEGER NOT NULL DEFAULT 0,"
+                          " PRIMARY KEY(DataRulare, IdAnunt)) WITHOUT ROWID;")
+    sqlconnection.execute("CREATE INDEX IF NOT EXISTS ix_istoric_anunt ON IstoricAnunturi (IdAnunt);")
+    sqlconnection.execute("CREATE TABLE IF NOT EXISTS TendinteZona (Saptamana TEXT NOT NULL,"
+                          " ZonaID INTEGER NOT NULL,"
+                          " NumarCamere INTEGER NOT NULL,"
+                          " NumarAnunturi INTEGER NOT NULL,"
+                          " PretMediu REAL,"
+                          " PretMedian REAL,"
+                          " PretMediu_MetruPatrat REAL,"
+                          " PretMedian_MetruPatrat REAL,"
+                          " PRIMARY KEY(NumarCamere, ZonaID, Saptamana)) WITHOUT ROWID;")
+    sqlconnection.commit()
+
+
+if __name__ == "__main__":
+    #  python SQL_Schema.py -> aplică migrarea pe baza de date MySQL existentă
+    from SQL_Conexiune import conexiune_dbapi
+
+    sqlconnection = conexiune_dbapi("mysql")
+    with sqlconnection.cursor() as cursor:
+        creeaza_mysql(cursor)
+    sqlconnection.commit()
+    sqlconnection.close()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+CUANTILE = {"p25": 0.25, "p50": 0.5, "p75": 0.75}
+TAIERE = 0.1  # fracția din fiecare capăt eliminată din media trunchiată
+FACTOR_IQR = 1.5  # valorile în afara [P25 - 1.5·IQR, P75 + 1.5·IQR] sunt considerate aberante (declarate eronat)
+
+
+def _rang(cumulat, rang):
+    #  Poziția în tabloul sortat a elementului cu rangul dat (numerotare de la 0) din șirul "expandat", în care
+    #  fiecare valoare apare de atâtea ori cât ponderea ei
+    return np.minimum(np.searchsorted(cumulat, rang, side="right"), len(cumulat) - 1)
+
+
+def _suma_primelor(cumulat, cumulat_valori, valori, rang):
+    #  Suma primelor `rang` elemente ale șirului expandat
+    i = np.minimum(np.searchsorted(cumulat, rang, side="left"), len(cumulat) - 1)
+    return cumulat_valori[i] - (cumulat[i] - rang) * valori[i]
+
+
+def aberante(coduri, valori, statistici, factor=FACTOR_IQR):
+    #  Marcajul IQR pentru fiecare valoare, față de cuantilele grupului ei (statistici: rezultatul
+    #  statistici_grupate); valorile lipsă nu sunt aberante
+    p25 = statistici["p25"].to_numpy()[coduri]
+    p75 = statistici["p75"].to_numpy()[coduri]
+    iqr = p75 - p25
+    with np.errstate(invalid="ignore"):
+        return (valori < p25 - factor * iqr) | (valori > p75 + factor * iqr)
+
+
+def statistici_grupate(coduri, valori, numar_grupuri, ponderi=None, taiere=TAIERE, factor=FACTOR_IQR):
+    #  Statisticile fiecărui grup (coduri 0..numar_grupuri-1), într-o singură sortare a tuturor valorilor, fără
+    #  bucle Python pe grup: numărul de valori, media, media trunchiată, cuantilele din CUANTILE (interpolare
+    #  liniară, ca pandas.Series.quantile), numărul de valori aberante și minimul / maximul celor rămase.
+    #  Ponderile (întregi) permit aceleași calcule pe histograme: valoarea intervalului, cu numărul de apariții.
+    coduri = np.asarray(coduri, dtype=np.int64)
+    valori = np.asarray(valori, dtype=np.float64)
+    ponderi = np.ones(len(valori)) if ponderi is None else np.asarray(ponderi, dtype=np.float64)
+    valide = ~np.isnan(valori) & (coduri >= 0) & (ponderi > 0)
+    coduri, valori, ponderi = coduri[valide], valori[valide], ponderi[valide]
+
+    ordine = np.lexsort((valori, coduri))
+    coduri, valori, ponderi = coduri[ordine], valori[ordine], ponderi[ordine]
+    numar = np.bincount(coduri, weights=ponderi, minlength=numar_grupuri)
+    inceput = np.cumsum(numar) - numar  # rangul primului element al fiecărui grup în șirul expandat
+    cumulat = np.cumsum(ponderi)
+    cumulat_valori = np.cumsum(ponderi * valori)
+
+    rezultat = pd.DataFrame({"numar": numar.astype(np.int64)})
+    gol = numar == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rezultat["medie"] = np.bincount(coduri, weights=ponderi * valori, minlength=numar_grupuri) / numar
+        if len(valori):
+            for nume, q in CUANTILE.items():
+                pozitie = q * np.maximum(numar - 1, 0)
+                jos = np.floor(pozitie)
+                valoare_jos = valori[_rang(cumulat, inceput + jos)]
+                valoare_sus = valori[_rang(cumulat, inceput + np.minimum(jos + 1, np.maximum(numar - 1, 0)))]
+                rezultat[nume] = np.where(gol, np.nan, valoare_jos + (valoare_sus - valoare_jos) * (pozitie - jos))
+            taiate = np.floor(taiere * numar)
+            suma = (_suma_primelor(cumulat, cumulat_valori, valori, inceput + numar - taiate)
+                    - _suma_primelor(cumulat, cumulat_valori, valori, inceput + taiate))
+            rezultat["medie_trunchiata"] = np.where(gol, np.nan, suma / (numar - 2 * taiate))
+        else:
+            for nume in CUANTILE:
+                rezultat[nume] = np.nan
+            rezultat["medie_trunchiata"] = np.nan
+
+    marcate = aberante(coduri, valori, rezultat, factor)
+    rezultat["aberante"] = np.bincount(coduri, weights=ponderi * marcate, minlength=numar_grupuri).astype(np.int64)
+    #  Valorile rămase ale unui grup sunt consecutive în tabloul sortat: prima este minimul, ultima maximul
+    rezultat["minim"] = np.nan
+    rezultat["maxim"] = np.nan
+    coduri_ramase, valori_ramase = coduri[~marcate], valori[~marcate]
+    if len(coduri_ramase):
+        grupuri, primele = np.unique(coduri_ramase, return_index=True)
+        ultimele = np.append(primele[1:], len(coduri_ramase)) - 1
+        rezultat.loc[grupuri, "minim"] = valori_ramase[primele]
+        rezultat.loc[grupuri, "maxim"] = valori_ramase[ultimele]
+    return rezultat
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import sqlalchemy
+
+from SQL_Aggregation import CAMERE_MAXIM, coloane_export
+from SQL_Schema import CATEGORIE_HARTA, JUDET_HARTA
+from SQL_Stats import statistici_grupate
+
+FISIER_AGREGATE = "agregate_zona_{}.json"  # câte un fișier pentru fiecare bază de date (fisier_agregate)
+#  Prețul și prețul pe metru pătrat sunt întregi (coloanele int din baza de date), deci cu lățimea 1 fiecare
+#  interval al histogramei este o singură valoare: statisticile, inclusiv limitele IQR ale valorilor aberante,
+#  sunt aceleași ca la o scanare completă a tabelului (SQL_Aggregation). Histogramele sunt deci nemărginite: fiecare
+#  grup păstrează câte un contor pentru fiecare preț distinct (cel mult numărul anunțurilor lui), iar fișierul de
+#  agregate crește la fel. O lățime mai mare le mărginește, cu prețul unor statistici aproximative.
+LATIME_PRET = 1
+SQL_RECONSTRUCTIE = sqlalchemy.text("select ZonaID, NumarCamere, PretFinal, MetriPatrati, PretMetruPatrat "
+                                    "from Imobiliare where Categorie = :categorie and Judet = :judet "
+                                    "and Duplicat is null")
+SQL_ZONE_HARTA = sqlalchemy.text("select ZonaID, Nume from Zone where PeHarta = 1")
+
+
+class Histograma:
+    #  Schiță de cuantile care se poate combina și din care se pot scoate valori: numărul de apariții pe
+    #  intervale de lățime fixă. Statisticile calculate din ea (SQL_Stats, cu numărul de apariții ca pondere)
+    #  au eroarea cel mult egală cu lățimea intervalului; pentru valori întregi și lățimea 1 sunt exacte.
+    def __init__(self, latime=1, contoare=None):
+        self.latime = latime
+        self.contoare = Counter(contoare or {})
+
+    def adauga(self, valoare, semn=1):
+        interval = int(valoare // self.latime)
+        self.contoare[interval] += semn
+        if self.contoare[interval] <= 0:
+            del self.contoare[interval]
+
+    def combina(self, alta):
+        self.contoare.update(alta.contoare)
+
+    def tablouri(self):
+        #  (valorile intervalelor, numărul de apariții), pentru SQL_Stats.statistici_grupate
+        valori = np.fromiter(self.contoare.keys(), dtype=np.float64, count=len(self.contoare)) * self.latime
+        return valori, np.fromiter(self.contoare.values(), dtype=np.float64, count=len(self.contoare))
+
+
+class Grup:
+    #  Sume și numărători pentru un (zonă, număr de camere); toate se pot actualiza în ambele sensuri
+    def __init__(self):
+        self.numar = 0
+        self.suma_pret = 0.0
+        self.numar_pret = 0
+        self.suma_metri = 0.0
+        self.numar_metri = 0
+        self.suma_pret_mp = 0.0
+        self.numar_pret_mp = 0
+        self.pret = Histograma(LATIME_PRET)
+        self.pret_mp = Histograma(1)
+
+    def aplica(self, pret, metri, pret_mp, semn):
+        self.numar += semn
+        if pret is not None:
+            self.suma_pret += semn * pret
+            self.numar_pret += semn
+            self.pret.adauga(pret, semn)
+        if metri is not None:
+            self.suma_metri += semn * metri
+            self.numar_metri += semn
+        if pret_mp is not None:
+            self.suma_pret_mp += semn * pret_mp
+            self.numar_pret_mp += semn
+            self.pret_mp.adauga(pret_mp, semn)
+
+
+def _medie(suma, numar):
+    return suma / numar if numar else None
+
+
+class AgregateZona:
+    #  Agregatele pe (ZonaID, NumarCamere) întreținute de loader la fiecare inserare, actualizare sau ștergere,
+    #  astfel încât exportul nu mai recitește tabelul Imobiliare
+    def __init__(self):
+        self.grupuri = {}
+
+    def _aplica(self, zona_id, camere, pret, metri, pret_mp, semn):
+        if zona_id is None or camere is None or camere < 1:
+            return
+        cheie = (int(zona_id), min(int(camere), CAMERE_MAXIM))
+        grup = self.grupuri.setdefault(cheie, Grup())
+        #  PretFinal și MetriPatrati sunt rotunjite ca în coloanele int și decimal(6,2) din baza de date, ca adăugarea
+        #  și scăderea să fie simetrice
+        grup.aplica(None if pret is None else int(float(pret) + 0.5),
+                    None if metri is None else round(float(metri), 2),
+                    None if pret_mp is None else float(pret_mp), semn)
+        if grup.numar <= 0:
+            del self.grupuri[cheie]
+
+    def adauga(self, zona_id, camere, pret, metri, pret_mp):
+        self._aplica(zona_id, camere, pret, metri, pret_mp, 1)
+
+    def scade(self, zona_id, camere, pret, metri, pret_mp):
+        self._aplica(zona_id, camere, pret, metri, pret_mp, -1)
+
+    def _statistici(self, histograma, chei):
+        #  Statisticile histogramelor tuturor grupurilor, într-un singur apel vectorizat
+        tablouri = [getattr(self.grupuri[cheie], histograma).tablouri() for cheie in chei]
+        coduri = np.repeat(np.arange(len(chei)), [len(valori) for valori, _ in tablouri])
+        valori = np.concatenate([valori for valori, _ in tablouri] or [np.empty(0)])
+        ponderi = np.concatenate([ponderi for _, ponderi in tablouri] or [np.empty(0)])
+        return statistici_grupate(coduri, valori, len(chei), ponderi=ponderi)
+
+    def statistici(self):
+        #  Coloanele din SQL_Aggregation.coloane_export pentru fiecare grup, indexate după (ZonaID, NumarCamere)
+        chei = sorted(self.grupuri)
+        grupuri = [self.grupuri[cheie] for cheie in chei]
+        coloane = coloane_export(np.array([grup.numar for grup in grupuri], dtype=np.int64),
+                                 self._statistici("pret", chei),
+                                 np.array([_medie(grup.suma_metri, grup.numar_metri) for grup in grupuri],
+                                          dtype=np.float64),
+                                 self._statistici("pret_mp", chei))
+        return pd.DataFrame(coloane, index=pd.MultiIndex.from_tuples(chei, names=["ZonaID", "NumarCamere"]))
+
+    def cadru(self, nume_zone):
+        #  Același format ca SQL_Aggregation.agrega, doar pentru zonele din nume_zone ({ZonaID: nume})
+        df = self.statistici().reset_index()
+        df = df[df["ZonaID"].isin(list(nume_zone))]
+        df.insert(1, "ZonăApartament", df["ZonaID"].map(nume_zone))
+        return df.set_index(["NumarCamere", "ZonăApartament"]).sort_index()
+
+    def salveaza(self, cale):
+        grupuri = [{"zona": zona_id, "camere": camere, **{k: v for k, v in vars(grup).items()
+                                                            if not isinstance(v, Histograma)},
+                    "pret": grup.pret.contoare, "pret_mp": grup.pret_mp.contoare}
+                   for (zona_id, camere), grup in self.grupuri.items()]
+        temporar = cale + ".tmp"
+        with open(temporar, "w", encoding="utf-8") as f:
+            json.dump({"latime_pret": LATIME_PRET, "grupuri": grupuri}, f)
+        os.replace(temporar, cale)
+
+    @classmethod
+    def citeste(cls, cale):
+        #  None dacă fișierul lipsește sau a fost scris cu alte intervale de preț: agregatele sunt reconstruite
+        if not os.path.exists(cale):
+            return None
+        with open(cale, encoding="utf-8") as f:
+            continut = json.load(f)
+        if not isinstance(continut, dict) or continut.get("latime_pret") != LATIME_PRET:
+            return None
+        agregate = cls()
+        for stare in continut["grupuri"]:
+            grup = Grup()
+            for camp in ("numar", "suma_pret", "numar_pret", "suma_metri", "numar_metri",
+                         "suma_pret_mp", "numar_pret_mp"):
+                setattr(grup, camp, stare[camp])
+            grup.pret = Histograma(LATIME_PRET, {int(k): v for k, v in stare["pret"].items()})
+            grup.pret_mp = Histograma(1, {int(k): v for k, v in stare["pret_mp"].items()})
+            agregate.grupuri[(stare["zona"], stare["camere"])] = grup
+        return agregate
+
+    @classmethod
+    def reconstruieste(cls, sqlEngine):
+        #  Reconstrucția completă din tabel (o singură scanare), când fișierul lipsește sau nu mai este sincron
+        agregate = cls()
+        df = pd.read_sql_query(SQL_RECONSTRUCTIE, sqlEngine,
+                               params={"categorie": CATEGORIE_HARTA, "judet": JUDET_HARTA})
+        df = df.astype(object).where(df.notna(), None)
+        for rand in df.itertuples(index=False, name=None):
+            agregate.adauga(*rand)
+        return agregate
+
+
+def fisier_agregate(sqlEngine):
+    #  Agregatele descriu tabelul unei singure baze: fișierul este ales după backend și baza de date (serverul și
+    #  numele bazei MySQL, calea fișierului SQLite), deci rulările pe baze diferite nu își amestecă agregatele
+    url = sqlEngine.url
+    if url.get_backend_name() == "sqlite":
+        baza = os.path.abspath(url.database)
+    else:
+        baza = f"{url.host}:{url.port}/{url.database}"
+    return FISIER_AGREGATE.format(f"{url.get_backend_name()}_{hashlib.sha1(baza.encode()).hexdigest()[:12]}")
+
+
+def nume_zone_harta(sqlEngine):
+    df = pd.read_sql_query(SQL_ZONE_HARTA, sqlEngine)
+    return dict(zip(df["ZonaID"], df["Nume"]))
@@ -0,0 +1,54 @@
+import os
+from datetime import timedelta
+
+import pandas as pd
+import pyarrow.parquet as pq
+import sqlalchemy
+
+from SQL_Aggregation import DIRECTOR_EXPORT
+
+FISIER_TENDINTE = os.path.join(DIRECTOR_EXPORT, "tendinte.parquet")
+COLOANE_TENDINTE = ("Saptamana", "ZonaID", "NumarCamere", "NumarAnunturi", "PretMediu", "PretMedian",
+                    "PretMediu_MetruPatrat", "PretMedian_MetruPatrat")
+
+#  Seriile de timp pentru zonele de pe hartă citesc doar tabelul săptămânal, nu și istoricul anunțurilor
+SQL_TENDINTE = sqlalchemy.text(
+    "select t.Saptamana, t.ZonaID, z.Nume as ZonăApartament, t.NumarCamere, t.NumarAnunturi, t.PretMediu, "
+    "t.PretMedian, t.PretMediu_MetruPatrat, t.PretMedian_MetruPatrat "
+    "from TendinteZona t join Zone z on z.ZonaID = t.ZonaID "
+    "where z.PeHarta = 1 order by t.NumarCamere, t.ZonaID, t.Saptamana"
+)
+
+
+def saptamana(data):
+    #  Lunea săptămânii din care face parte data rulării
+    return data - timedelta(days=data.weekday())
+
+
+def randuri_tendinte(agregate, data_rulare):
+    #  Starea agregatelor (SQL_Summary.AgregateZona) la sfârșitul rulării, ca rânduri pentru TendinteZona, cu
+    #  aceleași medii trunchiate și mediane ca exportul hărții; o rulare ulterioară din aceeași săptămână
+    #  le înlocuiește
+    inceput = saptamana(data_rulare).isoformat()
+    df = agregate.statistici()[list(COLOANE_TENDINTE[3:])].reset_index()
+    df = df.astype(object).where(df.notna(), None)
+    return [(inceput, *rand) for rand in df.itertuples(index=False, name=None)]
+
+
+def citeste_tendinte(sqlEngine):
+    df = pd.read_sql_query(SQL_TENDINTE, sqlEngine)
+    df["Saptamana"] = pd.to_datetime(df["Saptamana"])
+    return df
+
+
+def exporta_tendinte(df, cale=FISIER_TENDINTE):
+    os.makedirs(os.path.dirname(cale), exist_ok=True)
+    df.to_parquet(cale + ".tmp", index=False)
+    os.replace(cale + ".tmp", cale)
+
+
+def tendinte_camere(camere, cale=FISIER_TENDINTE):
+    #  Seriile pentru un număr de camere, citite din exportul Parquet; None dacă exportul nu există
+    if not os.path.exists(cale):
+        return None
+    return pq.read_table(cale, filters=[("NumarCamere", "=", camere)], memory_map=True).to_pandas()
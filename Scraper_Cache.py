@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import date
+
+DIRECTOR_CACHE = "cache_http"
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _scrie_atomic(cale, continut):
+    #  Scrierea într-un fișier temporar urmată de os.replace: un crawl întrerupt nu lasă fișiere pe jumătate
+    temporar = cale + ".tmp"
+    with open(temporar, "wb") as f:
+        f.write(continut)
+    os.replace(temporar, cale)
+
+
+class CacheHttp:
+    #  Cache pe disc, adresat după conținut: pagina descărcată la data D de la adresa U este păstrată
+    #  comprimat în <director>/<hash[:2]>/<hash(U + D)>.html.gz. Pentru fiecare adresă, index/<hash(U)>.json
+    #  reține ultima intrare și validatorii ei (ETag / Last-Modified) pentru cererile condiționate.
+    def __init__(self, director=DIRECTOR_CACHE):
+        self.director = director
+        os.makedirs(os.path.join(director, "index"), exist_ok=True)
+
+    def cheie(self, url, data=None):
+        return _hash(f"{url}|{(data or date.today()).isoformat()}")
+
+    def _cale_pagina(self, cheie):
+        return os.path.join(self.director, cheie[:2], cheie + ".html.gz")
+
+    def _cale_index(self, url):
+        return os.path.join(self.director, "index", _hash(url) + ".json")
+
+    def _index(self, url):
+        try:
+            with open(self._cale_index(url), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def citeste(self, url, data=None):
+        #  Conținutul paginii de la data dată (implicit azi) sau None dacă nu a fost salvată
+        try:
+            with gzip.open(self._cale_pagina(self.cheie(url, data)), "rt", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def salveaza(self, url, html, headers=None, data=None):
+        data = data or date.today()
+        cheie = self.cheie(url, data)
+        cale = self._cale_pagina(cheie)
+        os.makedirs(os.path.dirname(cale), exist_ok=True)
+        _scrie_atomic(cale, gzip.compress(html.encode("utf-8")))
+        headers = headers or {}
+        index = {"url": url, "data": data.isoformat(), "cheie": cheie,
+                 "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+        _scrie_atomic(self._cale_index(url), json.dumps(index).encode("utf-8"))
+
+    def validatori(self, url):
+        #  Antetele pentru un GET condiționat, pe baza ultimei versiuni salvate a adresei
+        index = self._index(url)
+        headers = {}
+        if index is None or not os.path.exists(self._cale_pagina(index["cheie"])):
+            return headers
+        if index.get("etag"):
+            headers["If-None-Match"] = index["etag"]
+        if index.get("last_modified"):
+            headers["If-Modified-Since"] = index["last_modified"]
+        return headers
+
+    def reutilizeaza(self, url, data=None):
+        #  Răspuns 304: ultima versiune salvată este înregistrată și sub data curentă, cu aceiași validatori
+        index = self._index(url)
+        with gzip.open(self._cale_pagina(index["cheie"]), "rt", encoding="utf-8") as f:
+            html = f.read()
+        self.salveaza(url, html, {"ETag": index.get("etag"), "Last-Modified": index.get("last_modified")}, data)
+        return html
+
+    def ultima_data(self, url):
+        index = self._index(url)
+        return date.fromisoformat(index["data"]) if index else None
+
+
+def itereaza_din_cache(urls, cache, data):
+    #  Modul --replay: paginile unei rulări sunt citite exclusiv din cache, fără acces la rețea
+    for url in urls:
+        html = cache.citeste(url, data)
+        if html is None:
+            print(f"Pagina lipseste din cache pentru {data}: {url}")
+            continue
+        yield url, html
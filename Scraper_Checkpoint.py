@@ -0,0 +1,54 @@
+import json
+import sqlite3
+from datetime import date
+
+from Scraper_Parser import Anunt
+
+FISIER_CHECKPOINT = "checkpoint_crawl.sqlite"
+
+
+class Checkpoint:
+    #  Starea crawl-ului în curs, într-o bază SQLite locală: pentru fiecare pagină terminată, anunțurile parsate
+    #  din ea. O rulare întreruptă este reluată cu aceeași dată, paginile terminate nu mai sunt descărcate sau
+    #  parsate, iar anunțurile lor sunt trimise din nou loader-ului (upsert-ul le poate scrie de mai multe ori).
+    def __init__(self, cale=FISIER_CHECKPOINT):
+        self.sqlconnection = sqlite3.connect(cale)
+        with self.sqlconnection:
+            self.sqlconnection.execute("CREATE TABLE IF NOT EXISTS Rulare (Tinta TEXT PRIMARY KEY,"
+                                       " DataRulare TEXT NOT NULL);")
+            self.sqlconnection.execute("CREATE TABLE IF NOT EXISTS Pagini (Tinta TEXT NOT NULL,"
+                                       " Url TEXT NOT NULL,"
+                                       " Anunturi TEXT NOT NULL,"
+                                       " PRIMARY KEY(Tinta, Url));")
+
+    def incepe(self, tinta, data_rulare):
+        #  Data rulării neterminate pentru tinta dată (reluare), sau data_rulare pentru o rulare nouă; o rulare
+        #  întreruptă înainte de prima pagină parsată este luată de la capăt
+        rand = self.sqlconnection.execute("SELECT DataRulare FROM Rulare WHERE Tinta = ? AND EXISTS "
+                                          "(SELECT 1 FROM Pagini WHERE Pagini.Tinta = Rulare.Tinta);",
+                                          (tinta,)).fetchone()
+        if rand is not None:
+            return date.fromisoformat(rand[0])
+        with self.sqlconnection:
+            self.sqlconnection.execute("INSERT OR REPLACE INTO Rulare (Tinta, DataRulare) VALUES (?, ?);",
+                                       (tinta, data_rulare.isoformat()))
+        return data_rulare
+
+    def pagini(self, tinta):
+        #  {url: [Anunt, ...]} pentru paginile terminate ale rulării în curs
+        cursor = self.sqlconnection.execute("SELECT Url, Anunturi FROM Pagini WHERE Tinta = ?;", (tinta,))
+        return {url: [Anunt(*anunt) for anunt in json.loads(anunturi)] for url, anunturi in cursor}
+
+    def marcheaza(self, tinta, url, anunturi):
+        with self.sqlconnection:
+            self.sqlconnection.execute("INSERT OR REPLACE INTO Pagini (Tinta, Url, Anunturi) VALUES (?, ?, ?);",
+                                       (tinta, url, json.dumps(anunturi)))
+
+    def termina(self, tinta):
+        #  Rularea a fost încărcată complet în baza de date: starea ei nu mai este necesară
+        with self.sqlconnection:
+            self.sqlconnection.execute("DELETE FROM Pagini WHERE Tinta = ?;", (tinta,))
+            self.sqlconnection.execute("DELETE FROM Rulare WHERE Tinta = ?;", (tinta,))
+
+    def inchide(self):
+        self.sqlconnection.close()
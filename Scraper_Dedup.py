@@ -0,0 +1,133 @@
+import hashlib
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+BITI = 64
+#  Amprenta SimHash este împărțită în BENZI benzi; două amprente la distanța Hamming <= BENZI - 1 au sigur
+#  cel puțin o bandă identică, deci căutarea după benzi nu ratează niciun candidat
+BENZI = 4
+LATIME_BANDA = BITI // BENZI
+DISTANTA_MAXIMA = BENZI - 1
+
+#  Două anunțuri din aceeași categorie, zonă și cu același număr de camere sunt aproape duplicate dacă
+#  suprafețele diferă cu cel mult TOLERANTA_SUPRAFATA m², prețurile cu cel mult TOLERANTA_PRET și titlurile
+#  sunt aproape identice
+TOLERANTA_SUPRAFATA = 2
+TOLERANTA_PRET = 0.05
+_LOG_PRET = math.log(1 + TOLERANTA_PRET)
+
+COLOANE_DEDUP = ["id_anunt", "categorie", "zona_id", "nr_camere", "metri_patrati", "pret_final", "titlu"]
+
+
+def trasaturi(titlu):
+    #  Cuvintele titlului (fără diacritice, litere mici) și perechile de cuvinte consecutive
+    text = unicodedata.normalize("NFKD", titlu or "").encode("ascii", "ignore").decode("ascii").lower()
+    cuvinte = re.findall(r"[a-z0-9]+", text)
+    return cuvinte + [f"{a} {b}" for a, b in zip(cuvinte, cuvinte[1:])]
+
+
+@lru_cache(maxsize=1 << 16)
+def _vector(trasatura):
+    #  Cei 64 de biți ai hash-ului trăsăturii, ca +1 / -1; vocabularul titlurilor este mic, deci se repetă des
+    octeti = hashlib.blake2b(trasatura.encode("utf-8"), digest_size=BITI // 8).digest()
+    return np.unpackbits(np.frombuffer(octeti, dtype=np.uint8), bitorder="little").astype(np.int16) * 2 - 1
+
+
+def simhash(titlu):
+    vectori = [_vector(trasatura) for trasatura in trasaturi(titlu)]
+    if not vectori:
+        return None
+    biti = np.packbits(np.sum(vectori, axis=0) > 0, bitorder="little")
+    return int.from_bytes(biti.tobytes(), "little")
+
+
+def distanta(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _benzi(amprenta):
+    masca = (1 << LATIME_BANDA) - 1
+    return [(i, (amprenta >> (i * LATIME_BANDA)) & masca) for i in range(BENZI)]
+
+
+class IndexDuplicate:
+    #  Deduplicarea unui crawl, în timp liniar: anunțurile repetate (aceeași cheie, de ex. anunțurile promovate
+    #  care apar pe mai multe pagini) sunt eliminate, iar un anunț nou este comparat doar cu anunțurile din
+    #  același bloc (categorie, zonă, camere, interval de suprafață și de preț) și cu aceeași bandă SimHash
+    #  a titlului. Indexul pornește de la anunțurile originale deja salvate, deci un anunț repostat de
+    #  o agenție este recunoscut și între rulări.
+    def __init__(self):
+        self.vazute = set()
+        self.index = defaultdict(list)  # (bloc, banda) -> [(cheie, metri_patrati, pret, amprenta), ...]
+        self.intrari = {}  # cheie -> intrările ei din index, retrase când anunțul este văzut din nou
+        self.exacte = 0
+        self.aproape = 0
+
+    @classmethod
+    def din_backend(cls, backend):
+        index = cls()
+        for rand in backend.originale():
+            index.adauga(*rand)
+        return index
+
+    @staticmethod
+    def _bloc(categorie, zona, camere, metri, pret):
+        if zona is None or camere is None or metri is None or pret is None or pret <= 0:
+            return None
+        return categorie, zona, camere, int(metri // TOLERANTA_SUPRAFATA), int(math.log(pret) // _LOG_PRET)
+
+    def _retrage(self, cheie):
+        for pozitie in self.intrari.pop(cheie, ()):
+            self.index[pozitie] = [intrare for intrare in self.index[pozitie] if intrare[0] != cheie]
+
+    def adauga(self, cheie, categorie, zona, camere, metri, pret, titlu):
+        #  Cheia anunțului original al cărui duplicat este anunțul dat, sau None dacă este el însuși original
+        #  (caz în care intră în index)
+        self._retrage(cheie)
+        amprenta = simhash(titlu)
+        bloc = self._bloc(categorie, zona, camere, None if metri is None else float(metri), pret)
+        if bloc is None or amprenta is None:
+            return None
+        benzi = _benzi(amprenta)
+        #  Intervalele vecine acoperă perechile aflate de o parte și de alta a unei limite de interval
+        for suprafata in (bloc[3] - 1, bloc[3], bloc[3] + 1):
+            for interval_pret in (bloc[4] - 1, bloc[4], bloc[4] + 1):
+                vecin = bloc[:3] + (suprafata, interval_pret)
+                for banda in benzi:
+                    for original, metri_original, pret_original, amprenta_original in self.index.get((vecin, banda),
+                                                                                                    ()):
+                        if (abs(metri_original - float(metri)) <= TOLERANTA_SUPRAFATA
+                                and abs(pret_original - pret) <= TOLERANTA_PRET * min(pret_original, pret)
+                                and distanta(amprenta_original, amprenta) <= DISTANTA_MAXIMA):
+                            self.aproape += 1
+                            return original
+        intrare = (cheie, float(metri), pret, amprenta)
+        self.intrari[cheie] = [(bloc, banda) for banda in benzi]
+        for pozitie in self.intrari[cheie]:
+            self.index[pozitie].append(intrare)
+        return None
+
+    def marcheaza(self, df):
+        #  Elimină din lot anunțurile deja văzute în rulare și completează coloana "duplicat" (cheia originalului)
+        coloane = df[COLOANE_DEDUP].astype(object)
+        pastrate = []
+        duplicat = []
+        for rand in coloane.where(coloane.notna(), None).itertuples(index=False, name=None):
+            if rand[0] in self.vazute:
+                self.exacte += 1
+                pastrate.append(False)
+                continue
+            self.vazute.add(rand[0])
+            pastrate.append(True)
+            duplicat.append(self.adauga(*rand))
+        df = df[pastrate].copy()
+        df["duplicat"] = duplicat
+        return df
+
+    def sumar(self):
+        return f"{self.exacte} anunturi repetate eliminate, {self.aproape} aproape duplicate marcate"
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import time
+from collections import deque
+from itertools import islice
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from Metrici import METRICI
+
+CONCURENTA = 8  # numărul maxim de cereri aflate simultan în lucru
+PAGINI_PE_SECUNDA = 4  # plafonul de cereri pornite pe secundă pentru fiecare host
+TIMEOUT = 30  # secunde
+INCERCARI = 5  # numărul maxim de încercări pentru o pagină, înainte ca eroarea să oprească crawl-ul
+BACKOFF_BAZA = 1  # secunde; pauza dinaintea reîncercării k este aleasă uniform din [0, BACKOFF_BAZA * 2^k]
+BACKOFF_MAXIM = 60
+PAUZA_LIMITARE = 30  # secunde de pauză pentru un host care a răspuns 429/503, dublate la fiecare limitare repetată
+PAUZA_LIMITARE_MAXIMA = 600
+STATUS_LIMITARE = {429, 503}
+STATUS_TRANZITORII = {429, 500, 502, 503, 504}
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) CunoscImobiliareAPP"}
+
+
+class LimitatorRata:
+    #  Limitator de tip "token bucket" cu capacitate 1: cererile către același host pornesc la cel puțin
+    #  1 / rata secunde una de cealaltă, indiferent câte sunt permise simultan de semafor
+    def __init__(self, rata):
+        self.interval = 1 / rata if rata else 0
+        self.urmatorul = {}
+        self.lock = asyncio.Lock()
+
+    async def asteapta(self, host):
+        async with self.lock:
+            acum = time.monotonic()
+            start = max(acum, self.urmatorul.get(host, acum))
+            self.urmatorul[host] = start + self.interval
+        if start > acum:
+            await asyncio.sleep(start - acum)
+
+
+class Intrerupator:
+    #  "Circuit breaker" pe host: un răspuns 429/503 deschide circuitul, iar toate cererile către acel host
+    #  așteaptă până la închiderea lui: Retry-After, altfel PAUZA_LIMITARE dublată la fiecare limitare
+    #  consecutivă. Primul răspuns reușit resetează numărul de limitări. Cu `comun` (coada din Scraper_Queue),
+    #  pauza este împărțită cu celelalte procese care descarcă de pe același host: comun.pauza_host(host) dă
+    #  momentul (time.time()) până la care hostul este în pauză, iar comun.prelungeste_pauza(host, pana_la) îl
+    #  amână.
+    def __init__(self, pauza=PAUZA_LIMITARE, pauza_maxima=PAUZA_LIMITARE_MAXIMA, comun=None):
+        self.pauza = pauza
+        self.pauza_maxima = pauza_maxima
+        self.comun = comun
+        self.deschis_pana_la = {}
+        self.limitari = {}
+
+    async def asteapta(self, host):
+        while True:
+            ramas = self.deschis_pana_la.get(host, 0) - time.monotonic()
+            if self.comun is not None:
+                ramas = max(ramas, self.comun.pauza_host(host) - time.time())
+            if ramas <= 0:
+                return
+            await asyncio.sleep(ramas)
+
+    def deschide(self, host, retry_after=None):
+        self.limitari[host] = self.limitari.get(host, 0) + 1
+        pauza = min(self.pauza_maxima, self.pauza * 2 ** (self.limitari[host] - 1))
+        try:
+            pauza = min(self.pauza_maxima, float(retry_after))  # durata cerută explicit de server
+        except (TypeError, ValueError):  # lipsă sau în format de dată HTTP
+            pass
+        self.deschis_pana_la[host] = max(self.deschis_pana_la.get(host, 0), time.monotonic() + pauza)
+        if self.comun is not None:
+            self.comun.prelungeste_pauza(host, time.time() + pauza)
+        print(f"{host} limiteaza cererile, pauza de {pauza:.0f}s")
+
+    def inchide(self, host):
+        self.limitari.pop(host, None)
+
+
+class EroareTranzitorie(Exception):
+    #  Eroare după care cererea merită reîncercată: limitare, eroare temporară a serverului, conexiune căzută
+    pass
+
+
+def pauza_reincercare(incercare):
+    #  Backoff exponențial cu "full jitter": reîncercările paginilor eșuate simultan nu pornesc toate odată
+    return random.uniform(0, min(BACKOFF_MAXIM, BACKOFF_BAZA * 2 ** incercare))
+
+
+async def _cerere(sesiune, url, headers, cache, data, intrerupator, host):
+    try:
+        async with sesiune.get(url, headers=headers) as response:
+            if response.status in STATUS_LIMITARE:
+                intrerupator.deschide(host, response.headers.get("Retry-After"))
+            if response.status in STATUS_TRANZITORII:
+                raise EroareTranzitorie(f"HTTP {response.status}: {url}")
+            if response.status == 304:  # nemodificată de la ultima descărcare
+                html = cache.reutilizeaza(url, data)
+                METRICI.numara("pagini_nemodificate")
+            else:
+                response.raise_for_status()
+                html = await response.text()
+                METRICI.numara("caractere_descarcate", len(html))
+                if cache is not None:
+                    cache.salveaza(url, html, response.headers, data)
+    except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+        raise EroareTranzitorie(f"{type(e).__name__}: {url}") from e
+    intrerupator.inchide(host)
+    return html
+
+
+async def _descarca(sesiune, url, semafor, limitator, intrerupator, cache, data):
+    #  Paginile sunt citite din cache și salvate sub data rulării (implicit azi): o rulare reluată după miezul
+    #  nopții (Scraper_Checkpoint) le păstrează pe toate sub aceeași dată, pentru --replay
+    if cache is not None:
+        html = cache.citeste(url, data)
+        if html is not None:  # pagina a fost deja descărcată în această rulare
+            METRICI.numara("pagini_din_cache")
+            return html
+    headers = cache.validatori(url) if cache is not None else {}
+    host = urlsplit(url).netloc
+    for incercare in range(INCERCARI):
+        async with semafor:
+            await intrerupator.asteapta(host)
+            await limitator.asteapta(host)
+            try:
+                return await _cerere(sesiune, url, headers, cache, data, intrerupator, host)
+            except EroareTranzitorie as e:
+                if incercare + 1 == INCERCARI:
+                    raise
+                METRICI.numara("reincercari")
+                print(f"{e}, reincercare {incercare + 1}/{INCERCARI - 1}")
+        await asyncio.sleep(pauza_reincercare(incercare))  # în afara semaforului, ca să nu blocheze alte pagini
+
+
+async def _pagini(sesiune, urls, concurenta, semafor, limitator, intrerupator, cache, data=None):
+    #  Paginile sunt descărcate în paralel, dar predate parserului în ordinea din urls. Sunt programate cel mult
+    #  2 * concurenta pagini înaintea celei predate, astfel încât oprirea crawl-ului (ex. modul incremental)
+    #  nu irosește cereri pe paginile de la coada listei.
+    urls = iter(urls)
+    #  "descarcare" este durata crawl-ului (pagini/s), iar "asteptare_retea" doar timpul în care consumatorul
+    #  a așteptat o pagină încă nedescărcată: cât din durată cade pe rețea și nu pe parsare sau încărcare
+    start = time.perf_counter()
+    nr_descarcate = 0
+    in_lucru = deque()
+
+    def programeaza():
+        for url in islice(urls, 2 * concurenta - len(in_lucru)):
+            in_lucru.append((url, asyncio.ensure_future(_descarca(sesiune, url, semafor, limitator,
+                                                                       intrerupator, cache, data))))
+
+    try:
+        programeaza()
+        while in_lucru:
+            url, task = in_lucru.popleft()
+            with METRICI.etapa("asteptare_retea"):
+                html = await task
+            programeaza()
+            METRICI.numara("pagini_descarcate")
+            yield url, html
+            nr_descarcate += 1
+    finally:
+        for _, task in in_lucru:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in in_lucru), return_exceptions=True)
+        durata = time.perf_counter() - start
+        METRICI.durate["descarcare"] += durata
+        if nr_descarcate:
+            print(f"{nr_descarcate} pagini descarcate in {durata:.1f}s "
+                  f"({nr_descarcate / durata:.2f} pagini/s)")
+
+
+def _sesiune(concurenta):
+    #  O singură sesiune -> conexiunile keep-alive sunt refolosite între pagini
+    conector = aiohttp.TCPConnector(limit=concurenta, limit_per_host=concurenta)
+    return aiohttp.ClientSession(connector=conector, timeout=aiohttp.ClientTimeout(total=TIMEOUT), headers=HEADERS)
+
+
+class Descarcator:
+    #  Descărcarea paginilor (vezi _pagini) pentru scripturile care nu rulează într-un event loop. Event
+    #  loop-ul, sesiunea, limitatorul și întrerupătorul sunt păstrate între apelurile lui pagini(), deci un proces
+    #  care descarcă mai multe liste de pagini (loturile din Scraper_Queue) respectă aceeași rată și aceeași
+    #  pauză după un 429/503 pe toată durata lui (cu `comun`, și celelalte procese, vezi Intrerupator).
+    #  inchide() eliberează conexiunile. `data` este data rulării, sub care paginile sunt citite și salvate în cache.
+    def __init__(self, concurenta=CONCURENTA, pagini_pe_secunda=PAGINI_PE_SECUNDA, cache=None, comun=None,
+                 data=None):
+        self.concurenta = concurenta
+        self.cache = cache
+        self.data = data
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._deschide(pagini_pe_secunda, comun))
+
+    async def _deschide(self, pagini_pe_secunda, comun):
+        #  Obiectele asyncio sunt create în interiorul loop-ului în care vor fi folosite
+        self.sesiune = _sesiune(self.concurenta)
+        self.semafor = asyncio.Semaphore(self.concurenta)
+        self.limitator = LimitatorRata(pagini_pe_secunda)
+        self.intrerupator = Intrerupator(comun=comun)
+
+    def pagini(self, urls):
+        #  Oprirea iterării (break) anulează descărcările rămase
+        generator = _pagini(self.sesiune, urls, self.concurenta, self.semafor, self.limitator, self.intrerupator,
+                            self.cache, self.data)
+        try:
+            while True:
+                try:
+                    yield self.loop.run_until_complete(generator.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            self.loop.run_until_complete(generator.aclose())
+
+    def inchide(self):
+        self.loop.run_until_complete(self.sesiune.close())
+        self.loop.close()
+
+
+def itereaza_pagini(urls, **optiuni):
+    #  O singură listă de pagini, cu un Descarcator închis la final
+    descarcator = Descarcator(**optiuni)
+    try:
+        yield from descarcator.pagini(urls)
+    finally:
+        descarcator.inchide()
+
+
+def descarca_pagina(url, cache=None, data=None):
+    #  Descărcarea unei singure pagini (ex. prima pagină, necesară pentru numărul total de anunțuri)
+    for _, html in itereaza_pagini([url], concurenta=1, cache=cache, data=data):
+        return html
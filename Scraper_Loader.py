@@ -0,0 +1,374 @@
+import os
+import tempfile
+from functools import partial
+from itertools import islice
+
+import pymysql
+
+import pandas as pd
+
+from Metrici import METRICI
+from SQL_Conexiune import creeaza_baza, engine
+from SQL_Schema import CATEGORIE_HARTA, JUDET_HARTA, ZONA_ID_START, adauga_zone_sqlite, creeaza_mysql, creeaza_sqlite
+from Scraper_Transform import cadru_anunturi, transforma
+from Scraper_Zone import RezolvitorZone
+
+#  Coloana din DataFrame-ul transformat -> coloana din tabelul Imobiliare
+COLOANE_CADRU = {"id_anunt": "IdAnunt", "categorie": "Categorie", "judet": "Judet", "titlu": "Titlu",
+                 "locatie": "LocatieApartament", "zona_id": "ZonaID", "pret": "Pret", "valuta": "Valuta",
+                 "nr_camere": "NumarCamere", "pret_final": "PretFinal", "metri_patrati": "MetriPatrati",
+                 "pret_mp": "PretMetruPatrat", "amprenta": "Amprenta", "duplicat": "Duplicat",
+                 "prima_data": "PrimaData", "ultima_data": "UltimaData"}
+COLOANE = tuple(COLOANE_CADRU.values())
+#  Coloanele din care sunt calculate agregatele pe zonă și număr de camere (SQL_Summary), doar pentru
+#  anunțurile din categoria CATEGORIE_HARTA și județul JUDET_HARTA care nu sunt duplicate ale altor anunțuri
+#  (Duplicat IS NULL)
+COLOANE_AGREGATE = ("ZonaID", "NumarCamere", "PretFinal", "MetriPatrati", "PretMetruPatrat")
+
+#  Rândul din IstoricAnunturi pentru un anunț nou sau modificat; DataRulare este UltimaData din rândul scris
+COLOANE_ISTORIC = ("UltimaData", "IdAnunt") + COLOANE_AGREGATE
+
+#  La un anunț deja cunoscut se actualizează tot, mai puțin data primei apariții
+COLOANE_ACTUALIZATE = [col for col in COLOANE if col not in ("IdAnunt", "PrimaData")]
+
+#  Zonele din afara hărții care pot fi mutate pe un poligon: doar cele ale căror anunțuri sunt toate din județul
+#  hărții; zonele anunțurilor din alte județe ("Arad, zona Centru") nu sunt căutate pe harta Timișoarei
+SQL_ZONE_REASOCIABILE = ("SELECT z.ZonaID, z.Nume FROM Zone z WHERE z.PeHarta = 0 AND NOT EXISTS "
+                         "(SELECT 1 FROM Imobiliare i WHERE i.ZonaID = z.ZonaID AND i.Judet <> ?);")
+
+DIMENSIUNE_LOT = 1000
+#  Variabilele dintr-o interogare SQLite: versiunile anterioare 3.32 acceptă cel mult 999, deci căutările
+#  IN (...) ale unui lot sunt împărțite în bucăți
+VARIABILE_SQLITE = 900
+
+#  Escaparea implicită a LOAD DATA (FIELDS ESCAPED BY '\\'): separatorii și backslash-ul din text sunt scriși
+#  escapat, iar NULL este marcajul \N nescapat
+ESCAPARE_INFILE = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def linie_infile(rand):
+    return "\t".join(r"\N" if valoare is None else str(valoare).translate(ESCAPARE_INFILE) for valoare in rand) + "\n"
+
+
+def in_agregate(categorie, judet):
+    #  Doar anunțurile țintei hărții intră în agregatele pe zonă (SQL_Summary)
+    return categorie == CATEGORIE_HARTA and judet == JUDET_HARTA
+
+
+def loturi(iterabil, dimensiune):
+    #  Împarte un flux de înregistrări în loturi de cel mult `dimensiune` elemente
+    iterator = iter(iterabil)
+    while True:
+        lot = list(islice(iterator, dimensiune))
+        if not lot:
+            return
+        yield lot
+
+
+class BackendMySQL:
+    #  mod="insert": executemany, pe care PyMySQL îl rescrie într-un singur INSERT cu mai multe rânduri per lot
+    #  mod="infile": lotul este scris într-un fișier temporar, încărcat cu LOAD DATA LOCAL INFILE într-un tabel
+    #  de tranzit și mutat în Imobiliare cu un singur INSERT ... SELECT ... ON DUPLICATE KEY UPDATE
+    #  Conexiunea este luată din pool-ul comun al procesului (SQL_Conexiune) și returnată la inchide()
+    def __init__(self, mod="insert"):
+        self.mod = mod
+        self.zone = {}
+        self.rezolvitor = RezolvitorZone()
+        creeaza_baza()
+        self.engine = engine("mysql", local_infile=(mod == "infile"))
+        self.sqlconnection = self.engine.raw_connection()
+        with self.sqlconnection.cursor() as cursor:
+            self.creeaza_schema(cursor)
+        self.sqlconnection.commit()
+
+    def creeaza_schema(self, cursor):
+        creeaza_mysql(cursor)
+        if self.mod == "infile":
+            #  O conexiune refolosită din pool poate avea încă tabelul de tranzit al unui backend anterior
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS ImobiliareTranzit;")
+            cursor.execute("CREATE TEMPORARY TABLE ImobiliareTranzit LIKE Imobiliare;")
+            cursor.execute("ALTER TABLE ImobiliareTranzit DROP INDEX IdAnunt;")  # un lot poate repeta un anunț
+
+    def amprente(self, chei):
+        with self.sqlconnection.cursor() as cursor:
+            cursor.execute("SELECT IdAnunt, Amprenta FROM Imobiliare WHERE IdAnunt IN %s;", (tuple(chei),))
+            return dict(cursor.fetchall())
+
+    def valori(self, chei):
+        #  Valorile salvate care intră în agregate, pentru anunțurile deja existente: {IdAnunt: (ZonaID, ...)}
+        with self.sqlconnection.cursor() as cursor:
+            cursor.execute("SELECT IdAnunt, " + ", ".join(COLOANE_AGREGATE) + " FROM Imobiliare "
+                           "WHERE IdAnunt IN %s AND Duplicat IS NULL;", (tuple(chei),))
+            return {rand[0]: rand[1:] for rand in cursor.fetchall()}
+
+    def sterge_expirate(self, inainte_de, data_rulare, categorie=CATEGORIE_HARTA, judet=JUDET_HARTA):
+        #  Șterge anunțurile țintei crawl-ului (categorie + județ) nevăzute de la data dată și returnează valorile
+        #  celor din agregate, pentru scăderea lor; ștergerea rămâne în istoric ca rând cu Sters = 1
+        with self.sqlconnection.cursor() as cursor:
+            cursor.execute("SELECT " + ", ".join(COLOANE_AGREGATE) + " FROM Imobiliare "
+                           "WHERE UltimaData < %s AND Categorie = %s AND Judet = %s AND Duplicat IS NULL;",
+                           (inainte_de, categorie, judet))
+            sterse = cursor.fetchall() if in_agregate(categorie, judet) else []
+            cursor.execute("INSERT INTO IstoricAnunturi (DataRulare, IdAnunt, Sters) SELECT %s, IdAnunt, 1 "
+                           "FROM Imobiliare WHERE UltimaData < %s AND Categorie = %s AND Judet = %s "
+                           "ON DUPLICATE KEY UPDATE Sters = 1;", (data_rulare, inainte_de, categorie, judet))
+            cursor.execute("DELETE FROM Imobiliare WHERE UltimaData < %s AND Categorie = %s AND Judet = %s;",
+                           (inainte_de, categorie, judet))
+        self.sqlconnection.commit()
+        return sterse
+
+    def originale(self):
+        #  Anunțurile salvate care nu sunt duplicate, în ordinea coloanelor din Scraper_Dedup.COLOANE_DEDUP
+        with self.sqlconnection.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute("SELECT IdAnunt, Categorie, ZonaID, NumarCamere, MetriPatrati, PretFinal, Titlu "
+                           "FROM Imobiliare WHERE Duplicat IS NULL;")
+            yield from cursor
+
+    def id_zone(self, locatii, pe_harta=True):
+        #  ZonaID pentru fiecare locație: poligonul de pe hartă găsit de rezolvitor sau, în afara hărții,
+        #  o zonă proprie, adăugată în dimensiunea Zone la prima apariție. Locațiile din alte județe
+        #  (pe_harta=False) nu sunt căutate pe harta Timișoarei.
+        harta = self.rezolvitor(locatii) if pe_harta else [None] * len(locatii)
+        lipsa = {locatie for locatie, zona in zip(locatii, harta)
+                 if zona is None and locatie is not None and locatie not in self.zone}
+        if lipsa:
+            with self.sqlconnection.cursor() as cursor:
+                cursor.executemany("INSERT IGNORE INTO Zone (Nume) VALUES (%s);", list(lipsa))
+                cursor.execute("SELECT Nume, ZonaID FROM Zone WHERE Nume IN %s;", (tuple(lipsa),))
+                self.zone.update(cursor.fetchall())
+        return [zona if zona is not None else self.zone.get(locatie) for locatie, zona in zip(locatii, harta)]
+
+    def reasociaza_zone(self):
+        #  Anunțurile salvate înainte de rezolvitor, cu o zonă din afara hărții care corespunde acum unui poligon
+        with self.sqlconnection.cursor() as cursor:
+            cursor.execute(SQL_ZONE_REASOCIABILE.replace("?", "%s"), (JUDET_HARTA,))
+            mutari = [(self.rezolvitor.rezolva(nume), zona, JUDET_HARTA) for zona, nume in cursor.fetchall()]
+            mutari = [mutare for mutare in mutari if mutare[0] is not None]
+            mutate = cursor.executemany("UPDATE Imobiliare SET ZonaID = %s WHERE ZonaID = %s AND Judet = %s;",
+                                        mutari) or 0
+        self.sqlconnection.commit()
+        return mutate
+
+    def scrie(self, lot):
+        actualizare = ", ".join(f"{col} = VALUES({col})" for col in COLOANE_ACTUALIZATE)
+        with self.sqlconnection.cursor() as cursor:
+            if self.mod == "infile":
+                self._scrie_infile(cursor, lot, actualizare)
+            else:
+                cursor.executemany("INSERT INTO Imobiliare (" + ", ".join(COLOANE) + ") VALUES ("
+                                   + ", ".join(["%s"] * len(COLOANE)) + ") ON DUPLICATE KEY UPDATE "
+                                   + actualizare + ";", lot)
+        self.sqlconnection.commit()
+
+    def scrie_istoric(self, randuri):
+        with self.sqlconnection.cursor() as cursor:
+            cursor.executemany("INSERT INTO IstoricAnunturi (DataRulare, IdAnunt, " + ", ".join(COLOANE_AGREGATE)
+                               + ") VALUES (" + ", ".join(["%s"] * len(COLOANE_ISTORIC)) + ") ON DUPLICATE KEY UPDATE "
+                               + ", ".join(f"{col} = VALUES({col})" for col in COLOANE_AGREGATE) + ";", randuri)
+        self.sqlconnection.commit()
+
+    def scrie_tendinte(self, saptamana, randuri):
+        #  Rândurile săptămânii sunt înlocuite complet de ultima rulare din acea săptămână
+        with self.sqlconnection.cursor() as cursor:
+            cursor.execute("DELETE FROM TendinteZona WHERE Saptamana = %s;", (saptamana,))
+            cursor.executemany("INSERT INTO TendinteZona VALUES (%s, %s, %s, %s, %s, %s, %s, %s);", randuri)
+        self.sqlconnection.commit()
+
+    def _scrie_infile(self, cursor, lot, actualizare):
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", newline="", encoding="utf-8", delete=False) as f:
+            f.writelines(linie_infile(rand) for rand in lot)
+        try:
+            cursor.execute("TRUNCATE TABLE ImobiliareTranzit;")
+            cursor.execute("LOAD DATA LOCAL INFILE %s INTO TABLE ImobiliareTranzit CHARACTER SET utf8mb4 "
+                           "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' (" + ", ".join(COLOANE) + ");",
+                           (f.name,))
+            #  ORDER BY ID păstrează semantica "ultimul câștigă" pentru anunțurile repetate în același lot
+            cursor.execute("INSERT INTO Imobiliare (" + ", ".join(COLOANE) + ") SELECT " + ", ".join(COLOANE)
+                           + " FROM ImobiliareTranzit ORDER BY ID ON DUPLICATE KEY UPDATE " + actualizare + ";")
+        finally:
+            os.remove(f.name)
+
+    def inchide(self):
+        self.sqlconnection.close()
+
+
+class BackendSQLite:
+    #  Același tabel într-o bază SQLite locală: permite rularea încărcării fără un server MySQL
+    def __init__(self, cale=None):
+        self.zone = {}
+        self.rezolvitor = RezolvitorZone()
+        self.engine = engine("sqlite", cale)
+        self._conexiune = self.engine.raw_connection()
+        self.sqlconnection = self._conexiune.dbapi_connection  # conexiunea sqlite3, cu tranzacțiile ei (with)
+        self.creeaza_schema()
+
+    def creeaza_schema(self):
+        creeaza_sqlite(self.sqlconnection)
+
+    def _cauta(self, sql, chei):
+        #  Rândurile interogării `sql` (cu un IN (...) marcat "{}") pentru toate cheile, în bucăți de cel mult
+        #  VARIABILE_SQLITE valori
+        for bucata in loturi(chei, VARIABILE_SQLITE):
+            yield from self.sqlconnection.execute(sql.format(", ".join("?" * len(bucata))), tuple(bucata))
+
+    def id_zone(self, locatii, pe_harta=True):
+        harta = self.rezolvitor(locatii) if pe_harta else [None] * len(locatii)
+        lipsa = {locatie for locatie, zona in zip(locatii, harta)
+                 if zona is None and locatie is not None and locatie not in self.zone}
+        if lipsa:
+            with self.sqlconnection:
+                adauga_zone_sqlite(self.sqlconnection, lipsa)
+            self.zone.update(self._cauta("SELECT Nume, ZonaID FROM Zone WHERE Nume IN ({});", lipsa))
+        return [zona if zona is not None else self.zone.get(locatie) for locatie, zona in zip(locatii, harta)]
+
+    def reasociaza_zone(self):
+        cursor = self.sqlconnection.execute(SQL_ZONE_REASOCIABILE, (JUDET_HARTA,))
+        mutari = [(self.rezolvitor.rezolva(nume), zona, JUDET_HARTA) for zona, nume in cursor.fetchall()]
+        mutari = [mutare for mutare in mutari if mutare[0] is not None]
+        with self.sqlconnection:
+            return self.sqlconnection.executemany("UPDATE Imobiliare SET ZonaID = ? WHERE ZonaID = ? AND Judet = ?;",
+                                                  mutari).rowcount
+
+    def valori(self, chei):
+        randuri = self._cauta("SELECT IdAnunt, " + ", ".join(COLOANE_AGREGATE) + " FROM Imobiliare "
+                              "WHERE IdAnunt IN ({}) AND Duplicat IS NULL;", chei)
+        return {rand[0]: rand[1:] for rand in randuri}
+
+    def sterge_expirate(self, inainte_de, data_rulare, categorie=CATEGORIE_HARTA, judet=JUDET_HARTA):
+        with self.sqlconnection:
+            sterse = self.sqlconnection.execute("SELECT " + ", ".join(COLOANE_AGREGATE) + " FROM Imobiliare "
+                                                "WHERE UltimaData < ? AND Categorie = ? AND Judet = ? "
+                                                "AND Duplicat IS NULL;", (inainte_de, categorie, judet)).fetchall()
+            sterse = sterse if in_agregate(categorie, judet) else []
+            self.sqlconnection.execute("INSERT INTO IstoricAnunturi (DataRulare, IdAnunt, Sters) "
+                                       "SELECT ?, IdAnunt, 1 FROM Imobiliare WHERE UltimaData < ? "
+                                       "AND Categorie = ? AND Judet = ? "
+                                       "ON CONFLICT(DataRulare, IdAnunt) DO UPDATE SET Sters = 1;",
+                                       (data_rulare, inainte_de, categorie, judet))
+            self.sqlconnection.execute("DELETE FROM Imobiliare WHERE UltimaData < ? AND Categorie = ? AND Judet = ?;",
+                                       (inainte_de, categorie, judet))
+        return sterse
+
+    def originale(self):
+        return self.sqlconnection.execute("SELECT IdAnunt, Categorie, ZonaID, NumarCamere, MetriPatrati, PretFinal, "
+                                          "Titlu FROM Imobiliare WHERE Duplicat IS NULL;")
+
+    def amprente(self, chei):
+        return dict(self._cauta("SELECT IdAnunt, Amprenta FROM Imobiliare WHERE IdAnunt IN ({});", chei))
+
+    def scrie(self, lot):
+        actualizare = ", ".join(f"{col} = excluded.{col}" for col in COLOANE_ACTUALIZATE)
+        with self.sqlconnection:  # un lot = o tranzacție
+            self.sqlconnection.executemany("INSERT INTO Imobiliare (" + ", ".join(COLOANE) + ") VALUES ("
+                                           + ", ".join("?" * len(COLOANE)) + ") ON CONFLICT(IdAnunt) DO UPDATE SET "
+                                           + actualizare + ";", lot)
+
+    def scrie_istoric(self, randuri):
+        with self.sqlconnection:
+            self.sqlconnection.executemany("INSERT INTO IstoricAnunturi (DataRulare, IdAnunt, "
+                                           + ", ".join(COLOANE_AGREGATE) + ") VALUES ("
+                                           + ", ".join("?" * len(COLOANE_ISTORIC)) + ") "
+                                           "ON CONFLICT(DataRulare, IdAnunt) DO UPDATE SET "
+                                           + ", ".join(f"{col} = excluded.{col}" for col in COLOANE_AGREGATE) + ";",
+                                           randuri)
+
+    def scrie_tendinte(self, saptamana, randuri):
+        with self.sqlconnection:
+            self.sqlconnection.execute("DELETE FROM TendinteZona WHERE Saptamana = ?;", (saptamana,))
+            self.sqlconnection.executemany("INSERT INTO TendinteZona VALUES (?, ?, ?, ?, ?, ?, ?, ?);", randuri)
+
+    def inchide(self):
+        self._conexiune.close()
+
+
+#  --backend din scripturile de colectare: "mysql-infile" încarcă loturile cu LOAD DATA LOCAL INFILE (serverul
+#  trebuie să aibă local_infile activat)
+BACKENDURI = {"mysql": BackendMySQL, "mysql-infile": partial(BackendMySQL, mod="infile"), "sqlite": BackendSQLite}
+
+
+def pagina_neschimbata(backend, chei_amprente):
+    #  Adevărat dacă toate anunțurile paginii sunt deja în baza de date, cu același conținut
+    if not chei_amprente:
+        return False
+    cunoscute = backend.amprente([cheie for cheie, _ in chei_amprente])
+    return all(cunoscute.get(cheie) == ampr for cheie, ampr in chei_amprente)
+
+
+def actualizeaza_agregate(agregate, backend, lot):
+    #  Valorile vechi ale anunțurilor actualizate sunt scăzute din agregate, iar cele noi adăugate; un anunț
+    #  devenit duplicat doar iese din agregate
+    pozitii = [COLOANE.index(col) for col in COLOANE_AGREGATE]
+    pozitie_categorie = COLOANE.index("Categorie")
+    pozitie_judet = COLOANE.index("Judet")
+    pozitie_duplicat = COLOANE.index("Duplicat")
+    lot = [rand for rand in lot if in_agregate(rand[pozitie_categorie], rand[pozitie_judet])]
+    if not lot:
+        return
+    curente = backend.valori([rand[0] for rand in lot])
+    for rand in lot:
+        if rand[0] in curente:
+            agregate.scade(*curente.pop(rand[0]))
+        if rand[pozitie_duplicat] is None:
+            curente[rand[0]] = [rand[i] for i in pozitii]
+            agregate.adauga(*curente[rand[0]])
+
+
+def cadru_lot(lot, amprente, backend, data_rulare, categorie=CATEGORIE_HARTA, judet=JUDET_HARTA, duplicate=None):
+    #  Lot de înregistrări Anunt -> DataFrame cu toate coloanele din COLOANE_CADRU, gata de încărcat; cu un
+    #  IndexDuplicate (Scraper_Dedup), anunțurile repetate sunt eliminate și duplicatele marcate
+    with METRICI.etapa("transformare"):
+        df = transforma(cadru_anunturi(lot))
+        df["amprenta"] = amprente
+        df["categorie"] = categorie
+        df["judet"] = judet
+        df["zona_id"] = pd.array(backend.id_zone(df["locatie"].tolist(), pe_harta=(judet == JUDET_HARTA)),
+                                 dtype="Int64")
+        df["prima_data"] = df["ultima_data"] = data_rulare.isoformat()
+        if duplicate is None:
+            df["duplicat"] = None
+        else:
+            df = duplicate.marcheaza(df)
+    METRICI.numara("randuri_transformate", len(df))
+    if judet == JUDET_HARTA:
+        #  Locațiile pe care rezolvitorul nu le-a pus pe un poligon primesc zone noi, de la ZONA_ID_START
+        in_afara = df["zona_id"].isna() | (df["zona_id"] >= ZONA_ID_START)
+        METRICI.respinge("locatie_in_afara_hartii", int(in_afara.sum()))
+    return df
+
+
+def modificari(backend, lot):
+    #  Rândurile de istoric pentru anunțurile noi sau cu altă amprentă decât cea salvată; anunțurile neschimbate
+    #  nu mai sunt scrise încă o dată în istoric
+    pozitie_amprenta = COLOANE.index("Amprenta")
+    pozitii = [COLOANE.index(col) for col in COLOANE_ISTORIC]
+    salvate = backend.amprente([rand[0] for rand in lot])
+    istoric = {}
+    for rand in lot:
+        if salvate.get(rand[0]) != rand[pozitie_amprenta]:
+            istoric[rand[0]] = [rand[i] for i in pozitii]
+    return list(istoric.values())
+
+
+def incarca(randuri, backend, dimensiune_lot=DIMENSIUNE_LOT, agregate=None):
+    #  Încărcarea în flux: rândurile sunt consumate pe măsură ce sunt produse și scrise în loturi de dimensiune
+    #  fixă, deci memoria nu crește odată cu numărul de anunțuri
+    durata = 0
+    nr_randuri = 0
+    for lot in loturi(randuri, dimensiune_lot):
+        #  Doar timpul de scriere, fără descărcare și parsare, împărțit pe agregate, istoric și scrierea lotului
+        with METRICI.etapa("incarcare") as etapa:
+            if agregate is not None:
+                with METRICI.etapa("incarcare_agregate"):
+                    actualizeaza_agregate(agregate, backend, lot)
+            with METRICI.etapa("incarcare_istoric"):
+                istoric = modificari(backend, lot)
+            with METRICI.etapa("incarcare_scriere"):
+                backend.scrie(lot)
+                if istoric:
+                    backend.scrie_istoric(istoric)
+        durata += etapa.durata
+        nr_randuri += len(lot)
+        METRICI.numara("randuri_incarcate", len(lot))
+    if nr_randuri:
+        print(f"{nr_randuri} anunturi incarcate in {durata:.1f}s ({nr_randuri / durata:.0f} randuri/s)")
+    return nr_randuri
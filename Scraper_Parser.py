@@ -0,0 +1,170 @@
+import hashlib
+import sys
+import time
+from typing import NamedTuple, Optional
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+from Metrici import METRICI
+
+CLASA_CARD = "box-anunt"  # fiecare anunț de pe pagina de rezultate este un div cu această clasă
+
+#  Clasa elementului din card -> câmpul pe care îl alimentează
+CAMPURI = {
+    "titlu-anunt": "titlu",
+    "location_txt": "locatie",
+    "pret-mare": "pret",
+    "tva-luna": "valuta",
+    "caracteristici": "caracteristici",
+    "necomunicat": "necomunicat",
+}
+
+
+class Anunt(NamedTuple):
+    id_anunt: Optional[str]
+    titlu: Optional[str]
+    locatie: Optional[str]
+    pret: Optional[int]
+    valuta: Optional[str]
+    nr_camere: Optional[int]
+    metri_patrati: Optional[float]
+
+
+def cheie_anunt(anunt):
+    #  Identitatea stabilă a unui anunț între rulări: id-ul cardului de pe site sau, în lipsa lui,
+    #  un hash al câmpurilor care descriu locuința (fără preț, care se poate schimba)
+    if anunt.id_anunt:
+        return anunt.id_anunt
+    descriere = f"{anunt.titlu}|{anunt.locatie}|{anunt.nr_camere}|{anunt.metri_patrati}"
+    return "h-" + hashlib.md5(descriere.encode("utf-8")).hexdigest()
+
+
+def amprenta(anunt):
+    #  Amprenta conținutului: se schimbă dacă se modifică oricare câmp preluat de pe site
+    return hashlib.md5(repr(tuple(anunt[1:])).encode("utf-8")).hexdigest()
+
+
+def _pret(text):
+    try:
+        return int(float(text) * 1000)
+    except (TypeError, ValueError):
+        METRICI.respinge("pret_lipsa" if text is None else "pret_eronat")
+        return None  # "Valoare eronata site"
+
+
+def _nr_camere(cuvinte):
+    if not cuvinte:
+        METRICI.respinge("camere_lipsa")
+        return None
+    if cuvinte[0] == "o":
+        return 1
+    if len(cuvinte[0]) > 5:
+        METRICI.respinge("camere_eronat")
+        return None  # "Valoare eronata site"
+    try:
+        return int(cuvinte[0])
+    except ValueError:
+        METRICI.respinge("camere_eronat")
+        return None
+
+
+def _metri_patrati(cuvinte):
+    try:
+        converted_mp = float(cuvinte[2].replace(",", "."))
+    except (IndexError, ValueError):
+        METRICI.respinge("suprafata_nedeclarata")
+        return None  # "Metri patrați nedeclarati de catre proprietar"
+    if converted_mp < 1000:
+        return converted_mp
+    METRICI.respinge("suprafata_eronata")
+    return None  # "Metri patrati declarati eronat"
+
+
+def _anunt(id_anunt, campuri):
+    #  Conversia textelor brute dintr-un card în înregistrarea finală, cu aceleași reguli ca scriptul inițial
+    cuvinte = campuri.get("caracteristici", "").split()
+    if "necomunicat" in campuri:
+        METRICI.respinge("pret_necomunicat")
+    return Anunt(
+        id_anunt=id_anunt,
+        titlu=campuri["titlu"].strip() if "titlu" in campuri else None,
+        locatie=campuri["locatie"].strip() if "locatie" in campuri else None,
+        pret=None if "necomunicat" in campuri else _pret(campuri.get("pret")),
+        valuta=campuri.get("valuta"),
+        nr_camere=_nr_camere(cuvinte),
+        metri_patrati=_metri_patrati(cuvinte),
+    )
+
+
+def _campuri_card(elemente, clase, text):
+    #  O singură parcurgere a cardului: fiecare element este încadrat după clasele sale
+    campuri = {}
+    for element in elemente:
+        for clasa in clase(element):
+            camp = CAMPURI.get(clasa)
+            if camp is not None and camp not in campuri:
+                campuri[camp] = text(element)
+    return campuri
+
+
+def _parseaza_lxml(html):
+    document = lxml.html.fromstring(html)
+    for card in document.xpath(f'//div[contains(concat(" ", normalize-space(@class), " "), " {CLASA_CARD} ")]'):
+        campuri = _campuri_card(card.iterdescendants(), lambda el: (el.get("class") or "").split(),
+                                lambda el: el.text_content())
+        yield _anunt(card.get("id"), campuri)
+
+
+def _parseaza_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for card in soup.find_all(name="div", class_=CLASA_CARD):
+        campuri = _campuri_card(card.find_all(True), lambda el: el.get("class") or (),
+                                lambda el: el.getText())
+        yield _anunt(card.get("id"), campuri)
+
+
+BACKENDURI = {"lxml": _parseaza_lxml, "bs4": _parseaza_bs4}
+
+
+def parseaza_pagina(html, backend="lxml"):
+    #  Returnează câte o înregistrare Anunt pentru fiecare card de pe pagină, în ordinea de pe pagină
+    with METRICI.etapa("parsare"):
+        anunturi = list(BACKENDURI[backend](html))
+    METRICI.numara("pagini_parsate")
+    METRICI.numara("anunturi_parsate", len(anunturi))
+    return anunturi
+
+
+def numar_anunturi(html, backend="lxml"):
+    #  Numărul total de anunțuri afișat pe prima pagină de rezultate
+    if backend == "lxml":
+        contor = lxml.html.fromstring(html).find_class("total_anunturi_js")
+        return int(contor[0].text_content()) if contor else 0
+    contor = BeautifulSoup(html, "html.parser").find(name="span", class_="total_anunturi_js")
+    return int(contor.getText()) if contor else 0
+
+
+def compara_backenduri(pagini, repetari=3):
+    #  Comparația de viteză între backenduri pe pagini salvate; verifică și că rezultatele sunt identice
+    rezultate = {}
+    for backend in BACKENDURI:
+        start = time.perf_counter()
+        for _ in range(repetari):
+            anunturi = [parseaza_pagina(html, backend) for html in pagini]
+        durata = time.perf_counter() - start
+        rezultate[backend] = anunturi
+        print(f"{backend:>5}: {len(pagini) * repetari / durata:8.1f} pagini/s, "
+              f"{durata / (len(pagini) * repetari) * 1000:6.2f} ms/pagina")
+    if rezultate["lxml"] != rezultate["bs4"]:
+        print("Atentie: backendurile au produs rezultate diferite")
+    return rezultate
+
+
+if __name__ == "__main__":
+    #  python Scraper_Parser.py pagina1.html pagina2.html ...
+    pagini_salvate = []
+    for cale in sys.argv[1:]:
+        with open(cale, encoding="utf-8") as f:
+            pagini_salvate.append(f.read())
+    compara_backenduri(pagini_salvate)
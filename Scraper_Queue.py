@@ -0,0 +1,224 @@
+import json
+import math
+import sqlite3
+import time
+from datetime import date
+from typing import NamedTuple
+
+from Metrici import METRICI
+from Scraper_Cache import CacheHttp
+from Scraper_Fetch import CONCURENTA, PAGINI_PE_SECUNDA, Descarcator
+from Scraper_Parser import Anunt, numar_anunturi, parseaza_pagina
+
+FISIER_COADA = "coada_crawl.sqlite"
+FISIER_TINTE = "tinte_crawl.json"
+ANUNTURI_PE_PAGINA = 30
+INCERCARI_COADA = 3  # încercările unei pagini eșuate, fiecare cu reîncercările proprii din Scraper_Fetch
+LOT_LUCRU = 8  # paginile luate deodată de un proces și descărcate concurent
+#  Secunde după care o pagină rămasă în lucru (procesul care a preluat-o s-a oprit brusc) revine în coadă; un lot
+#  poate aștepta legitim câteva pauze de limitare (Scraper_Fetch)
+TIMEOUT_LUCRU = 1800
+
+ASTEPTARE, LUCRU, GATA, INCARCAT, ESUAT = "asteptare", "lucru", "gata", "incarcat", "esuat"
+
+
+class Tinta(NamedTuple):
+    categorie: str
+    judet: str
+    url: str
+
+    @property
+    def cheie(self):
+        return f"{self.categorie}/{self.judet}"
+
+
+class Lucrare(NamedTuple):
+    url: str
+    tinta: str
+    pagina: int
+
+
+def citeste_tinte(cale=FISIER_TINTE):
+    with open(cale, encoding="utf-8") as f:
+        return [Tinta(**tinta) for tinta in json.load(f)]
+
+
+def url_pagina(url, pagina):
+    return f"{url}{'&' if '?' in url else '?'}pagina={pagina}"
+
+
+class CoadaLucru:
+    #  Coada de pagini într-o bază SQLite locală, comună tuturor proceselor: o rulare întreruptă este reluată
+    #  din starea salvată. Prima pagină a fiecărei ținte adaugă în coadă restul paginilor ei, deci o țintă
+    #  eșuată nu blochează celelalte ținte. Tabelul Limitari ține pauzele hosturilor care au răspuns 429/503,
+    #  respectate de toate procesele (Intrerupator).
+    def __init__(self, cale=FISIER_COADA):
+        #  Fără tranzacții implicite: preluarea paginilor folosește BEGIN IMMEDIATE explicit
+        self.sqlconnection = sqlite3.connect(cale, timeout=60, isolation_level=None)
+        self.sqlconnection.execute("PRAGMA journal_mode=WAL;")
+        self.sqlconnection.execute("CREATE TABLE IF NOT EXISTS Tinte (Tinta TEXT PRIMARY KEY,"
+                                   " Categorie TEXT NOT NULL,"
+                                   " Judet TEXT NOT NULL,"
+                                   " Url TEXT NOT NULL,"
+                                   " DataRulare TEXT NOT NULL,"
+                                   " IncarcareInceputa INTEGER NOT NULL DEFAULT 0);")
+        self.sqlconnection.execute("CREATE TABLE IF NOT EXISTS Lucrari (Url TEXT PRIMARY KEY,"
+                                   " Tinta TEXT NOT NULL,"
+                                   " Pagina INTEGER NOT NULL,"
+                                   f" Stare TEXT NOT NULL DEFAULT '{ASTEPTARE}',"
+                                   " Incercari INTEGER NOT NULL DEFAULT 0,"
+                                   " Eroare TEXT,"
+                                   " Anunturi TEXT,"
+                                   " Preluat REAL);")
+        if "Preluat" not in [rand[1] for rand in self.sqlconnection.execute("PRAGMA table_info(Lucrari);")]:
+            self.sqlconnection.execute("ALTER TABLE Lucrari ADD COLUMN Preluat REAL;")  # cozi create anterior
+        self.sqlconnection.execute("CREATE INDEX IF NOT EXISTS ix_lucrari_stare ON Lucrari (Stare, Pagina);")
+        self.sqlconnection.execute("CREATE TABLE IF NOT EXISTS Limitari (Host TEXT PRIMARY KEY,"
+                                   " DeschisPanaLa REAL NOT NULL);")
+
+    def porneste(self, tinte, data_rulare):
+        #  Data rulării neterminate (reluare), sau o rulare nouă cu prima pagină a fiecărei ținte
+        rand = self.sqlconnection.execute("SELECT t.DataRulare FROM Tinte t JOIN Lucrari l ON l.Tinta = t.Tinta "
+                                          f"WHERE l.Stare IN ('{ASTEPTARE}', '{LUCRU}', '{GATA}') LIMIT 1;").fetchone()
+        if rand is not None:
+            #  Paginile preluate de procesele unei rulări oprite brusc sunt repuse în coadă
+            self.sqlconnection.execute(f"UPDATE Lucrari SET Stare = '{ASTEPTARE}' WHERE Stare = '{LUCRU}';")
+            return date.fromisoformat(rand[0])
+        with self.sqlconnection:
+            self.sqlconnection.execute("BEGIN;")
+            self.sqlconnection.execute("DELETE FROM Lucrari;")
+            self.sqlconnection.execute("DELETE FROM Tinte;")
+            self.sqlconnection.execute("DELETE FROM Limitari;")
+            self.sqlconnection.executemany("INSERT INTO Tinte (Tinta, Categorie, Judet, Url, DataRulare) "
+                                           "VALUES (?, ?, ?, ?, ?);",
+                                           [(t.cheie, t.categorie, t.judet, t.url, data_rulare.isoformat())
+                                            for t in tinte])
+            self.sqlconnection.executemany("INSERT INTO Lucrari (Url, Tinta, Pagina) VALUES (?, ?, 1);",
+                                           [(url_pagina(t.url, 1), t.cheie) for t in tinte])
+        return data_rulare
+
+    def tinte(self):
+        cursor = self.sqlconnection.execute("SELECT Categorie, Judet, Url FROM Tinte ORDER BY rowid;")
+        return [Tinta(*rand) for rand in cursor]
+
+    def ia(self, numar):
+        #  Preia atomic cel mult `numar` pagini; ordonarea după număr de pagină alternează între ținte. Paginile
+        #  preluate de mai mult de TIMEOUT_LUCRU secunde sunt repuse întâi în coadă.
+        self.sqlconnection.execute("BEGIN IMMEDIATE;")
+        try:
+            acum = time.time()
+            self.sqlconnection.execute(f"UPDATE Lucrari SET Stare = '{ASTEPTARE}' WHERE Stare = '{LUCRU}' "
+                                       "AND Preluat < ?;", (acum - TIMEOUT_LUCRU,))
+            lucrari = [Lucrare(*rand) for rand in self.sqlconnection.execute(
+                f"SELECT Url, Tinta, Pagina FROM Lucrari WHERE Stare = '{ASTEPTARE}' ORDER BY Pagina, rowid LIMIT ?;",
+                (numar,))]
+            self.sqlconnection.executemany(f"UPDATE Lucrari SET Stare = '{LUCRU}', Preluat = ? WHERE Url = ?;",
+                                           [(acum, lucrare.url) for lucrare in lucrari])
+        except BaseException:
+            self.sqlconnection.execute("ROLLBACK;")
+            raise
+        self.sqlconnection.execute("COMMIT;")
+        return lucrari
+
+    def ramase(self):
+        #  Pagini încă de descărcat sau în lucru la alte procese (care pot adăuga pagini noi)
+        return self.sqlconnection.execute(f"SELECT COUNT(*) FROM Lucrari WHERE Stare IN ('{ASTEPTARE}', '{LUCRU}');"
+                                          ).fetchone()[0]
+
+    def termina(self, lucrare, anunturi, pagini_noi=()):
+        with self.sqlconnection:
+            self.sqlconnection.execute("BEGIN;")
+            self.sqlconnection.execute(f"UPDATE Lucrari SET Stare = '{GATA}', Anunturi = ?, Eroare = NULL "
+                                       "WHERE Url = ?;", (json.dumps(anunturi), lucrare.url))
+            self.sqlconnection.executemany("INSERT OR IGNORE INTO Lucrari (Url, Tinta, Pagina) VALUES (?, ?, ?);",
+                                           [(url, lucrare.tinta, pagina) for pagina, url in pagini_noi])
+
+    def esec(self, lucrare, eroare):
+        self.sqlconnection.execute("UPDATE Lucrari SET Incercari = Incercari + 1, Eroare = ?, "
+                                   f"Stare = CASE WHEN Incercari + 1 >= ? THEN '{ESUAT}' ELSE '{ASTEPTARE}' END "
+                                   "WHERE Url = ?;", (eroare, INCERCARI_COADA, lucrare.url))
+
+    def elibereaza(self, lucrari):
+        self.sqlconnection.executemany(f"UPDATE Lucrari SET Stare = '{ASTEPTARE}' WHERE Url = ?;",
+                                       [(lucrare.url,) for lucrare in lucrari])
+
+    def pauza_host(self, host):
+        rand = self.sqlconnection.execute("SELECT DeschisPanaLa FROM Limitari WHERE Host = ?;", (host,)).fetchone()
+        return 0 if rand is None else rand[0]
+
+    def prelungeste_pauza(self, host, pana_la):
+        self.sqlconnection.execute("INSERT INTO Limitari (Host, DeschisPanaLa) VALUES (?, ?) ON CONFLICT(Host) "
+                                   "DO UPDATE SET DeschisPanaLa = MAX(DeschisPanaLa, excluded.DeschisPanaLa);",
+                                   (host, pana_la))
+
+    def incepe_incarcarea(self):
+        #  Adevărat dacă încărcarea acestei rulări a mai fost pornită (și întreruptă) înainte
+        inceputa = self.sqlconnection.execute("SELECT MAX(IncarcareInceputa) FROM Tinte;").fetchone()[0]
+        self.sqlconnection.execute("UPDATE Tinte SET IncarcareInceputa = 1;")
+        return bool(inceputa)
+
+    def pagini_gata(self, tinta):
+        #  (url, [Anunt, ...]) pentru paginile descărcate și parsate ale țintei, în ordinea paginilor
+        cursor = self.sqlconnection.execute(f"SELECT Url, Anunturi FROM Lucrari WHERE Tinta = ? AND Stare = '{GATA}' "
+                                            "ORDER BY Pagina;", (tinta,))
+        for url, anunturi in cursor:
+            yield url, [Anunt(*anunt) for anunt in json.loads(anunturi)]
+
+    def marcheaza_incarcate(self, tinta):
+        self.sqlconnection.execute(f"UPDATE Lucrari SET Stare = '{INCARCAT}' WHERE Tinta = ? AND Stare = '{GATA}';",
+                                   (tinta,))
+
+    def sumar(self):
+        #  {tinta: {stare: numar de pagini}}
+        sumar = {}
+        for tinta, stare, numar in self.sqlconnection.execute("SELECT Tinta, Stare, COUNT(*) FROM Lucrari "
+                                                              "GROUP BY Tinta, Stare;"):
+            sumar.setdefault(tinta, {})[stare] = numar
+        return sumar
+
+    def inchide(self):
+        self.sqlconnection.close()
+
+
+def pagini_tinta(lucrare, html):
+    #  Prima pagină a unei ținte dă numărul total de anunțuri, deci și paginile 2..N
+    nr_pagini = math.ceil(numar_anunturi(html) / ANUNTURI_PE_PAGINA)
+    url = lucrare.url.rsplit("pagina=", 1)[0].rstrip("?&")
+    return [(pagina, url_pagina(url, pagina)) for pagina in range(2, nr_pagini + 1)]
+
+
+def lucreaza(cale=FISIER_COADA, procese=1, data_rulare=None):
+    #  Procesul de lucru: preia loturi de pagini din coadă, le descarcă concurent, le parsează și salvează
+    #  anunțurile în coadă. O eroare afectează doar pagina care a produs-o, restul lotului revine în coadă.
+    #  Returnează numărul de pagini procesate și metricile procesului (Metrici), adunate de procesul principal.
+    #  Cele `procese` procese de lucru descarcă de pe același host, deci își împart rata și concurența
+    #  din Scraper_Fetch; sesiunea, limitatorul și întrerupătorul sunt păstrate între loturi, iar pauzele după
+    #  un 429/503 sunt împărțite prin coadă. Paginile sunt salvate în cache sub data_rulare (a rulării reluate).
+    METRICI.reseteaza()  # un proces din Pool poate primi mai multe apeluri
+    coada = CoadaLucru(cale)
+    descarcator = Descarcator(concurenta=max(1, CONCURENTA // procese),
+                              pagini_pe_secunda=PAGINI_PE_SECUNDA / procese, cache=CacheHttp(), comun=coada,
+                              data=data_rulare)
+    procesate = 0
+    while True:
+        lucrari = coada.ia(LOT_LUCRU)
+        if not lucrari:
+            if not coada.ramase():
+                break
+            time.sleep(1)  # alte procese mai pot adăuga pagini
+            continue
+        terminate = 0
+        try:
+            for _, html in descarcator.pagini([lucrare.url for lucrare in lucrari]):
+                lucrare = lucrari[terminate]
+                anunturi = parseaza_pagina(html)
+                coada.termina(lucrare, anunturi, pagini_tinta(lucrare, html) if lucrare.pagina == 1 else ())
+                terminate += 1
+        except Exception as e:
+            #  Paginile sunt predate în ordine, deci eroarea aparține primei pagini neterminate din lot
+            coada.esec(lucrari[terminate], f"{type(e).__name__}: {e}")
+            coada.elibereaza(lucrari[terminate + 1:])
+        procesate += terminate
+    descarcator.inchide()
+    coada.inchide()
+    return procesate, METRICI.stare()
@@ -0,0 +1,163 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from Scraper_Parser import Anunt, parseaza_pagina
+
+CAPACITATE_INITIALA = 1024
+
+
+class Dictionar:
+    #  Internarea valorilor repetate (locații, valute): fiecare text distinct este păstrat o singură dată,
+    #  iar anunțurile rețin doar codul lui; -1 înseamnă lipsă
+    def __init__(self):
+        self.coduri = {}
+        self.valori = []
+
+    def cod(self, valoare):
+        if valoare is None:
+            return -1
+        cod = self.coduri.get(valoare)
+        if cod is None:
+            cod = self.coduri[valoare] = len(self.valori)
+            self.valori.append(valoare)
+        return cod
+
+
+class AnunturiColoane:
+    #  Anunțurile ținute pe coloane tipizate, în locul unei liste de tupluri Anunt cu valori "boxed":
+    #  prețul și numărul de camere ca int64 cu o mască de valori lipsă alături, suprafața ca float64 (NaN),
+    #  locația și valuta ca coduri într-un dicționar comun. Adăugarea dublează capacitatea la nevoie,
+    #  iar feliile și cadrul pandas folosesc aceleași tablouri, fără copiere.
+    def __init__(self, capacitate=CAPACITATE_INITIALA, locatii=None, valute=None):
+        self.n = 0
+        self.locatii = locatii or Dictionar()
+        self.valute = valute or Dictionar()
+        self.id_anunt = np.empty(capacitate, dtype=object)
+        self.titlu = np.empty(capacitate, dtype=object)
+        self.locatie = np.empty(capacitate, dtype=np.int32)
+        self.valuta = np.empty(capacitate, dtype=np.int8)
+        self.pret = np.zeros(capacitate, dtype=np.int64)
+        self.pret_lipsa = np.ones(capacitate, dtype=bool)
+        self.nr_camere = np.zeros(capacitate, dtype=np.int64)
+        self.nr_camere_lipsa = np.ones(capacitate, dtype=bool)
+        self.metri_patrati = np.full(capacitate, np.nan)
+
+    COLOANE = ("id_anunt", "titlu", "locatie", "valuta", "pret", "pret_lipsa", "nr_camere", "nr_camere_lipsa",
+               "metri_patrati")
+
+    @classmethod
+    def din_anunturi(cls, anunturi):
+        coloane = cls(max(len(anunturi), 1))
+        coloane.extinde(anunturi)
+        return coloane
+
+    def __len__(self):
+        return self.n
+
+    def _mareste(self):
+        for nume in self.COLOANE:
+            vechi = getattr(self, nume)
+            nou = np.empty(2 * len(vechi), dtype=vechi.dtype)
+            nou[:self.n] = vechi[:self.n]
+            setattr(self, nume, nou)
+
+    def adauga(self, anunt):
+        if self.n == len(self.pret):
+            self._mareste()
+        i = self.n
+        self.id_anunt[i] = anunt.id_anunt
+        self.titlu[i] = anunt.titlu
+        self.locatie[i] = self.locatii.cod(anunt.locatie)
+        self.valuta[i] = self.valute.cod(anunt.valuta)
+        self.pret_lipsa[i] = anunt.pret is None
+        self.pret[i] = 0 if anunt.pret is None else anunt.pret
+        self.nr_camere_lipsa[i] = anunt.nr_camere is None
+        self.nr_camere[i] = 0 if anunt.nr_camere is None else anunt.nr_camere
+        self.metri_patrati[i] = np.nan if anunt.metri_patrati is None else anunt.metri_patrati
+        self.n += 1
+
+    def extinde(self, anunturi):
+        for anunt in anunturi:
+            self.adauga(anunt)
+
+    def __getitem__(self, felie):
+        #  O felie (start:stop) împarte tablourile și dicționarele cu originalul
+        if not isinstance(felie, slice) or felie.step not in (None, 1):
+            raise TypeError("AnunturiColoane acceptă doar felii continue (start:stop)")
+        start, stop, _ = felie.indices(self.n)
+        parte = AnunturiColoane.__new__(AnunturiColoane)
+        parte.n = max(stop - start, 0)
+        parte.locatii = self.locatii
+        parte.valute = self.valute
+        for nume in self.COLOANE:
+            setattr(parte, nume, getattr(self, nume)[start:max(stop, start)])
+        return parte
+
+    def anunt(self, i):
+        #  Înregistrarea i, ca tuplul Anunt produs de parser
+        return Anunt(self.id_anunt[i], self.titlu[i],
+                     self.locatii.valori[self.locatie[i]] if self.locatie[i] >= 0 else None,
+                     None if self.pret_lipsa[i] else int(self.pret[i]),
+                     self.valute.valori[self.valuta[i]] if self.valuta[i] >= 0 else None,
+                     None if self.nr_camere_lipsa[i] else int(self.nr_camere[i]),
+                     None if np.isnan(self.metri_patrati[i]) else float(self.metri_patrati[i]))
+
+    def cadru(self):
+        #  DataFrame cu aceleași coloane și tipuri ca Scraper_Transform.cadru_anunturi; coloanele cu valori lipsă
+        #  și cele codificate (Categorical) sunt construite direct peste tablourile existente
+        n = self.n
+        return pd.DataFrame({
+            "id_anunt": self.id_anunt[:n],
+            "titlu": self.titlu[:n],
+            "locatie": pd.Categorical.from_codes(self.locatie[:n], categories=pd.Index(self.locatii.valori,
+                                                                                      dtype=object)),
+            "pret": pd.arrays.IntegerArray(self.pret[:n], self.pret_lipsa[:n]),
+            "valuta": pd.Categorical.from_codes(self.valuta[:n], categories=pd.Index(self.valute.valori,
+                                                                                    dtype=object)),
+            "nr_camere": pd.arrays.IntegerArray(self.nr_camere[:n], self.nr_camere_lipsa[:n]),
+            "metri_patrati": self.metri_patrati[:n],
+        }, copy=False)
+
+    def memorie(self):
+        #  Octeții ocupați de primele n anunțuri: tablourile, textele referite și dicționarele
+        numerice = sum(getattr(self, nume)[:self.n].nbytes for nume in self.COLOANE)
+        texte = sum(sys.getsizeof(valoare) for coloana in (self.id_anunt, self.titlu)
+                    for valoare in coloana[:self.n] if valoare is not None)
+        dictionare = sum(sys.getsizeof(valoare) for dictionar in (self.locatii, self.valute)
+                         for valoare in dictionar.valori)
+        return numerice + texte + dictionare
+
+
+def memorie_lista(anunturi):
+    #  Octeții ocupați de o listă de tupluri Anunt, cu toate obiectele referite (cele comune numărate o dată)
+    vazute = set()
+    total = sys.getsizeof(anunturi)
+    for anunt in anunturi:
+        for obiect in (anunt, *anunt):
+            if obiect is not None and id(obiect) not in vazute:
+                vazute.add(id(obiect))
+                total += sys.getsizeof(obiect)
+    return total
+
+
+def compara_memorie(pagini_salvate, repetari=1000):
+    anunturi = [anunt for _ in range(repetari) for html in pagini_salvate for anunt in parseaza_pagina(html)]
+    #  Fiecare repetare a unei pagini primește obiecte proprii, ca anunțurile parsate din pagini diferite
+    anunturi = [Anunt(*(valoare if not isinstance(valoare, str) else "".join(list(valoare)) for valoare in anunt))
+                for anunt in anunturi]
+    coloane = AnunturiColoane.din_anunturi(anunturi)
+    lista = memorie_lista(anunturi)
+    compact = coloane.memorie()
+    print(f"{len(anunturi)} anunturi: lista de tupluri {lista / len(anunturi):.0f} B/anunt, "
+          f"coloane {compact / len(anunturi):.0f} B/anunt ({compact / lista:.0%})")
+
+
+if __name__ == "__main__":
+    #  python Scraper_Store.py pagina1.html pagina2.html ...
+    pagini_salvate = []
+    for cale in sys.argv[1:]:
+        with open(cale, encoding="utf-8") as f:
+            pagini_salvate.append(f.read())
+    compara_memorie(pagini_salvate)
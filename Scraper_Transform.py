@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from Metrici import METRICI
+from Scraper_Store import AnunturiColoane
+
+TVA = 0.19
+PRET_MP_MINIM = 500  # valorile pret/metru pătrat din afara intervalului sunt considerate declarate eronat
+PRET_MP_MAXIM = 5000
+
+#  Aceleași înlocuiri ca lanțul de .replace folosit inițial, aplicate într-o singură trecere prin text
+TABEL_DIACRITICE = str.maketrans({"ş": "s", "Ş": "S", "â": "a", "ţ": "t", "Î": "I", "ă": "a"})
+
+
+def normalizeaza_locatii(locatii):
+    return locatii.str.translate(TABEL_DIACRITICE)
+
+
+def cadru_anunturi(anunturi):
+    #  Lista de înregistrări Anunt -> DataFrame cu tipuri numerice (lipsurile devin NA / NaN); anunțurile ținute
+    #  deja pe coloane (Scraper_Store) sunt predate direct, fără conversie pe înregistrare
+    if isinstance(anunturi, AnunturiColoane):
+        return anunturi.cadru()
+    df = pd.DataFrame.from_records(anunturi, columns=["id_anunt", "titlu", "locatie", "pret", "valuta",
+                                                      "nr_camere", "metri_patrati"])
+    df["pret"] = df["pret"].astype("Int64")
+    df["nr_camere"] = df["nr_camere"].astype("Int64")
+    df["metri_patrati"] = df["metri_patrati"].astype("float64")
+    return df
+
+
+def transforma(df):
+    #  Etapa coloanară: TVA, pret/metru pătrat filtrat la (500, 5000) și normalizarea locațiilor, fără bucle
+    #  Python pe anunț. Rezultatele sunt aceleași cu ale buclei inițiale (inclusiv rotunjirea "round half to even").
+    df["locatie"] = normalizeaza_locatii(df["locatie"])
+    pret = df["pret"].astype("float64")
+    df["pret_final"] = pret.where(df["valuta"] != "EUR + TVA", pret + pret * TVA)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pret_mp = np.round(df["pret_final"] / df["metri_patrati"])
+    in_interval = (pret_mp > PRET_MP_MINIM) & (pret_mp < PRET_MP_MAXIM)
+    METRICI.respinge("pret_mp_in_afara_intervalului", int((pret_mp.notna() & ~in_interval).sum()))
+    df["pret_mp"] = pret_mp.where(in_interval).astype("Int64")
+    return df
+
+
+def in_randuri(df, coloane):
+    #  DataFrame -> tupluri cu tipuri Python și None în locul valorilor lipsă, gata pentru driverul bazei de date
+    subset = df[list(coloane)].astype(object)
+    return subset.where(subset.notna(), None).itertuples(index=False, name=None)
@@ -0,0 +1,85 @@
+import difflib
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+from SQL_Schema import zone_harta
+
+#  Denumiri folosite în anunțuri pentru zonele de pe hartă, altele decât numele din map.geojson
+ALIASURI = {
+    "cetate": "Timisoara, zona Cetatii",
+    "centru": "Timisoara, zona Cetatii",
+    "ultracentral": "Timisoara, zona Cetatii",
+    "complexul studentesc": "Timisoara, zona Complex Studentesc",
+    "studentesc": "Timisoara, zona Complex Studentesc",
+    "fabricii": "Timisoara, zona Fabric",
+    "calea aradului": "Timisoara, zona Aradului",
+    "calea lipovei": "Timisoara, zona Lipovei",
+    "calea torontalului": "Timisoara, zona Torontalului",
+    "piata dorobantilor": "Timisoara, zona Dorobantilor",
+}
+PRAG_SIMILARITATE = 0.85  # sub acest scor difflib, locația rămâne în afara hărții
+CUVINTE_IGNORATE = {"timisoara", "zona", "cartier", "cartierul", "jud", "judetul", "timis"}
+ORAS_HARTA = "timisoara"
+
+
+def _cuvinte(text):
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def normalizeaza(text):
+    #  "Timişoara, Zona Cetăţii" -> "cetatii": fără diacritice, litere mici, fără oraș și cuvinte de legătură
+    return " ".join(cuvant for cuvant in _cuvinte(text) if cuvant not in CUVINTE_IGNORATE)
+
+
+def in_orasul_hartii(locatie):
+    #  Locația fără oraș ("zona Cetatii") sau cu Timișoara printre părțile despărțite prin virgulă; celelalte
+    #  localități din județ ("Lugoj, zona Centru", "Dumbravita") au aceleași nume de cartiere, dar nu sunt pe hartă
+    parti = locatie.split(",")
+    return len(parti) == 1 or any(_cuvinte(parte) == [ORAS_HARTA] for parte in parti)
+
+
+class RezolvitorZone:
+    #  Locația din anunț -> ZonaID al poligonului din map.geojson (sau None), calculat o singură dată pentru
+    #  fiecare text distinct: potrivire exactă pe forma normalizată, apoi pe părțile despărțite prin virgulă,
+    #  apoi pe cuvinte ("Iosefin-Bega") și în final cea mai apropiată denumire cunoscută (difflib). Locațiile din
+    #  alte localități decât Timișoara rămân în afara hărții (None).
+    def __init__(self, fname="map.geojson", aliasuri=ALIASURI, prag=PRAG_SIMILARITATE):
+        zone = zone_harta(fname)
+        id_dupa_nume = {nume: zona_id for zona_id, nume in zone}
+        self.index = {normalizeaza(nume): zona_id for zona_id, nume in zone}
+        for alias, nume in aliasuri.items():
+            if nume in id_dupa_nume:
+                self.index.setdefault(normalizeaza(alias), id_dupa_nume[nume])
+        self.chei = list(self.index)
+        self.prag = prag
+        self.rezolva = lru_cache(maxsize=None)(self._rezolva)
+
+    def _rezolva(self, locatie):
+        if locatie is None or not in_orasul_hartii(locatie):
+            return None
+        cheie = normalizeaza(locatie)
+        if cheie in self.index:
+            return self.index[cheie]
+        for parte in locatie.split(","):
+            parte = normalizeaza(parte)
+            if parte in self.index:
+                return self.index[parte]
+        for cuvant in cheie.split():
+            if cuvant in self.index:
+                return self.index[cuvant]
+        potriviri = difflib.get_close_matches(cheie, self.chei, n=1, cutoff=self.prag)
+        return self.index[potriviri[0]] if potriviri else None
+
+    def __call__(self, locatii):
+        return [self.rezolva(locatie) for locatie in locatii]
+
+
+if __name__ == "__main__":
+    #  python Scraper_Zone.py "Timisoara, zona Cetatii" ... -> zona găsită pentru fiecare text
+    rezolvitor = RezolvitorZone()
+    for locatie in sys.argv[1:]:
+        print(f"{locatie!r} -> {rezolvitor.rezolva(locatie)}")
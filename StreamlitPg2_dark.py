@@ -1,10 +1,16 @@
-import pandas as pd
 import streamlit as st
 from streamlit_folium import folium_static
 import folium
-import geopandas as gpd
 import plotly.express as px
 from st_aggrid import AgGrid
+from Dashboard_Cache import date_dashboard, tendinte_dashboard
+from Dashboard_Grafice import grafic
+from Dashboard_Harta import harta_zone
+from Dashboard_Precompute import METRICI
+from Metrici import Metrici, ultima_rulare
+
+#  Timpii secțiunilor din rularea curentă a scriptului: fiecare interacțiune îl reexecută de la început
+metrici = Metrici()
 
 st.set_page_config(layout="wide")
 
@@ -35,9 +41,6 @@ def set_bg():
 
 set_bg()
 
-fname = 'map.geojson'
-nil = gpd.read_file(fname)
-
 m = folium.Map(location=[45.758, 21.227], zoom_start=12, tiles="CartoDB dark_matter",
                name='Statistici imobiliare Timișoara',
                attr="My Data attribution")
@@ -51,7 +54,15 @@ with col1:
                                 help='Alegerea selectată reprezintă numărul de '
                                      'camere  dorit')
 
-    choice1 = ['PretMediu', 'PretMinim', 'PretMaxim', 'PretMediu_MetruPatrat', 'NumarAnunturi', 'MetriPartrati_InMedie']
+    #  Îmbinarea geometrie + statistici și limitele claselor de culoare sunt precalculate la export
+    #  (Dashboard_Precompute) și păstrate în cache-ul comun tuturor sesiunilor (Dashboard_Cache)
+    camere = choice2.index(choice_selected2) + 1
+    with metrici.etapa('Date'):
+        df_final, intervale, geometrie_harta = date_dashboard(camere)
+
+    #  Mediile sunt trunchiate, iar minimul și maximul ignoră anunțurile aberante (vezi SQL_Stats). Sunt oferite
+    #  doar metricile prezente în date: exporturile CSV mai vechi (sql_query_<n>cam.csv) nu au medianele.
+    choice1 = [metrica for metrica in METRICI if metrica in df_final]
 
     choice_selected1 = st.radio("Alegeți o opțiune pentru reprezentare. "
                                 " Preturile exprimate sunt in euro cu TVA.", choice1,
@@ -65,24 +76,11 @@ with col1:
 
     color = st.color_picker(' ', '#3FCCE6')
 
-fname = 'map.geojson'
-nil = gpd.read_file(fname)
-nil = nil[['geometry', 'text']]
-cam1 = pd.read_csv('sql_query_1cam.csv')
-cam2 = pd.read_csv('sql_query_2cam.csv')
-cam3 = pd.read_csv('sql_query_3cam.csv')
-cam4 = pd.read_csv('sql_query_4cam.csv')
-
-if choice_selected2 == '1 Cameră':
-    df_final = nil.merge(cam1, left_on="text", right_on="ZonăApartament", how="inner")
-if choice_selected2 == '2 Camere':
-    df_final = nil.merge(cam2, left_on="text", right_on="ZonăApartament", how="inner")
-if choice_selected2 == '3 Camere':
-    df_final = nil.merge(cam3, left_on="text", right_on="ZonăApartament", how="inner")
-if choice_selected2 == '4 Camere':
-    df_final = nil.merge(cam4, left_on="text", right_on="ZonăApartament", how="inner")
+    #  Harta rapidă (Dashboard_Harta) primește geometria o singură dată, apoi doar valorile și culoarea;
+    #  harta folium este reconstruită și retrimisă complet la fiecare schimbare
+    harta_rapida = st.checkbox('Hartă rapidă', value=True)
 
-with col1:
+with col1, metrici.etapa('Tabel'):
     grid_response = AgGrid(
         df_final[['ZonăApartament', choice_selected1]],
         data_return_mode='AS_INPUT',
@@ -111,131 +109,92 @@ with col1:
 
             """
     st.markdown(Link_Figma, unsafe_allow_html=True)
-    choropleth1 = folium.Choropleth(
-    geo_data='map.geojson',
-    data=df_final,
-    columns=['ZonăApartament', choice_selected1],
-    key_on='feature.properties.text',
-    fill_color='Greys',
-    nan_fill_color="black",
-    line_color='White',
-    fill_opacity=0.7,
-    line_opacity=0.2
-
-).geojson.add_to(m)
-
-style_function = lambda x: {'fillColor': color,
-                            'color': '#ffffff',
-                            'fillOpacity': 0.5,
-                            'weight': 0.8}
-highlight_function = lambda x: {'fillColor': color,
-                                'color': '#ffffff',
-                                'fillOpacity': 0.85,
-                                'weight': 0.1}
-
-NIL = folium.features.GeoJson(
-    df_final,
-    style_function=style_function,
-    control=False,
-    highlight_function=highlight_function,
-    tooltip=folium.features.GeoJsonTooltip(
-        fields=['ZonăApartament', choice_selected1],
-        aliases=['Nume Regiune: ', choice_selected1],
-        style=("background-color: white; color: #333333; font-family: arial; font-size: 13.5px; padding: 10px;")
-    )
-)
-m.add_child(NIL)
-m.keep_in_front(NIL)
-folium.LayerControl().add_to(m)
-
-with col3:
-    folium_static(m, width=500, height=400)
-
-if choice_selected2 == '1 Cameră' or choice_selected2 == '2 Camere':
-    fig = px.scatter_3d(
-        df_final,
-        x=choice_selected1,
-        y="ZonăApartament",
-        z=choice_selected1,
-        hover_name="ZonăApartament",
-        size=choice_selected1,
-        size_max=40,
-        color=[color, color, color, color, color, color, color, color, color, color, color],
-        color_discrete_map="identity",
-        template="plotly_dark")
-
-else:
-    fig = px.scatter_3d(
-        df_final,
-        x=choice_selected1,
-        y="ZonăApartament",
-        z=choice_selected1,
-        hover_name="ZonăApartament",
-        size=choice_selected1,
-        size_max=40,
-        color=[color, color, color, color, color, color, color, color, color, color],
-        color_discrete_map="identity",
-        template="plotly_dark")
-
-fig.update_layout(
-
-    scene={
-        'camera_eye': {"x": 2, "y": 0.6, "z": 1},
-        "aspectratio": {"x": 1, "y": 1.5, "z": 0.75}
-
-    },
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    autosize=True,
-    margin=dict(l=0, r=0, t=0, b=0)
-)
-
-with col3:
-    st.plotly_chart(fig, use_container_width=True)
-
-if choice_selected2 == '1 Cameră' or choice_selected2 == '2 Camere':
-    fig2 = px.bar_polar(df_final, r=choice_selected1, theta="ZonăApartament",
-                        color=[color, color, color, color, color, color, color, color, color, color, color],
-                        color_discrete_map="identity",
-                        template="plotly_dark"
-                        )
-
-else:
-    fig2 = px.bar_polar(df_final, r=choice_selected1, theta="ZonăApartament",
-                        color=[color, color, color, color, color, color, color, color, color, color],
-                        color_discrete_map="identity",
-                        template="plotly_dark"
-                        )
-
-fig2.update_layout(
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    autosize=True,
-    margin=dict(l=55, r=55, t=55, b=55)
-)
-
-if choice_selected2 == '1 Cameră' or choice_selected2 == '2 Camere':
-
-    fig3 = px.bar(df_final, x="ZonăApartament", y=choice_selected1,
-                  color=[color, color, color, color, color, color, color, color, color, color, color],
-                  color_discrete_map="identity",
-                  template="plotly_dark")
-
-else:
-    fig3 = px.bar(df_final, x="ZonăApartament", y=choice_selected1,
-                  color=[color, color, color, color, color, color, color, color, color, color],
-                  color_discrete_map="identity",
-                  template="plotly_dark")
-
-fig3.update_layout(
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(0,0,0,0)',
-    autosize=True,
-    margin=dict(l=55, r=55, t=55, b=55)
-)
-
-with col2:
-    st.plotly_chart(fig3, use_container_width=True)
-
-with col2:
-    st.plotly_chart(fig2, use_container_width=True)
+
+with col3, metrici.etapa('Hartă'):
+    if harta_rapida:
+        harta_zone(df_final, choice_selected1, intervale, color, inaltime=400)
+    else:
+        choropleth1 = folium.Choropleth(
+            **geometrie_harta,
+            data=df_final,
+            columns=['ZonăApartament', choice_selected1],
+            key_on='feature.properties.text',
+            bins=intervale.get(choice_selected1, 6),
+            fill_color='Greys',
+            nan_fill_color="black",
+            line_color='White',
+            fill_opacity=0.7,
+            line_opacity=0.2
+
+        ).geojson.add_to(m)
+
+        style_function = lambda x: {'fillColor': color,
+                                    'color': '#ffffff',
+                                    'fillOpacity': 0.5,
+                                    'weight': 0.8}
+        highlight_function = lambda x: {'fillColor': color,
+                                        'color': '#ffffff',
+                                        'fillOpacity': 0.85,
+                                        'weight': 0.1}
+
+        NIL = folium.features.GeoJson(
+            df_final,
+            style_function=style_function,
+            control=False,
+            highlight_function=highlight_function,
+            tooltip=folium.features.GeoJsonTooltip(
+                fields=['ZonăApartament', choice_selected1],
+                aliases=['Nume Regiune: ', choice_selected1],
+                style=("background-color: white; color: #333333; font-family: arial; font-size: 13.5px; padding: 10px;")
+            )
+        )
+        m.add_child(NIL)
+        m.keep_in_front(NIL)
+        folium.LayerControl().add_to(m)
+
+        folium_static(m, width=500, height=400)
+
+#  Graficele pe zone vin din cache-ul de figuri (Dashboard_Grafice), indexat după camere, metrică, culoare și
+#  versiunea datelor; sunt construite doar la prima selecție a unei combinații
+with col3, metrici.etapa('Grafic scatter_3d'):
+    st.plotly_chart(grafic("scatter_3d", camere, choice_selected1, color), use_container_width=True)
+
+with col2, metrici.etapa('Grafic bar'):
+    st.plotly_chart(grafic("bar", camere, choice_selected1, color), use_container_width=True)
+
+with col2, metrici.etapa('Grafic bar_polar'):
+    st.plotly_chart(grafic("bar_polar", camere, choice_selected1, color), use_container_width=True)
+
+#  Evoluția pe săptămâni, citită din tabelul de tendințe (SQL_Trend), fără a parcurge istoricul anunțurilor
+with metrici.etapa('Tendințe'):
+    tendinte = tendinte_dashboard(camere)
+    metrici_tendinte = ['PretMediu', 'PretMedian', 'PretMediu_MetruPatrat', 'PretMedian_MetruPatrat', 'NumarAnunturi']
+    metrica_tendinte = choice_selected1 if choice_selected1 in metrici_tendinte else 'PretMedian_MetruPatrat'
+    if tendinte is not None and tendinte['Saptamana'].nunique() > 1:
+        fig4 = px.line(tendinte, x='Saptamana', y=metrica_tendinte, color='ZonăApartament', template="plotly_dark")
+        fig4.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            autosize=True,
+            margin=dict(l=55, r=55, t=55, b=55)
+        )
+        st.plotly_chart(fig4, use_container_width=True)
+
+#  Costul rulării curente pe secțiuni și, alături, metricile ultimelor rulări ale pipeline-ului (crawl, export),
+#  scrise de Metrici în metrici/
+with st.expander('Timpi de rulare'):
+    durata_totala = metrici.rezumat('dashboard')['durata_s']
+    st.table({'Secțiune': list(metrici.durate) + ['Total rulare'],
+              'ms': [f"{durata * 1000:.1f}" for durata in list(metrici.durate.values()) + [durata_totala]]})
+    rulari = [rulare for rulare in map(ultima_rulare, ('crawl', 'tinte', 'export')) if rulare is not None]
+    if rulari:
+        st.table({
+            'Proces': [rulare['proces'] for rulare in rulari],
+            'Început': [rulare['inceput'] for rulare in rulari],
+            'Durată (s)': [f"{rulare['durata_s']:.1f}" for rulare in rulari],
+            'Pagini/s': [f"{rulare['rate']['pagini_pe_s'] or 0:.2f}" for rulare in rulari],
+            'Parsare (ms/pagină)': [f"{rulare['rate']['parsare_ms_pe_pagina'] or 0:.1f}" for rulare in rulari],
+            'Rânduri/s': [f"{rulare['rate']['incarcare_randuri_pe_s'] or 0:.0f}" for rulare in rulari],
+            'Memorie maximă (MB)': [f"{(rulare['memorie_maxima_octeti'] or 0) / 2 ** 20:.0f}" for rulare in rulari],
+            'Valori respinse': [sum(rulare['respinse'].values()) for rulare in rulari],
+        })
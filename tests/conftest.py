@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import pytest
+from aiohttp import web
+
+#  Modulele proiectului sunt scripturi în rădăcina depozitului, care folosesc căi relative (map.geojson)
+RADACINA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RADACINA)
+#  O pagină de rezultate salvată de pe site, servită de serverul de test și citită de testele parserului
+PAGINA_SALVATA = os.path.join(RADACINA, "tests", "date", "pagina_rezultate.html")
+
+
+@pytest.fixture(autouse=True)
+def director_proiect(monkeypatch):
+    monkeypatch.chdir(RADACINA)
+
+
+#  Zona de pe hartă a anunțurilor de test, dacă nu este dată alta
+ZONA = "Timisoara, zona Complex Studentesc"
+
+
+def anunt(id_anunt, pret=80000, locatie=ZONA, camere=2, metri=55.0):
+    #  O înregistrare Anunt, ca la ieșirea parserului
+    from Scraper_Parser import Anunt
+    return Anunt(id_anunt, f"Apartament {camere} camere", locatie, pret, "EUR", camere, metri)
+
+
+def pagina_numerotata(html, numar):
+    #  Pagina salvată ca pagina `numar` a rezultatelor: id-urile anunțurilor sunt unice pe pagină
+    return html.replace('id="X7A1000', f'id="P{numar}-')
+
+
+class Server:
+    #  Serverul HTTP local al testelor de descărcare, într-un fir separat. /pagina/<n> servește pagina salvată,
+    #  cu întârzieri descrescătoare (paginile de la coada listei sunt gata primele); /limitat/<status>/<n>
+    #  răspunde cu status-ul dat primelor n cereri, apoi cu pagina salvată
+    def __init__(self):
+        with open(PAGINA_SALVATA, encoding="utf-8") as f:
+            self.html = f.read()
+        self.cereri = Counter()
+        self.momente = []
+        self.pornit = threading.Event()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self._ruleaza, daemon=True).start()
+        self.pornit.wait()
+
+    async def _pagina(self, cerere):
+        numar = int(cerere.match_info["numar"])
+        await asyncio.sleep(0.01 * (10 - numar % 10))
+        return web.Response(text=pagina_numerotata(self.html, numar), content_type="text/html")
+
+    async def _limitat(self, cerere):
+        cale = cerere.path
+        self.cereri[cale] += 1
+        self.momente.append(time.monotonic())
+        if self.cereri[cale] <= int(cerere.match_info["repetari"]):
+            return web.Response(status=int(cerere.match_info["status"]), headers={"Retry-After": "0"})
+        return web.Response(text=self.html, content_type="text/html")
+
+    def _ruleaza(self):
+        asyncio.set_event_loop(self.loop)
+        aplicatie = web.Application()
+        aplicatie.router.add_get("/pagina/{numar}", self._pagina)
+        aplicatie.router.add_get("/limitat/{status}/{repetari}", self._limitat)
+        self.runner = web.AppRunner(aplicatie)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.pornit.set()
+        self.loop.run_forever()
+
+    def url(self, cale):
+        return f"http://127.0.0.1:{self.port}{cale}"
+
+    def opreste(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.opreste()
+
+
+@pytest.fixture
+def backend(tmp_path):
+    #  O bază SQLite nouă pentru fiecare test, cu zonele hărții
+    from Scraper_Loader import BackendSQLite
+    backend = BackendSQLite(str(tmp_path / "imobiliare.sqlite"))
+    yield backend
+    backend.inchide()
+
+
+@pytest.fixture
+def incarca_anunturi(backend):
+    #  Încărcarea unor înregistrări Anunt ca în scripturile de colectare: transformare, zone, upsert, agregate
+    from Scraper_Loader import COLOANE_CADRU, cadru_lot, incarca
+    from Scraper_Parser import amprenta
+    from Scraper_Transform import in_randuri
+    from SQL_Schema import CATEGORIE_HARTA, JUDET_HARTA
+
+    def incarca_anunturi(anunturi, data_rulare, categorie=CATEGORIE_HARTA, judet=JUDET_HARTA, agregate=None):
+        anunturi = list(anunturi)
+        df = cadru_lot(anunturi, [amprenta(anunt) for anunt in anunturi], backend, data_rulare, categorie, judet)
+        return incarca(in_randuri(df, COLOANE_CADRU), backend, agregate=agregate)
+
+    return incarca_anunturi
@@ -0,0 +1,33 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from Benchmark_Date import anunturi_sintetice
+from SQL_Summary import AgregateZona
+
+
+def test_agregatele_incrementale_egale_cu_reconstructia(backend, incarca_anunturi):
+    #  Adăugări, actualizări (alt preț, altă zonă) și ștergeri ale anunțurilor expirate, ca într-un crawl cu
+    #  --expira, față de o reconstrucție din tabel
+    agregate = AgregateZona()
+    anunturi = list(anunturi_sintetice(600, seed=1))
+    incarca_anunturi(anunturi[:400], date(2024, 3, 1), agregate=agregate)
+    modificate = [anunt._replace(pret=anunt.pret and anunt.pret + 5000) for anunt in anunturi[100:200]]
+    mutate = [anunt._replace(locatie="Timisoara, zona Lipovei", nr_camere=3) for anunt in anunturi[200:250]]
+    incarca_anunturi(modificate + mutate + anunturi[400:], date(2024, 3, 8), agregate=agregate)
+    for rand in backend.sterge_expirate("2024-03-05", "2024-03-08"):
+        agregate.scade(*rand)
+
+    reconstruite = AgregateZona.reconstruieste(backend.engine)
+    assert set(agregate.grupuri) == set(reconstruite.grupuri)
+    pd.testing.assert_frame_equal(agregate.statistici(), reconstruite.statistici())
+
+
+def test_suprafata_rotunjita_ca_in_baza_de_date():
+    #  Anunțul este scăzut cu valoarea citită din MySQL (decimal(6,2)), nu cu cea de la parsare
+    agregate = AgregateZona()
+    agregate.adauga(5, 2, 80000, 54.567, 1466)
+    agregate.adauga(5, 2, 60000, 40.0, 1500)
+    agregate.scade(5, 2, 80000, 54.57, 1466)
+    assert agregate.grupuri[(5, 2)].suma_metri == pytest.approx(40.0, abs=1e-9)
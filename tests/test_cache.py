@@ -0,0 +1,24 @@
+from datetime import date
+
+from Metrici import METRICI
+from Scraper_Cache import CacheHttp, itereaza_din_cache
+from Scraper_Fetch import itereaza_pagini
+from Scraper_Parser import parseaza_pagina
+
+
+def test_paginile_sunt_salvate_sub_data_rularii(server, tmp_path):
+    #  O rulare reluată după miezul nopții citește și salvează paginile sub data ei, nu sub data de azi
+    cache = CacheHttp(str(tmp_path / "cache"))
+    data_rulare = date(2024, 3, 1)
+    urls = [server.url(f"/pagina/{numar}") for numar in range(3)]
+    list(itereaza_pagini(urls, pagini_pe_secunda=None, cache=cache, data=data_rulare))
+    assert cache.citeste(urls[0]) is None
+    assert cache.ultima_data(urls[0]) == data_rulare
+
+    METRICI.reseteaza()
+    list(itereaza_pagini(urls, pagini_pe_secunda=None, cache=cache, data=data_rulare))
+    assert METRICI.contoare["pagini_din_cache"] == 3
+
+    pagini = list(itereaza_din_cache(urls, cache, data_rulare))  # --replay
+    assert [url for url, _ in pagini] == urls
+    assert [anunt.id_anunt for anunt in parseaza_pagina(pagini[2][1])] == ["P2-1", "P2-2", "P2-3"]
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from datetime import date
+
+import Scraper_Queue
+from Scraper_Fetch import Descarcator, Intrerupator
+from Scraper_Parser import parseaza_pagina
+from Scraper_Queue import ASTEPTARE, CoadaLucru, Tinta
+from tests.conftest import ZONA, anunt
+
+TINTE = [Tinta("vanzare-apartamente", "timis", "https://www.imobiliare.ro/vanzare-apartamente/timis"),
+         Tinta("inchiriere-apartamente", "arad", "https://www.imobiliare.ro/inchiriere-apartamente/arad")]
+
+
+def test_pagina_abandonata_revine_in_coada(tmp_path, monkeypatch):
+    #  Pagina unui proces oprit brusc rămâne în lucru: revine în coadă după TIMEOUT_LUCRU, sau la reluarea rulării
+    cale = str(tmp_path / "coada.sqlite")
+    coada, alt_proces = CoadaLucru(cale), CoadaLucru(cale)
+    assert coada.porneste(TINTE, date(2024, 3, 1)) == date(2024, 3, 1)
+    abandonate = coada.ia(1)
+    [lucrare] = alt_proces.ia(8)
+    alt_proces.termina(lucrare, [anunt("a1")])
+    assert alt_proces.ia(8) == [] and alt_proces.ramase() == 1
+    monkeypatch.setattr(Scraper_Queue, "TIMEOUT_LUCRU", -1)
+    assert alt_proces.ia(8) == abandonate
+    assert alt_proces.ramase() == 1
+    alt_proces.inchide()
+    coada.inchide()
+
+    coada = CoadaLucru(cale)  # rulare reluată: pagina rămasă în lucru este repusă în coadă
+    assert coada.porneste(TINTE, date(2024, 3, 2)) == date(2024, 3, 1)
+    assert coada.sumar()["vanzare-apartamente/timis"] == {ASTEPTARE: 1}
+    coada.inchide()
+
+
+def test_pauza_de_limitare_este_comuna_proceselor(tmp_path):
+    #  Un 429 primit de un proces de lucru oprește și cererile celorlalte procese către același host
+    cale = str(tmp_path / "coada.sqlite")
+    coada, alt_proces = CoadaLucru(cale), CoadaLucru(cale)
+    Intrerupator(comun=coada).deschide("host", retry_after="0.2")
+    intrerupator = Intrerupator(comun=alt_proces)
+    inceput = time.monotonic()
+    asyncio.run(intrerupator.asteapta("host"))
+    assert time.monotonic() - inceput >= 0.15
+    inceput = time.monotonic()
+    asyncio.run(intrerupator.asteapta("alt-host"))
+    assert time.monotonic() - inceput < 0.05
+    alt_proces.inchide()
+    coada.inchide()
+
+
+def test_descarcatorul_pastreaza_rata_intre_liste(server):
+    #  Limitatorul unui Descarcator (o sesiune pe proces de lucru, Scraper_Queue) nu repornește la fiecare lot
+    descarcator = Descarcator(pagini_pe_secunda=10)
+    try:
+        sesiune = descarcator.sesiune
+        for lot in range(3):
+            [(_, html)] = descarcator.pagini([server.url(f"/limitat/200/0?lot={lot}")])
+            assert len(parseaza_pagina(html)) == 3
+        assert descarcator.sesiune is sesiune
+    finally:
+        descarcator.inchide()
+    pauze = [dupa - inainte for inainte, dupa in zip(server.momente, server.momente[1:])]
+    assert min(pauze) >= 0.09
+
+
+def test_sterge_expirate_doar_din_tinta_crawl_ului(backend, incarca_anunturi):
+    incarca_anunturi([anunt("vechi")], date(2024, 3, 1))
+    incarca_anunturi([anunt("arad", locatie="Arad, zona Centru")], date(2024, 3, 1), judet="arad")
+    incarca_anunturi([anunt("chirie", pret=450)], date(2024, 3, 1), categorie="inchiriere-apartamente")
+    incarca_anunturi([anunt("recent")], date(2024, 3, 8))
+    sterse = backend.sterge_expirate("2024-03-05", "2024-03-08")
+    assert sterse == [(backend.id_zone([ZONA])[0], 2, 80000, 55.0, 1455)]
+    ramase = backend.sqlconnection.execute("SELECT IdAnunt FROM Imobiliare ORDER BY IdAnunt;").fetchall()
+    assert ramase == [("arad",), ("chirie",), ("recent",)]
+    marcate = backend.sqlconnection.execute("SELECT IdAnunt FROM IstoricAnunturi WHERE Sters = 1;").fetchall()
+    assert marcate == [("vechi",)]
+    #  Anunțurile altor ținte expiră doar la crawl-ul lor și nu ies din agregatele hărții
+    assert backend.sterge_expirate("2024-03-05", "2024-03-08", "inchiriere-apartamente", "timis") == []
+    assert backend.sqlconnection.execute("SELECT count(*) FROM Imobiliare;").fetchone() == (2,)
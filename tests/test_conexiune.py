@@ -0,0 +1,43 @@
+import pytest
+import sqlalchemy
+
+import SQL_Conexiune
+from SQL_Conexiune import conexiune_dbapi, engine, url_baza
+
+
+def test_engine_sqlite_comun_procesului(tmp_path):
+    #  Același engine (și același pool) pentru toate apelurile din proces, cu conexiunile verificate la preluare
+    cale = tmp_path / "imobiliare.sqlite"
+    sqlEngine = engine("sqlite", cale)
+    assert engine("sqlite", cale) is sqlEngine
+    assert engine("sqlite", tmp_path / "alta.sqlite") is not sqlEngine
+    assert isinstance(sqlEngine.pool, sqlalchemy.pool.QueuePool)
+    assert sqlEngine.pool._pre_ping
+    with sqlEngine.begin() as conexiune:
+        conexiune.execute(sqlalchemy.text("create table t (x integer)"))
+        conexiune.execute(sqlalchemy.text("insert into t values (1), (2)"))
+    #  Conexiunea driverului (Scraper_Loader) vede aceeași bază
+    conexiune = conexiune_dbapi("sqlite", cale)
+    try:
+        assert conexiune.cursor().execute("select sum(x) from t").fetchone() == (3,)
+    finally:
+        conexiune.close()
+
+
+def test_comutatorul_de_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(SQL_Conexiune, "BACKEND", "sqlite")
+    monkeypatch.setattr(SQL_Conexiune, "CALE_SQLITE", str(tmp_path / "implicit.sqlite"))
+    assert engine().url.get_backend_name() == "sqlite"
+    assert engine().url.database == str(tmp_path / "implicit.sqlite")
+    assert engine() is engine("sqlite")
+
+
+def test_mysql_fara_credentiale(monkeypatch):
+    monkeypatch.delenv("IMOBILIARE_MYSQL_USER", raising=False)
+    monkeypatch.delenv("IMOBILIARE_MYSQL_PASSWORD", raising=False)
+    with pytest.raises(RuntimeError, match="IMOBILIARE_MYSQL_USER, IMOBILIARE_MYSQL_PASSWORD"):
+        url_baza("mysql")
+    monkeypatch.setenv("IMOBILIARE_MYSQL_USER", "test")
+    monkeypatch.setenv("IMOBILIARE_MYSQL_PASSWORD", "secret")
+    url = url_baza("mysql")
+    assert (url.username, url.password, url.database) == ("test", "secret", "PROIECT_DIPLOMA")
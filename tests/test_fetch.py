@@ -0,0 +1,28 @@
+import pytest
+
+import Scraper_Fetch
+from Metrici import METRICI
+from Scraper_Fetch import itereaza_pagini
+from Scraper_Parser import parseaza_pagina
+
+
+@pytest.fixture(autouse=True)
+def fara_pauze(monkeypatch):
+    #  Reîncercările pornesc imediat, iar rata nu limitează testele
+    monkeypatch.setattr(Scraper_Fetch, "BACKOFF_BAZA", 0)
+    METRICI.reseteaza()
+
+
+def test_paginile_sunt_predate_in_ordine(server):
+    #  Paginile salvate sunt servite cu întârzieri descrescătoare, deci sunt descărcate în altă ordine decât
+    #  cea în care ajung la parser
+    urls = [server.url(f"/pagina/{numar}") for numar in range(20)]
+    pagini = list(itereaza_pagini(urls, concurenta=8, pagini_pe_secunda=None))
+    assert [url for url, _ in pagini] == urls
+    for numar, (_, html) in enumerate(pagini):
+        anunturi = parseaza_pagina(html)
+        assert [anunt.id_anunt for anunt in anunturi] == [f"P{numar}-1", f"P{numar}-2", f"P{numar}-3"]
+        assert [anunt.pret for anunt in anunturi] == [74500, 52300, None]
+    assert METRICI.contoare["pagini_descarcate"] == 20
+    assert METRICI.contoare["anunturi_parsate"] == 60
+
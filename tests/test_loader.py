@@ -0,0 +1,29 @@
+import sqlite3
+from datetime import date
+
+from Scraper_Loader import BACKENDURI, BackendMySQL, linie_infile
+from tests.conftest import anunt
+
+
+def test_linie_infile_null_si_separatori():
+    #  None devine marcajul NULL nescapat; tab-ul, linia nouă și backslash-ul din text sunt escapate, ca LOAD DATA
+    #  să nu le citească drept separatori
+    rand = ("anunt-1", None, "Titlu\tcu tab", 3, "C:\\cale\nnoua", 54.5)
+    assert linie_infile(rand) == "anunt-1\t\\N\tTitlu\\tcu tab\t3\tC:\\\\cale\\nnoua\t54.5\n"
+
+
+def test_incarcarea_sqlite_in_loturi(backend, incarca_anunturi):
+    #  Căutările IN (...) ale unui lot de 1000 de anunțuri rămân sub limita de 999 de variabile a versiunilor
+    #  SQLite anterioare 3.32, iar anunțurile sunt scrise în loturi, cu upsert
+    backend.sqlconnection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    anunturi = [anunt(f"a{i}", pret=60000 + i) for i in range(2500)]
+    assert incarca_anunturi(anunturi[:1500], date(2024, 3, 1)) == 1500
+    assert incarca_anunturi(anunturi[1000:], date(2024, 3, 8)) == 1500
+    assert backend.sqlconnection.execute("SELECT count(*), sum(UltimaData = '2024-03-08') "
+                                         "FROM Imobiliare;").fetchone() == (2500, 1500)
+    assert len(backend.amprente([a.id_anunt for a in anunturi])) == 2500
+
+
+def test_modul_infile_poate_fi_ales():
+    assert BACKENDURI["mysql-infile"].keywords == {"mod": "infile"}
+    assert BACKENDURI["mysql"] is BackendMySQL
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+import Scraper_Fetch
+from Metrici import METRICI
+from Scraper_Checkpoint import Checkpoint
+from Scraper_Fetch import EroareTranzitorie, Intrerupator, itereaza_pagini
+from Scraper_Parser import parseaza_pagina
+from tests.conftest import anunt
+
+
+@pytest.fixture(autouse=True)
+def fara_pauze(monkeypatch):
+    #  Reîncercările pornesc imediat
+    monkeypatch.setattr(Scraper_Fetch, "BACKOFF_BAZA", 0)
+    METRICI.reseteaza()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_limitarea_este_reincercata(server, status):
+    url = server.url(f"/limitat/{status}/2")
+    [(_, html)] = itereaza_pagini([url], pagini_pe_secunda=None)
+    assert [anunt.id_anunt for anunt in parseaza_pagina(html)] == ["X7A10001", "X7A10002", "X7A10003"]
+    assert server.cereri[f"/limitat/{status}/2"] == 3
+    assert METRICI.contoare["reincercari"] == 2
+
+
+def test_limitarea_persistenta_opreste_crawl_ul(server, monkeypatch):
+    monkeypatch.setattr(Scraper_Fetch, "INCERCARI", 3)
+    with pytest.raises(EroareTranzitorie, match="HTTP 503"):
+        list(itereaza_pagini([server.url("/limitat/503/10")], pagini_pe_secunda=None))
+    assert server.cereri["/limitat/503/10"] == 3
+
+
+def test_intrerupatorul_dubleaza_pauza_si_se_reseteaza():
+    intrerupator = Intrerupator(pauza=0.2, pauza_maxima=0.3)
+    for pauza in (0.2, 0.3, 0.3):  # dublată la fiecare limitare consecutivă, până la pauza maximă
+        inceput = time.monotonic()
+        intrerupator.deschide("host")
+        assert intrerupator.deschis_pana_la["host"] - inceput == pytest.approx(pauza, abs=0.05)
+        intrerupator.deschis_pana_la.clear()
+    intrerupator.inchide("host")
+    intrerupator.deschide("host", retry_after="0.05")  # durata cerută de server are prioritate
+    inceput = time.monotonic()
+    asyncio.run(intrerupator.asteapta("host"))
+    assert 0 < time.monotonic() - inceput < 0.2
+    assert intrerupator.limitari["host"] == 1
+
+
+def test_rularea_intrerupta_este_reluata(tmp_path):
+    #  Reluarea păstrează data rulării întrerupte și anunțurile paginilor terminate
+    cale = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = Checkpoint(cale)
+    assert checkpoint.incepe("timis", date(2024, 3, 1)) == date(2024, 3, 1)
+    checkpoint.marcheaza("timis", "pagina-1", [anunt("a1"), anunt("a2", metri=None)])
+    checkpoint.inchide()
+    checkpoint = Checkpoint(cale)
+    assert checkpoint.incepe("timis", date(2024, 3, 2)) == date(2024, 3, 1)
+    assert checkpoint.pagini("timis") == {"pagina-1": [anunt("a1"), anunt("a2", metri=None)]}
+    checkpoint.termina("timis")
+    assert checkpoint.incepe("timis", date(2024, 3, 2)) == date(2024, 3, 2)
+    assert checkpoint.pagini("timis") == {}
+    checkpoint.inchide()
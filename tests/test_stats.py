@@ -0,0 +1,59 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from Benchmark_Date import anunturi_sintetice
+from SQL_Aggregation import citeste_agregat
+from SQL_Stats import CUANTILE, FACTOR_IQR, TAIERE, statistici_grupate
+from SQL_Summary import AgregateZona, nume_zone_harta
+
+
+def _asteptate(valori):
+    #  Statisticile unui grup calculate direct, cu pandas
+    valori = pd.Series(valori).dropna().sort_values()
+    taiate = int(np.floor(TAIERE * len(valori)))
+    p25, p75 = valori.quantile(0.25), valori.quantile(0.75)
+    marcate = (valori < p25 - FACTOR_IQR * (p75 - p25)) | (valori > p75 + FACTOR_IQR * (p75 - p25))
+    return {"numar": len(valori), "medie": valori.mean(),
+            "medie_trunchiata": valori.iloc[taiate:len(valori) - taiate].mean(),
+            **{nume: valori.quantile(q) for nume, q in CUANTILE.items()},
+            "aberante": int(marcate.sum()), "minim": valori[~marcate].min(), "maxim": valori[~marcate].max()}
+
+
+def test_statisticile_grupate_egale_cu_pandas():
+    rng = np.random.default_rng(7)
+    coduri = rng.integers(0, 6, 3000)
+    valori = np.round(rng.lognormal(11, 0.4, 3000))
+    valori[rng.random(3000) < 0.05] = np.nan
+    valori[:5] = 10 ** 7  # prețuri declarate eronat
+    rezultat = statistici_grupate(coduri, valori, 7)  # grupul 6 nu are valori
+    asteptat = pd.DataFrame([_asteptate(valori[coduri == grup]) for grup in range(6)])
+    pd.testing.assert_frame_equal(rezultat.iloc[:6][asteptat.columns], asteptat, check_dtype=False)
+    assert rezultat.loc[6, "numar"] == 0 and rezultat.loc[6, ["medie", "p50", "minim"]].isna().all()
+
+
+def test_ponderile_egale_cu_valorile_repetate():
+    #  O histogramă (valoare, număr de apariții) dă aceleași statistici ca șirul cu valorile repetate
+    rng = np.random.default_rng(11)
+    coduri = rng.integers(0, 4, 400)
+    valori = rng.integers(40, 60, 400).astype(np.float64)
+    ponderi = rng.integers(1, 5, 400)
+    expandat = statistici_grupate(np.repeat(coduri, ponderi), np.repeat(valori, ponderi), 4)
+    pd.testing.assert_frame_equal(statistici_grupate(coduri, valori, 4, ponderi=ponderi), expandat)
+
+
+def test_agregatele_incrementale_egale_cu_scanarea_completa(backend, incarca_anunturi, tmp_path):
+    #  Starea salvată între rulări și exportul hărții dau aceleași valori ca scanarea completă (SQL_Aggregation)
+    agregate = AgregateZona()
+    anunturi = list(anunturi_sintetice(600, seed=1))
+    incarca_anunturi(anunturi[:400], date(2024, 3, 1), agregate=agregate)
+    incarca_anunturi(anunturi[300:], date(2024, 3, 8), agregate=agregate)
+    for rand in backend.sterge_expirate("2024-03-05", "2024-03-08"):
+        agregate.scade(*rand)
+    cale = str(tmp_path / "agregate.json")
+    agregate.salveaza(cale)
+    salvate = AgregateZona.citeste(cale)
+    scanare = citeste_agregat(backend.engine)
+    pd.testing.assert_frame_equal(salvate.cadru(nume_zone_harta(backend.engine))[scanare.columns], scanare,
+                                  check_dtype=False)
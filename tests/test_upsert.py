@@ -0,0 +1,28 @@
+from datetime import date
+
+from Scraper_Loader import pagina_neschimbata
+from Scraper_Parser import amprenta
+from tests.conftest import anunt
+
+
+def test_upsert_actualizeaza_anuntul_existent(backend, incarca_anunturi):
+    incarca_anunturi([anunt("a1"), anunt("a2")], date(2024, 3, 1))
+    incarca_anunturi([anunt("a1", pret=76000)], date(2024, 3, 8))
+    randuri = backend.sqlconnection.execute("SELECT IdAnunt, PretFinal, PrimaData, UltimaData "
+                                            "FROM Imobiliare ORDER BY IdAnunt;").fetchall()
+    assert randuri == [("a1", 76000, "2024-03-01", "2024-03-08"), ("a2", 80000, "2024-03-01", "2024-03-01")]
+    istoric = backend.sqlconnection.execute("SELECT DataRulare, IdAnunt, PretFinal FROM IstoricAnunturi "
+                                            "ORDER BY DataRulare, IdAnunt;").fetchall()
+    assert istoric == [("2024-03-01", "a1", 80000), ("2024-03-01", "a2", 80000), ("2024-03-08", "a1", 76000)]
+
+
+def test_pagina_neschimbata_opreste_crawl_ul_incremental(backend, incarca_anunturi):
+    pagina = [anunt("a1"), anunt("a2")]
+    incarca_anunturi(pagina, date(2024, 3, 1))
+    assert pagina_neschimbata(backend, [(a.id_anunt, amprenta(a)) for a in pagina])
+    #  Un preț schimbat sau un anunț nou înseamnă că pagina trebuie încărcată, deci crawl-ul continuă
+    modificata = [anunt("a1", pret=76000), anunt("a2")]
+    assert not pagina_neschimbata(backend, [(a.id_anunt, amprenta(a)) for a in modificata])
+    noua = pagina + [anunt("a3")]
+    assert not pagina_neschimbata(backend, [(a.id_anunt, amprenta(a)) for a in noua])
+    assert not pagina_neschimbata(backend, [])